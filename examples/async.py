@@ -1,13 +1,15 @@
+""" Example Application - Async
+
+Reading 1000 samples at 1000 Hz blocks for about a second. With
+`AsyncMPS060602` the read runs off the event loop, so it overlaps with
+`asyncio.sleep(1)` and both finish in about one second instead of two.
+"""
+
 import time
 from codetiming import Timer
-import signal
 import asyncio
 from mps060602 import MPS060602, MPS060602Para, ADChannelMode, PGAAmpRate
-
-
-def close_card(card):
-    card.suspend()
-    card.close()
+from mps060602.aio import AsyncMPS060602
 
 
 def new_card():
@@ -16,37 +18,44 @@ def new_card():
         ADSampleRate=1000,
         Gain=PGAAmpRate.range_10V,
     )
-    card = MPS060602(device_number=0, para=para, buffer_size=2048)
+    card = MPS060602(device_number=0, para=para, buffer_size=1000)
     card.start()
     return card
 
 
+async def async_read_to_volt(card: AsyncMPS060602):
+    with Timer(text="\n asynchronous `sleep(1); read_to_volt()` elapsed time: {:.1f}"):
+        await asyncio.gather(asyncio.sleep(1), card.read_to_volt())
 
 
-async def async_read_to_volt(card: MPS060602):
-    async def sleep():
-        await asyncio.sleep(1)
-
-    async def read_to_volt(card: MPS060602):
-        await card.read_to_volt()
-
-    with Timer(text="\n asynchorounous `sleep(1); read_to_volt()` elapsed time: {:.1f}"):
-        tasks = [sleep(), read_to_volt(card)]
-        await asyncio.gather(*tasks)
-
 def sync_read_to_volt(card: MPS060602):
-    with Timer(text="\n synchrounous `sleep(1); read_to_volt()` elapsed time: {:.1f}"):
+    with Timer(text="\n synchronous `sleep(1); read_to_volt()` elapsed time: {:.1f}"):
         time.sleep(1)
         card.read_to_volt()
 
 
+async def stream_blocks(card: AsyncMPS060602, n_blocks: int):
+    with Timer(text="\n streamed {} blocks in {{:.1f}} seconds".format(n_blocks)):
+        received = 0
+        async for block in card.stream(block_size=250, max_queue=4):
+            # Other coroutines keep running while the next block is read.
+            await asyncio.sleep(0.1)
+            received += 1
+            if received == n_blocks:
+                break
+
+
 async def main():
     card = new_card()
     sync_read_to_volt(card)
-    await async_read_to_volt(card)
+
+    async_card = AsyncMPS060602(card)
+    await async_read_to_volt(async_card)
+    await stream_blocks(async_card, 8)
+
+    await async_card.suspend()
+    await async_card.close()
 
 
 if __name__ == "__main__":
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(main())
-    loop.close()
+    asyncio.run(main())
@@ -1,10 +1,13 @@
-import signal
-import numpy as np
+import time
 from mps060602 import MPS060602, MPS060602Para, ADChannelMode, PGAAmpRate
+from mps060602.pipeline import Pipeline, sink, statistics
 
 """ Example Application - Voltmeter
 
 Simple Cli voltmeter, press ctrl-c to stop.
+
+Statistics are over the last second (5 blocks of 2048 samples at 10 kHz),
+updated incrementally from raw blocks by a pipeline fed by the card.
 """
 
 
@@ -16,25 +19,29 @@ def main():
         Gain=PGAAmpRate.range_10V,
     )
     card = MPS060602(device_number=0, para=para, buffer_size=2048)
-    card.start()
-    signal.signal(signal.SIGINT, close(card))
-
-    while True:
-        data = card.read_to_volt()
-
-        # preprocess
-        average = np.average(data)
-        variance = np.var(data)
-        standard_deviation = np.std(data)
-
-        print("average {:.2}, variance {:.2}, standard deviation {:.2}".format(average, variance, standard_deviation))
-
-def close(card):
-    def handler(signum, frame):
-        print("Card closed.")
-        card.suspend()
+    pipeline = Pipeline(card, block_size=2048)
+    stats = statistics(window_blocks=5)
+
+    def show(block):
+        s = stats.stats.window(1)
+        print(
+            "average {:.2}, variance {:.2}, standard deviation {:.2}, rms {:.2}, crest {:.2}".format(
+                s.mean, s.variance, s.std, s.rms, s.crest_factor
+            )
+        )
+
+    # Both stages are fused, they run on the thread reading the ring.
+    pipeline.then(stats).then(sink(show))
+    pipeline.start()
+    try:
+        while pipeline.running:
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.stop()
         card.close()
-    return handler
+        print("Card closed.")
 
 
 if __name__ == "__main__":
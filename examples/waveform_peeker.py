@@ -1,5 +1,4 @@
 import matplotlib.pyplot as plt
-import time
 from mps060602 import MPS060602, MPS060602Para, ADChannelMode, PGAAmpRate
 
 """ Example Application - Waveform Peeker
@@ -20,12 +19,11 @@ def main(buffer_size, sample_rate):
     card.start()
 
     # read data
-    start = time.time()
     buffer = card.data_in()
-    diff = time.time() - start
+    metrics = card.metrics.snapshot()
     print(
         "read {} data in {} second, sample rate {} per second".format(
-            buffer_size, diff, sample_rate
+            buffer_size, metrics.dll_seconds, sample_rate
         )
     )
 
@@ -2,6 +2,9 @@ import sys
 from .core import MPS060602
 from .core import PGAAmpRate, ADChannelMode
 from .core import MPS060602Para
+from .block import Block
+from .streaming import ContinuousAcquisition
+from .multicard import MultiCardManager
 
 if sys.version_info[:2] >= (3, 8):
     # TODO: Import directly (no need for conditional) when `python_requires = >= 3.8`
@@ -0,0 +1,128 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterable
+
+import numpy as np
+
+from .block import Block
+from .buffers import BufferPool
+from .core import MPS060602
+
+
+class AsyncMPS060602:
+    """asyncio facade of :class:`~mps060602.core.MPS060602`.
+
+    Blocking DLL calls run on a single worker thread owned by this object, so
+    they never block the event loop and are never issued concurrently to the
+    same card.
+
+    Args:
+        card (MPS060602): Card to drive.
+    """
+
+    def __init__(self, card: MPS060602) -> None:
+        self.card = card
+        self._executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="mps060602-aio-{}".format(card.device.number),
+        )
+
+    async def _run(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, function, *args)
+
+    async def start(self):
+        """Async version of :func:`MPS060602.start`."""
+        await self._run(self.card.start)
+
+    async def suspend(self):
+        """Async version of :func:`MPS060602.suspend`."""
+        await self._run(self.card.suspend)
+
+    async def close(self):
+        """Async version of :func:`MPS060602.close`, also shuts down the worker thread."""
+        try:
+            await self._run(self.card.close)
+        finally:
+            self._executor.shutdown(wait=False)
+
+    async def data_in(self, sample_number: int = None) -> Iterable[int]:
+        """Async version of :func:`MPS060602.data_in`."""
+        return await self._run(self.card.data_in, sample_number)
+
+    async def readinto(self, out, sample_number: int = None) -> int:
+        """Async version of :func:`MPS060602.readinto`."""
+        return await self._run(self.card.readinto, out, sample_number)
+
+    async def read_to_volt(self, sample_number: int = None) -> Iterable[float]:
+        """Async version of :func:`MPS060602.read_to_volt`."""
+        return await self._run(self.card.read_to_volt, sample_number)
+
+    async def read_to_volt_array(
+        self, sample_number: int = None, dtype=np.float64
+    ) -> np.ndarray:
+        """Async version of :func:`MPS060602.read_to_volt_array`."""
+        return await self._run(self.card.read_to_volt_array, sample_number, dtype)
+
+    async def stream(
+        self, block_size: int = 4096, max_queue: int = 8
+    ) -> AsyncIterator[Block]:
+        """Read blocks continuously, ``async for block in card.stream()``.
+
+        Reads keep going in the background while the consumer awaits other
+        things, up to ``max_queue`` blocks ahead. When the queue is full, or
+        no buffer is free, reading waits for the consumer.
+
+        A yielded block is a view into a pooled buffer, valid until the next
+        iteration, see :func:`Block.copy`.
+
+        Args:
+            block_size (int, optional): Samples per block. Defaults to 4096.
+            max_queue (int, optional): Blocks read ahead at most. Defaults to 8.
+
+        Yields:
+            Block: Block tagged with the channel mode and gain.
+        """
+        # One block in flight in the worker, ``max_queue`` queued, one held by consumer.
+        pool = BufferPool(block_size, max_queue + 2)
+        # Counts free buffers, the consumer may hold two while swapping blocks.
+        free = asyncio.Semaphore(max_queue + 2)
+        queue = asyncio.Queue(maxsize=max_queue)
+
+        async def produce():
+            while True:
+                await free.acquire()
+                buffer = pool.acquire(block=False)
+                await self._run(self.card.readinto, buffer)
+                await queue.put((buffer, self.card.state.parameter))
+
+        producer = asyncio.ensure_future(produce())
+        held = None
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait(
+                    (getter, producer), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not getter.done():
+                    getter.cancel()
+                    producer.result()
+                if held is not None:
+                    held.release()
+                    free.release()
+                held, para = getter.result()
+                yield Block.from_para(held.array, para, calibration=self.card.calibration)
+        finally:
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+
+    async def __aenter__(self) -> "AsyncMPS060602":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.suspend()
+        await self.close()
@@ -0,0 +1,338 @@
+"""Export of blocks and recordings to Apache Arrow and Parquet.
+
+Needs ``pyarrow``, installed with ``pip install MPS060602[arrow]``.
+
+Samples are exported raw, one uint16 column per input channel, ``in1``,
+``in2``, or ``difference``. The columns wrap the numpy buffers of the
+blocks, or the memory map of a recording, nothing is copied, except in
+``in1_and_2`` mode where the interleaved channels have to be split. With
+``interleaved=True`` that mode gives a single ``frame`` column of
+two-value fixed size lists instead, which wraps the interleaved buffer as is.
+
+The schema carries the acquisition parameters as JSON under the
+:data:`METADATA_KEY` metadata key, enough to derive volts and times on
+read with :func:`volts` and :func:`times`; no volt column is stored.
+Given the :class:`~mps060602.calibration.Calibration` of the card, the
+offset and scale of the exported channels at the exported gain are stored
+too, and :func:`volts` applies them as :func:`Block.volts
+<mps060602.block.Block.volts>` did.
+"""
+
+import json
+from typing import Iterator, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .block import Block
+from .core import ADChannelMode, MPS060602Para, PGAAmpRate, to_volt_array
+from .errors import ChannelNotAcquired
+from .reader import Recording
+
+METADATA_KEY = b"mps060602"
+
+_COLUMNS = {
+    ADChannelMode.in1: ("in1",),
+    ADChannelMode.in2: ("in2",),
+    ADChannelMode.in1_and_2: ("in1", "in2"),
+    ADChannelMode.difference: ("difference",),
+}
+
+
+_CHANNELS = {
+    ADChannelMode.in1: (1,),
+    ADChannelMode.in2: (2,),
+    ADChannelMode.in1_and_2: (1, 2),
+    ADChannelMode.difference: (),
+}
+
+
+def _column_name(channel: int) -> str:
+    return {0: "difference", 1: "in1", 2: "in2"}[channel]
+
+
+def schema(
+    para: MPS060602Para,
+    device_number: int = 0,
+    start_time: float = 0.0,
+    first_frame: int = 0,
+    interleaved: bool = False,
+    calibration=None,
+) -> pa.Schema:
+    """Arrow schema of samples acquired with ``para``.
+
+    Args:
+        para (MPS060602Para): Parameters of the card.
+        device_number (int, optional): Device number. Defaults to 0.
+        start_time (float, optional): Unix time of the first frame. Defaults to 0.0.
+        first_frame (int, optional): Index of the first frame since the card started. Defaults to 0.
+        interleaved (bool, optional): One ``frame`` column in ``in1_and_2`` mode. Defaults to False.
+        calibration (Calibration, optional): Calibration of the card, e.g.
+        ``card.calibration``. Defaults to None, nominal conversion.
+    """
+    mode = ADChannelMode(para.ADChannel)
+    if interleaved and mode == ADChannelMode.in1_and_2:
+        fields = [pa.field("frame", pa.list_(pa.uint16(), 2), nullable=False)]
+    else:
+        fields = [pa.field(name, pa.uint16(), nullable=False) for name in _COLUMNS[mode]]
+    metadata = {
+        "channel_mode": mode.name,
+        "sample_rate": para.ADSampleRate,
+        "gain_index": para.Gain.index,
+        "full_scale": para.Gain.full_scale,
+        "device_number": device_number,
+        "start_time": start_time,
+        "first_frame": first_frame,
+    }
+    if calibration is not None:
+        metadata["calibration"] = {
+            str(channel): {"offset": entry.offset, "scale": entry.scale}
+            for channel in (_CHANNELS[mode] or (0,))
+            for entry in (calibration.get(channel, para.Gain),)
+        }
+    return pa.schema(fields, metadata={METADATA_KEY: json.dumps(metadata)})
+
+
+def metadata(schema: pa.Schema) -> dict:
+    """Acquisition metadata stored in ``schema`` by :func:`schema`."""
+    if not schema.metadata or METADATA_KEY not in schema.metadata:
+        raise ValueError("Schema has no {} metadata.".format(METADATA_KEY.decode()))
+    return json.loads(schema.metadata[METADATA_KEY])
+
+
+def para(schema: pa.Schema) -> MPS060602Para:
+    """Parameters of the card, from the metadata of ``schema``."""
+    m = metadata(schema)
+    return MPS060602Para(ADChannelMode[m["channel_mode"]], m["sample_rate"], PGAAmpRate.from_index(m["gain_index"]))
+
+
+def _wrap(raw: np.ndarray) -> pa.Array:
+    # Arrow keeps a reference to the numpy buffer.
+    return pa.Array.from_buffers(pa.uint16(), len(raw), [None, pa.py_buffer(raw)])
+
+
+def to_batch(block: Block, schema: pa.Schema) -> pa.RecordBatch:
+    """Record batch of ``block``, one row per frame, wrapping ``block.raw``.
+
+    The batch shares the memory of the block: export blocks of a
+    :class:`~mps060602.streaming.ContinuousAcquisition` before releasing them,
+    or :func:`Block.copy <mps060602.block.Block.copy>` them.
+
+    Raises:
+        ValueError: ``block`` holds partial frames or doesn't match ``schema``.
+    """
+    raw = np.ascontiguousarray(block.raw, dtype=np.uint16)
+    if len(raw) % block.frame_width:
+        raise ValueError("{} values aren't whole frames of {}.".format(len(raw), block.frame_width))
+    if schema.names == ["frame"]:
+        columns = [pa.FixedSizeListArray.from_arrays(_wrap(raw), 2)]
+    else:
+        columns = [_wrap(np.ascontiguousarray(block.channel(c))) if block.channels else _wrap(raw)
+                   for c in block.channels or (0,)]
+    if len(columns) != len(schema.names):
+        raise ValueError("Block of mode {} doesn't match columns {}.".format(block.mode.name, schema.names))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def recording_batches(
+    recording: Recording, group_seconds: float = 1.0, interleaved: bool = False, calibration=None
+) -> Iterator[pa.RecordBatch]:
+    """Record batches of ``group_seconds`` of ``recording``.
+
+    Batches of raw recordings wrap the memory map, compressed ones are
+    decoded a batch at a time.
+    """
+    header = recording.header
+    s = schema(
+        header.para,
+        header.device_number,
+        header.start_time,
+        header.first_sample // header.frame_width,
+        interleaved,
+        calibration,
+    )
+    group = max(int(round(group_seconds * header.sample_rate)), 1)
+    for first in range(0, len(recording), group):
+        frames = recording.read_frames(first, first + group)
+        yield to_batch(Block(frames.reshape(-1), header.channel_mode, header.gain), s)
+
+
+class ParquetExporter:
+    """Write blocks to a Parquet file, one row group per ``group_seconds``.
+
+    Blocks are gathered until a row group is full, then written at once;
+    nothing is converted, the uint16 columns are written as read.
+
+    Args:
+        path: Destination file, overwritten.
+        para (MPS060602Para): Parameters of the card.
+        device_number (int, optional): Device number. Defaults to 0.
+        start_time (float, optional): Unix time of the first frame. Defaults to 0.0.
+        first_frame (int, optional): Index of the first frame since the card started. Defaults to 0.
+        group_seconds (float, optional): Duration of a row group. Defaults to 1.0.
+        interleaved (bool, optional): See module documentation. Defaults to False.
+        compression (str, optional): Parquet compression codec. Defaults to "zstd".
+        calibration (Calibration, optional): Calibration of the card, stored
+        in the metadata. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        path,
+        para: MPS060602Para,
+        device_number: int = 0,
+        start_time: float = 0.0,
+        first_frame: int = 0,
+        group_seconds: float = 1.0,
+        interleaved: bool = False,
+        compression: str = "zstd",
+        calibration=None,
+    ) -> None:
+        self.schema = schema(para, device_number, start_time, first_frame, interleaved, calibration)
+        self.group_rows = max(int(round(group_seconds * para.ADSampleRate)), 1)
+        self.rows_written = 0
+        """int: Frames written to the file so far."""
+        self._batches = []
+        self._pending = 0
+        self._writer = pq.ParquetWriter(path, self.schema, compression=compression)
+
+    def write(self, data: Union[Block, pa.RecordBatch]):
+        """Queue a block or a batch of :func:`to_batch`, writing every full row group.
+
+        Blocks are referenced until their row group is written, pass copies
+        of blocks whose buffer is reused.
+        """
+        batch = data if isinstance(data, pa.RecordBatch) else to_batch(data, self.schema)
+        self._batches.append(batch)
+        self._pending += batch.num_rows
+        if self._pending >= self.group_rows:
+            table = pa.Table.from_batches(self._batches, self.schema)
+            full = self._pending - self._pending % self.group_rows
+            self._write(table.slice(0, full))
+            rest = table.slice(full)
+            self._batches = rest.to_batches()
+            self._pending = rest.num_rows
+
+    def _write(self, table: pa.Table):
+        self._writer.write_table(table, row_group_size=self.group_rows)
+        self.rows_written += table.num_rows
+
+    def close(self):
+        """Write the last, partial, row group and close the file."""
+        if self._writer is None:
+            return
+        if self._pending:
+            self._write(pa.Table.from_batches(self._batches, self.schema))
+        self._batches = []
+        self._pending = 0
+        self._writer.close()
+        self._writer = None
+
+    def __enter__(self) -> "ParquetExporter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def export_recording(
+    recording,
+    path,
+    group_seconds: float = 1.0,
+    interleaved: bool = False,
+    compression: str = "zstd",
+    calibration=None,
+) -> int:
+    """Convert a recording file, or an open :class:`~mps060602.reader.Recording`, to Parquet.
+
+    Recordings hold raw codes only, pass the ``calibration`` of the card
+    that recorded them to store it in the metadata.
+
+    Returns:
+        int: Frames written.
+    """
+    opened = not isinstance(recording, Recording)
+    if opened:
+        recording = Recording(recording)
+    try:
+        header = recording.header
+        with ParquetExporter(
+            path,
+            header.para,
+            header.device_number,
+            header.start_time,
+            header.first_sample // header.frame_width,
+            group_seconds,
+            interleaved,
+            compression,
+            calibration,
+        ) as exporter:
+            for batch in recording_batches(recording, group_seconds, interleaved, calibration):
+                exporter.write(batch)
+        return exporter.rows_written
+    finally:
+        if opened:
+            recording.close()
+
+
+def read_parquet(path, columns=None) -> pa.Table:
+    """Read a file of :class:`ParquetExporter`, schema metadata included."""
+    return pq.read_table(path, columns=columns)
+
+
+def _raw_chunks(table: Union[pa.Table, pa.RecordBatch], channel: int):
+    mode = para(table.schema).ADChannel
+    if table.schema.names == ["frame"]:
+        if channel not in (1, 2):
+            raise ChannelNotAcquired(channel, mode.name)
+        column, step = table.column("frame"), (channel - 1, 2)
+    else:
+        name = _column_name(channel)
+        if name not in table.schema.names:
+            raise ChannelNotAcquired(channel, mode.name)
+        column, step = table.column(name), None
+    chunks = column.chunks if isinstance(column, pa.ChunkedArray) else [column]
+    for chunk in chunks:
+        if step is None:
+            yield chunk.to_numpy(zero_copy_only=True)
+        else:
+            yield chunk.flatten().to_numpy(zero_copy_only=True)[step[0]::step[1]]
+
+
+def volts(table: Union[pa.Table, pa.RecordBatch], channel: int = 1, dtype=np.float64) -> np.ndarray:
+    """Volts of a channel, converted from the raw column with the gain of the metadata.
+
+    The calibration of the metadata, when there is one, is applied as
+    ``(nominal - offset) * scale``.
+
+    Args:
+        table: Table or batch of this module.
+        channel (int, optional): 1 or 2, 0 in ``difference`` mode. Defaults to 1.
+        dtype (optional): Output float dtype. Defaults to np.float64.
+
+    Raises:
+        ChannelNotAcquired: ``channel`` wasn't exported.
+    """
+    gain = para(table.schema).Gain
+    out = np.empty(table.num_rows, dtype=dtype)
+    position = 0
+    for raw in _raw_chunks(table, channel):
+        to_volt_array(raw, gain, dtype, out=out[position:position + len(raw)])
+        position += len(raw)
+    entry = metadata(table.schema).get("calibration", {}).get(str(channel))
+    if entry is not None:
+        out -= entry["offset"]
+        out *= entry["scale"]
+    return out
+
+
+def times(table: Union[pa.Table, pa.RecordBatch], unix: bool = False) -> np.ndarray:
+    """Time of each row of a table holding a whole export, in seconds since its first frame.
+
+    Args:
+        unix (bool, optional): Unix time instead. Defaults to False.
+    """
+    m = metadata(table.schema)
+    t = np.arange(table.num_rows) / m["sample_rate"]
+    return t + m["start_time"] if unix else t
@@ -0,0 +1,163 @@
+import time
+from dataclasses import dataclass
+from typing import List, Sequence
+
+import numpy as np
+
+from .block import Block
+from .core import MPS060602, AmpRate, MPS060602Para, PGAAmpRate
+
+
+@dataclass
+class GainSwitch:
+    """One gain change made by :class:`AutoRange`.
+
+    Attributes:
+        block_index (int): Index of the block that triggered the change, since creation.
+        old (AmpRate): Gain before.
+        new (AmpRate): Gain after.
+        dead_time (float): Seconds between the end of the last read with ``old``
+        and the card acquiring again with ``new``.
+    """
+
+    block_index: int
+    old: AmpRate
+    new: AmpRate
+    dead_time: float
+
+
+class AutoRange:
+    """Pick the gain of a card from the level of the blocks it reads.
+
+    Each block is checked with two reductions, its smallest and largest raw
+    code, which give clipping and the peak level. The gain steps to a wider
+    range as soon as a block clips or its peak exceeds ``up`` of the full
+    scale, and to a narrower one only after ``hold_blocks`` blocks in a row
+    whose peak stays under ``down`` of the narrower full scale, so a signal
+    near a boundary doesn't flip the gain back and forth.
+
+    The card is only reconfigured when the gain actually changes, and only
+    stopped and restarted around ``MPS_Configure`` when it is running and
+    ``restart`` is set. Blocks are tagged with the gain they were read with,
+    so conversion stays right across switches.
+
+    Reads and switches happen on the calling thread; don't use it on a card
+    read by a :class:`~mps060602.streaming.ContinuousAcquisition`.
+
+    Args:
+        card (MPS060602): Configured card.
+        gains (Sequence[AmpRate], optional): Allowed gains. Defaults to all four.
+        up (float, optional): Peak fraction of full scale to widen the range. Defaults to 0.9.
+        down (float, optional): Peak fraction of the narrower full scale to
+        narrow the range. Defaults to 0.7.
+        hold_blocks (int, optional): Quiet blocks before narrowing. Defaults to 4.
+        clip_margin (int, optional): Codes from either end counted as clipped. Defaults to 16.
+        restart (bool, optional): Stop and start a running card around
+        ``MPS_Configure``. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        card: MPS060602,
+        gains: Sequence[AmpRate] = (
+            PGAAmpRate.range_10V,
+            PGAAmpRate.range_5V,
+            PGAAmpRate.range_2V,
+            PGAAmpRate.range_1V,
+        ),
+        up: float = 0.9,
+        down: float = 0.7,
+        hold_blocks: int = 4,
+        clip_margin: int = 16,
+        restart: bool = True,
+    ) -> None:
+        if not gains:
+            raise ValueError("No gain to choose from.")
+        self.card = card
+        self.gains: List[AmpRate] = sorted(gains, key=lambda g: g.full_scale, reverse=True)
+        self.up = up
+        self.down = down
+        self.hold_blocks = hold_blocks
+        self.clip_margin = clip_margin
+        self.restart = restart
+
+        self.switches: List[GainSwitch] = []
+        """List[GainSwitch]: Gain changes so far."""
+        self.clipped_blocks = 0
+        """int: Blocks with clipped samples."""
+        self._quiet = 0
+        self._blocks = 0
+        self._last_read_end = None
+
+    @property
+    def gain(self) -> AmpRate:
+        """AmpRate: Gain in effect."""
+        return self.card.state.parameter.Gain
+
+    @property
+    def dead_time(self) -> float:
+        """float: Total seconds lost to switches."""
+        return sum(s.dead_time for s in self.switches)
+
+    def read_block(self, sample_number: int = None, out: np.ndarray = None) -> Block:
+        """:func:`MPS060602.read_block`, then adjust the gain for the next read."""
+        block = self.card.read_block(sample_number, out)
+        self._last_read_end = time.perf_counter()
+        self.update(block)
+        return block
+
+    def update(self, block: Block) -> bool:
+        """Check a block read with the current gain, and switch gain if needed.
+
+        Returns:
+            bool: Whether the gain changed.
+        """
+        index = self._blocks
+        self._blocks += 1
+        raw = block.raw
+        if len(raw) == 0 or block.gain is not self.gain:
+            return False
+        low, high = int(raw.min()), int(raw.max())
+        clipped = low <= self.clip_margin or high >= 65535 - self.clip_margin
+        # Code 32768 is 0 V, both ends are full scale.
+        peak = max(32768 - low, high - 32768) / 32768 * block.gain.full_scale
+        self.clipped_blocks += clipped
+
+        position = self._position()
+        if clipped or peak > self.up * block.gain.full_scale:
+            self._quiet = 0
+            if position > 0:
+                return self._switch(index, self.gains[position - 1])
+            return False
+        if position + 1 < len(self.gains) and peak < self.down * self.gains[position + 1].full_scale:
+            self._quiet += 1
+            if self._quiet >= self.hold_blocks:
+                return self._switch(index, self.gains[position + 1])
+        else:
+            self._quiet = 0
+        return False
+
+    def _position(self) -> int:
+        gain = self.gain
+        for i, candidate in enumerate(self.gains):
+            if candidate is gain:
+                return i
+        # Configured outside of the allowed gains: rank by full scale.
+        return sum(g.full_scale > gain.full_scale for g in self.gains) - 1
+
+    def _switch(self, index: int, gain: AmpRate) -> bool:
+        """Configure ``gain``, skipping calls that wouldn't change anything."""
+        old = self.gain
+        self._quiet = 0
+        if gain is old:
+            return False
+        para = self.card.state.parameter
+        start = self._last_read_end if self._last_read_end is not None else time.perf_counter()
+        running = self.card.state.started
+        if running and self.restart:
+            self.card.suspend()
+        self.card.configure(MPS060602Para(para.ADChannel, para.ADSampleRate, gain))
+        if running and self.restart:
+            self.card.start()
+        self.switches.append(GainSwitch(index, old, gain, time.perf_counter() - start))
+        return True
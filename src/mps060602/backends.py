@@ -0,0 +1,93 @@
+import threading
+from ctypes import POINTER, c_int, c_ushort, c_void_p, cdll, sizeof
+from pathlib import Path
+
+INVALID_HANDLE = (1 << (sizeof(c_void_p) * 8)) - 1
+"""Handle returned by ``MPS_OpenDevice`` on failure, all bits set."""
+
+_dll = None
+_dll_lock = threading.Lock()
+
+
+def _is_64bit_process() -> bool:
+    # The DLL has to match the interpreter, not the OS: a 32 bit Python on a
+    # 64 bit Windows can only load the 32 bit DLL.
+    return sizeof(c_void_p) == 8
+
+
+def static_file_path() -> Path:
+    return Path(__file__).parent / "static"
+
+
+def _inpackage_dll_path() -> str:
+    filename = "MPS-060602.dll"
+    if _is_64bit_process():
+        filename = "MPS-060602x64.dll"
+    return str(static_file_path() / filename)
+
+
+class Backend:
+    """Interface of the functions :class:`~mps060602.core.MPS060602` calls.
+
+    Names and semantics follow the manufacturer DLL, so the loaded DLL itself
+    is a backend. Functions return 0 on failure, except ``MPS_OpenDevice``,
+    which returns :data:`INVALID_HANDLE`.
+    """
+
+    def MPS_OpenDevice(self, DeviceNumber: int) -> int:
+        raise NotImplementedError
+
+    def MPS_Configure(self, ADChannel: int, ADSampleRate: int, Gain: int, DeviceHandle) -> int:
+        raise NotImplementedError
+
+    def MPS_Start(self, DeviceHandle) -> int:
+        raise NotImplementedError
+
+    def MPS_DataIn(self, DataBuffer, SampleNumber: int, DeviceHandle) -> int:
+        raise NotImplementedError
+
+    def MPS_Stop(self, DeviceHandle) -> int:
+        raise NotImplementedError
+
+    def MPS_CloseDevice(self, DeviceHandle) -> int:
+        raise NotImplementedError
+
+
+def load_dll():
+    """Load the in-package DLL and declare its function prototypes, once per process.
+
+    Nothing is loaded when the package is imported: the first card opened
+    without a backend loads the DLL, later ones share it.
+
+    Returns:
+        CDLL: The DLL, usable as a :class:`Backend`.
+    """
+    global _dll
+    with _dll_lock:
+        if _dll is None:
+            _dll = _bind_dll(cdll.LoadLibrary(_inpackage_dll_path()))
+        return _dll
+
+
+def _bind_dll(dll):
+    # Windows only module, imported when the DLL is actually loaded.
+    from ctypes.wintypes import HANDLE
+
+    dll.MPS_OpenDevice.argtypes = (c_int,)
+    dll.MPS_OpenDevice.restype = HANDLE
+
+    dll.MPS_Configure.argtypes = (c_int, c_int, c_int, HANDLE)
+    dll.MPS_Configure.restype = c_int
+
+    dll.MPS_Start.argtypes = (HANDLE,)
+    dll.MPS_Start.restype = c_int
+
+    dll.MPS_DataIn.argtypes = (POINTER(c_ushort), c_int, HANDLE)
+    dll.MPS_DataIn.restype = c_int
+
+    dll.MPS_Stop.argtypes = (HANDLE,)
+    dll.MPS_Stop.restype = c_int
+
+    dll.MPS_CloseDevice.argtypes = (HANDLE,)
+    dll.MPS_CloseDevice.restype = c_int
+    return dll
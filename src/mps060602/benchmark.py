@@ -0,0 +1,330 @@
+"""
+Throughput, latency and allocation benchmark of the read APIs, run on
+:class:`~mps060602.simulated.SimulatedBackend` so it works without a card::
+
+    python -m mps060602.benchmark --rate 1000 --rate 450000 --mode in1_and_2
+
+Every combination of sample rate, channel mode and operation is measured:
+
+* ``samples/s``: samples delivered per second of wall time.
+* ``p50 us``/``p99 us``: per-call latency.
+* ``alloc B``: bytes still allocated by Python per call, from :mod:`tracemalloc`.
+* ``peak B``: peak traced allocation per call.
+
+With ``--paced`` the simulated card blocks like the real one, the achieved
+``samples/s`` should then equal the configured rate. Without it, the numbers
+measure the Python overhead of each read path.
+
+With ``--codec`` the recording codec of :mod:`mps060602.codec` is measured
+instead, on a simulated vibration signal of both channels: compression
+ratio, and encode and decode throughput in MB/s of raw samples.
+"""
+
+import argparse
+import logging
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from mps060602 import __version__, codec
+from mps060602.buffers import BufferPool
+from mps060602.calibration import Calibration
+from mps060602.core import ADChannelMode, MPS060602, MPS060602Para, PGAAmpRate
+from mps060602.simulated import SimulatedBackend, _to_raw, mix, noise, sine
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_RATES = (1000, 10000, 100000, 450000)
+ALL_RATES = tuple(range(1000, 450001, 1000))
+
+
+# ---- Python API ----
+
+
+@dataclass
+class Result:
+    operation: str
+    mode: str
+    rate: int
+    samples_per_second: float
+    p50_us: float
+    p99_us: float
+    alloc_bytes: float
+    peak_bytes: float
+
+
+def _operations(card: MPS060602, block_size: int) -> Dict[str, Callable[[], object]]:
+    pool = BufferPool(block_size, 1)
+    pooled = pool.acquire()
+    raw = np.zeros(block_size, dtype=np.uint16)
+    calibration = Calibration(card.device.number)
+    volts = np.empty(block_size)
+    para = card.state.parameter
+
+    def to_volt():
+        card.data_in()
+        return [card.to_volt(d) for d in card.buffer]
+
+    return {
+        "data_in": card.data_in,
+        "readinto": lambda: card.readinto(pooled),
+        "read_to_volt": card.read_to_volt,
+        "read_to_volt_array": card.read_to_volt_array,
+        "read_to_volt_array_f32": lambda: card.read_to_volt_array(dtype=np.float32),
+        "to_volt": to_volt,
+        "to_volt_array": lambda: card.to_volt_array(raw),
+        "to_volt_calibrated": lambda: calibration.convert(raw, para.ADChannel, para.Gain, out=volts),
+    }
+
+
+def _measure(operation: Callable[[], object], calls: int, block_size: int):
+    operation()  # warm up
+    latencies = np.empty(calls)
+    start = time.perf_counter()
+    for i in range(calls):
+        t = time.perf_counter()
+        operation()
+        latencies[i] = time.perf_counter() - t
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    results = [operation() for _ in range(calls)]
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+
+    return (
+        calls * block_size / elapsed,
+        np.percentile(latencies, 50) * 1e6,
+        np.percentile(latencies, 99) * 1e6,
+        (after - before) / calls,
+        (peak - before) / calls,
+    )
+
+
+def benchmark(
+    rates=DEFAULT_RATES,
+    modes=(ADChannelMode.in1, ADChannelMode.in2, ADChannelMode.in1_and_2, ADChannelMode.difference),
+    operations=None,
+    block_size: int = 4096,
+    calls: int = 20,
+    paced: bool = False,
+) -> List[Result]:
+    """Measure every operation at every rate and channel mode.
+
+    Args:
+        rates (optional): Sample rates. Defaults to DEFAULT_RATES.
+        modes (optional): Channel modes. Defaults to all readable modes.
+        operations (optional): Operation names to run. Defaults to None, all of them.
+        block_size (int, optional): Samples per call. Defaults to 4096.
+        calls (int, optional): Calls per measurement. Defaults to 20.
+        paced (bool, optional): Simulate the card's real pacing. Defaults to False.
+
+    Returns:
+        List[Result]: One result per combination.
+    """
+    results = []
+    for mode in modes:
+        for rate in rates:
+            para = MPS060602Para(ADChannel=mode, ADSampleRate=rate, Gain=PGAAmpRate.range_10V)
+            card = MPS060602(para, buffer_size=block_size, backend=SimulatedBackend(paced=paced))
+            card.start()
+            for name, operation in _operations(card, block_size).items():
+                if operations and name not in operations:
+                    continue
+                _logger.debug("Benchmarking %s, %s, %d", name, mode.name, rate)
+                results.append(
+                    Result(name, mode.name, rate, *_measure(operation, calls, block_size))
+                )
+            card.suspend()
+            card.close()
+    return results
+
+
+def format_results(results: List[Result]) -> str:
+    """Format results as a fixed width table."""
+    header = "{:<24}{:>12}{:>9}{:>14}{:>11}{:>11}{:>11}{:>11}".format(
+        "operation", "mode", "rate", "samples/s", "p50 us", "p99 us", "alloc B", "peak B"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            "{:<24}{:>12}{:>9}{:>14.0f}{:>11.1f}{:>11.1f}{:>11.0f}{:>11.0f}".format(
+                r.operation, r.mode, r.rate, r.samples_per_second,
+                r.p50_us, r.p99_us, r.alloc_bytes, r.peak_bytes,
+            )
+        )
+    return "\n".join(lines)
+
+
+@dataclass
+class CodecResult:
+    rate: int
+    raw_bytes: int
+    encoded_bytes: int
+    encode_mb_per_second: float
+    decode_mb_per_second: float
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_bytes / self.encoded_bytes
+
+
+def vibration(rate: int, seconds: float, seed: int = 0) -> np.ndarray:
+    """Interleaved raw samples of two channels of a machine vibration.
+
+    Harmonics of a 50 Hz rotation, periodic bearing impacts ringing at 3 kHz,
+    and a few millivolt of noise, read with the 10 V range.
+    """
+    t = np.arange(int(rate * seconds)) / rate
+    frames = np.empty((len(t), 2), dtype=np.uint16)
+    for c in range(2):
+        harmonics = mix(*(sine(50 * k, 2.0 / k, phase=c + k) for k in range(1, 6)), noise(0.003, seed + c))
+        since_impact = t % 0.0137
+        impacts = 1.5 * np.exp(-since_impact * 2000) * np.sin(2 * np.pi * 3000 * since_impact)
+        frames[:, c] = _to_raw(harmonics(t) + impacts, PGAAmpRate.range_10V.full_scale)
+    return frames.reshape(-1)
+
+
+def benchmark_codec(rate: int = 450000, seconds: float = 1.0, chunk_size: int = 65536) -> CodecResult:
+    """Encode and decode :func:`vibration` in chunks, like a recording."""
+    raw = vibration(rate, seconds)
+    chunks = [raw[i:i + chunk_size] for i in range(0, len(raw), chunk_size)]
+    start = time.perf_counter()
+    encoded = [codec.encode(c, 2) for c in chunks]
+    encode_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for data in encoded:
+        codec.decode(data)
+    decode_time = time.perf_counter() - start
+    return CodecResult(
+        rate,
+        raw.nbytes,
+        sum(len(d) for d in encoded),
+        raw.nbytes / encode_time / 1e6,
+        raw.nbytes / decode_time / 1e6,
+    )
+
+
+def format_codec_result(r: CodecResult) -> str:
+    return (
+        "rate {} S/s, {} bytes raw, {} bytes encoded, ratio {:.2f}, "
+        "encode {:.1f} MB/s, decode {:.1f} MB/s".format(
+            r.rate, r.raw_bytes, r.encoded_bytes, r.ratio, r.encode_mb_per_second, r.decode_mb_per_second
+        )
+    )
+
+
+# ---- CLI ----
+
+
+def parse_args(args):
+    """Parse command line parameters
+
+    Args:
+      args (List[str]): command line parameters as list of strings
+          (for example  ``["--help"]``).
+
+    Returns:
+      :obj:`argparse.Namespace`: command line parameters namespace
+    """
+    parser = argparse.ArgumentParser(description="Benchmark MPS060602 read paths")
+    parser.add_argument(
+        "--version",
+        action="version",
+        version="MPS060602 {ver}".format(ver=__version__),
+    )
+    parser.add_argument(
+        "--rate", dest="rates", type=int, action="append",
+        help="sample rate, repeatable (default: {})".format(DEFAULT_RATES),
+    )
+    parser.add_argument(
+        "--all-rates", action="store_true", help="every rate from 1000 to 450000"
+    )
+    parser.add_argument(
+        "--mode", dest="modes", action="append",
+        choices=[m.name for m in ADChannelMode if m != ADChannelMode.forbid],
+        help="channel mode, repeatable (default: all)",
+    )
+    parser.add_argument(
+        "--operation", dest="operations", action="append", help="operation, repeatable"
+    )
+    parser.add_argument("--block-size", type=int, default=4096)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--paced", action="store_true", help="pace like a real card")
+    parser.add_argument("--codec", action="store_true", help="benchmark the recording codec")
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        dest="loglevel",
+        help="set loglevel to INFO",
+        action="store_const",
+        const=logging.INFO,
+    )
+    parser.add_argument(
+        "-vv",
+        "--very-verbose",
+        dest="loglevel",
+        help="set loglevel to DEBUG",
+        action="store_const",
+        const=logging.DEBUG,
+    )
+    return parser.parse_args(args)
+
+
+def setup_logging(loglevel):
+    """Setup basic logging
+
+    Args:
+      loglevel (int): minimum loglevel for emitting messages
+    """
+    logformat = "[%(asctime)s] %(levelname)s:%(name)s:%(message)s"
+    logging.basicConfig(
+        level=loglevel, stream=sys.stdout, format=logformat, datefmt="%Y-%m-%d %H:%M:%S"
+    )
+
+
+def main(args):
+    """Run :func:`benchmark` from command line arguments and print the table.
+
+    Args:
+      args (List[str]): command line parameters as list of strings
+          (for example  ``["--rate", "1000"]``).
+    """
+    args = parse_args(args)
+    setup_logging(args.loglevel)
+    if args.codec:
+        for rate in args.rates or (450000,):
+            print(format_codec_result(benchmark_codec(rate)))
+        return
+    rates = ALL_RATES if args.all_rates else tuple(args.rates or DEFAULT_RATES)
+    modes = [ADChannelMode[m] for m in args.modes] if args.modes else None
+    kwargs = dict(
+        rates=rates,
+        operations=args.operations,
+        block_size=args.block_size,
+        calls=args.calls,
+        paced=args.paced,
+    )
+    if modes:
+        kwargs["modes"] = modes
+    print(format_results(benchmark(**kwargs)))
+
+
+def run():
+    """Calls :func:`main` passing the CLI arguments extracted from :obj:`sys.argv`"""
+    main(sys.argv[1:])
+
+
+if __name__ == "__main__":
+    run()
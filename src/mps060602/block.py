@@ -0,0 +1,211 @@
+import numpy as np
+
+from .core import ADChannelMode, AmpRate, MPS060602Para, to_volt_array
+from .errors import ChannelNotAcquired
+
+_CHANNEL_SLICES = {
+    ADChannelMode.in1: {1: slice(None)},
+    ADChannelMode.in2: {2: slice(None)},
+    ADChannelMode.in1_and_2: {1: slice(0, None, 2), 2: slice(1, None, 2)},
+    ADChannelMode.difference: {},
+}
+
+
+class Block:
+    """Raw samples of one read, together with the channel mode and gain they were acquired with.
+
+    In ``in1_and_2`` mode :attr:`in1` and :attr:`in2` are strided views of
+    :attr:`raw`, nothing is copied.
+
+    Args:
+        raw (np.ndarray): uint16 samples, as written by ``MPS_DataIn``.
+        mode (ADChannelMode): Channel mode in effect.
+        gain (AmpRate): Gain in effect.
+        index (int, optional): Block index since acquisition start. Defaults to None.
+        timestamp (float, optional): Host time of the first frame, see
+        :class:`~mps060602.clock.SampleClock`. Defaults to None.
+        calibration (Calibration, optional): Calibration of the card, applied
+        by :func:`volts`, see :attr:`MPS060602.calibration
+        <mps060602.core.MPS060602.calibration>`. Defaults to None.
+    """
+
+    __slots__ = ("raw", "mode", "gain", "index", "timestamp", "calibration")
+
+    def __init__(
+        self,
+        raw: np.ndarray,
+        mode: ADChannelMode,
+        gain: AmpRate,
+        index: int = None,
+        timestamp: float = None,
+        calibration=None,
+    ) -> None:
+        self.raw = raw
+        self.mode = ADChannelMode(mode)
+        self.gain = gain
+        self.index = index
+        self.timestamp = timestamp
+        self.calibration = calibration
+
+    @classmethod
+    def from_para(
+        cls, raw: np.ndarray, para: MPS060602Para, index: int = None, timestamp: float = None, calibration=None
+    ) -> "Block":
+        """Build a block acquired with ``para``."""
+        return cls(raw, para.ADChannel, para.Gain, index, timestamp, calibration)
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.raw if dtype is None else self.raw.astype(dtype)
+
+    @property
+    def channels(self) -> tuple:
+        """tuple: Numbers of the input channels present in this block."""
+        return tuple(_CHANNEL_SLICES[self.mode])
+
+    def channel(self, number: int) -> np.ndarray:
+        """Raw samples of input ``number``, a view of :attr:`raw`.
+
+        Args:
+            number (int): 1 for ``In1``, 2 for ``In2``.
+
+        Raises:
+            ChannelNotAcquired: Channel not present in this block's mode.
+
+        Returns:
+            np.ndarray: uint16 view.
+        """
+        try:
+            return self.raw[_CHANNEL_SLICES[self.mode][number]]
+        except KeyError:
+            raise ChannelNotAcquired(number, self.mode.name) from None
+
+    @property
+    def in1(self) -> np.ndarray:
+        """np.ndarray: Raw ``In1`` samples, a view of :attr:`raw`."""
+        return self.channel(1)
+
+    @property
+    def in2(self) -> np.ndarray:
+        """np.ndarray: Raw ``In2`` samples, a view of :attr:`raw`."""
+        return self.channel(2)
+
+    @property
+    def frame_width(self) -> int:
+        """int: Values in :attr:`raw` per sample instant, 2 when channels are interleaved."""
+        return 2 if self.mode == ADChannelMode.in1_and_2 else 1
+
+    def times(self, sample_rate: float) -> np.ndarray:
+        """Host time of every frame, from :attr:`timestamp` at the nominal ``sample_rate``.
+
+        For long acquisitions prefer :func:`SampleClock.time_of
+        <mps060602.clock.SampleClock.time_of>`, which follows the clock drift.
+        """
+        return self.timestamp + np.arange(len(self.raw) // self.frame_width) / sample_rate
+
+    def volts(self, channel: int = None, dtype=np.float64, out: np.ndarray = None) -> np.ndarray:
+        """Convert to volt, only the requested channel is converted.
+
+        With a :attr:`calibration`, values are looked up in its tables, as
+        :func:`MPS060602.to_volt_array <mps060602.core.MPS060602.to_volt_array>` does.
+
+        Args:
+            channel (int, optional): 1 or 2, None for every value of :attr:`raw`. Defaults to None.
+            dtype (optional): Output float dtype. Defaults to np.float64.
+            out (np.ndarray, optional): Preallocated output array. Defaults to None.
+
+        Returns:
+            np.ndarray: Voltage values.
+        """
+        if self.calibration is not None:
+            return self.calibration.volts(self, channel, dtype, out)
+        raw = self.raw if channel is None else self.channel(channel)
+        return to_volt_array(raw, self.gain, dtype, out)
+
+    def deinterleave(self, out1: np.ndarray = None, out2: np.ndarray = None):
+        """Copy channels into contiguous arrays.
+
+        Float output arrays receive volts, calibrated when the block carries a
+        :attr:`calibration`, integer ones raw samples. Missing
+        arrays are allocated as uint16.
+
+        Args:
+            out1 (np.ndarray, optional): Destination of ``In1``. Defaults to None.
+            out2 (np.ndarray, optional): Destination of ``In2``. Defaults to None.
+
+        Returns:
+            tuple: ``(in1, in2)``, None for a channel not in this block.
+        """
+        result = []
+        for number, out in ((1, out1), (2, out2)):
+            if number not in _CHANNEL_SLICES[self.mode]:
+                result.append(None)
+                continue
+            raw = self.channel(number)
+            if out is None:
+                out = np.empty(len(raw), dtype=np.uint16)
+            if np.issubdtype(out.dtype, np.floating):
+                self.volts(number, out.dtype, out[: len(raw)])
+            else:
+                np.copyto(out[: len(raw)], raw)
+            result.append(out)
+        return tuple(result)
+
+    def copy(self) -> "Block":
+        """Copy owning its samples, e.g. to keep a block past the next read."""
+        return Block(self.raw.copy(), self.mode, self.gain, self.index, self.timestamp, self.calibration)
+
+
+class BatchCapture:
+    """Result of :func:`MPS060602.capture <mps060602.core.MPS060602.capture>`.
+
+    Args:
+        data (np.ndarray): ``(n_blocks, block_size)`` uint16 samples, one row per ``MPS_DataIn`` call.
+        status (np.ndarray): Return value of each call, 0 for a failed read.
+        sample_number (int): Samples requested, the last row is short when
+        it isn't a multiple of ``block_size``.
+        mode (ADChannelMode): Channel mode in effect.
+        gain (AmpRate): Gain in effect.
+        calibration (Calibration, optional): Carried by the blocks. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        status: np.ndarray,
+        sample_number: int,
+        mode: ADChannelMode,
+        gain: AmpRate,
+        calibration=None,
+    ) -> None:
+        self.data = data
+        self.status = status
+        self.sample_number = sample_number
+        self.mode = ADChannelMode(mode)
+        self.gain = gain
+        self.calibration = calibration
+
+    @property
+    def failed(self) -> np.ndarray:
+        """np.ndarray: Indices of the rows whose read failed."""
+        return np.flatnonzero(self.status == 0)
+
+    @property
+    def ok(self) -> bool:
+        """bool: Every read succeeded."""
+        return bool(self.status.all())
+
+    @property
+    def raw(self) -> np.ndarray:
+        """np.ndarray: All samples in one flat view, failed rows included."""
+        return self.data.reshape(-1)[: self.sample_number]
+
+    def blocks(self):
+        """Yield a :class:`Block` view per successful read, indexed by row."""
+        size = self.data.shape[1]
+        for i in range(len(self.status)):
+            if self.status[i]:
+                row = self.data[i, : min(size, self.sample_number - i * size)]
+                yield Block(row, self.mode, self.gain, i, calibration=self.calibration)
@@ -0,0 +1,108 @@
+from ctypes import Array, c_ushort
+from queue import Queue
+
+import numpy as np
+
+# Buffer formats of uint16 items, and raw bytes holding them.
+_USHORT_FORMATS = ("H", "B")
+
+
+def as_ushort_array(buffer) -> Array:
+    """View a writable buffer as a ``c_ushort`` ctypes array without copying.
+
+    Args:
+        buffer: ``c_ushort`` ctypes array, :class:`PoolBuffer`, or any writable
+        C-contiguous object exposing the buffer protocol (bytearray, numpy
+        array, memoryview, ``SharedMemory.buf``...).
+
+    Raises:
+        TypeError: ``buffer`` holds items other than uint16, or an odd number of bytes.
+
+    Returns:
+        Array: ctypes array sharing memory with ``buffer``.
+    """
+    if isinstance(buffer, PoolBuffer):
+        return buffer.ctypes
+    if isinstance(buffer, Array) and buffer._type_ is c_ushort:
+        return buffer
+    with memoryview(buffer) as view:
+        nbytes, fmt = view.nbytes, view.format
+    item = fmt.lstrip("@=<")
+    if item not in _USHORT_FORMATS or (item == "B" and nbytes % 2):
+        raise TypeError("Buffer of format {!r} and {} bytes can't hold uint16 samples.".format(fmt, nbytes))
+    return (c_ushort * (nbytes // 2)).from_buffer(buffer)
+
+
+class PoolBuffer:
+    """A block owned by a :class:`BufferPool`.
+
+    Attributes:
+        ctypes (Array): ``c_ushort`` array, passed to the DLL as is.
+        array (np.ndarray): uint16 numpy view of ``ctypes``.
+    """
+
+    __slots__ = ("ctypes", "array", "_pool")
+
+    def __init__(self, size: int, pool: "BufferPool") -> None:
+        self.ctypes = (c_ushort * size)()
+        self.array = np.frombuffer(self.ctypes, dtype=np.uint16)
+        self._pool = pool
+
+    def __len__(self) -> int:
+        return len(self.ctypes)
+
+    def release(self):
+        """Give the block back to its pool."""
+        self._pool.release(self)
+
+    def __enter__(self) -> "PoolBuffer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class BufferPool:
+    """Fixed set of preallocated blocks, reused across acquisitions.
+
+    Blocks are allocated once in the constructor, so steady state
+    :func:`acquire`/:func:`release` cycles do no allocation.
+
+    Args:
+        block_size (int): Samples per block.
+        count (int, optional): Number of blocks. Defaults to 4.
+    """
+
+    def __init__(self, block_size: int, count: int = 4) -> None:
+        self.block_size = block_size
+        self.count = count
+        self._free = Queue(maxsize=count)
+        for _ in range(count):
+            self._free.put_nowait(PoolBuffer(block_size, self))
+
+    def acquire(self, block: bool = True, timeout: float = None) -> PoolBuffer:
+        """Take a free block, waiting until one is released if the pool is empty.
+
+        Args:
+            block (bool, optional): Wait for a free block. Defaults to True.
+            timeout (float, optional): Seconds to wait. Defaults to None.
+
+        Raises:
+            queue.Empty: No free block became available.
+
+        Returns:
+            PoolBuffer: A block, release it when done.
+        """
+        return self._free.get(block, timeout)
+
+    def release(self, buffer: PoolBuffer):
+        """Return ``buffer`` to the pool.
+
+        Args:
+            buffer (PoolBuffer): Block previously acquired from this pool.
+        """
+        self._free.put_nowait(buffer)
+
+    def available(self) -> int:
+        """Number of free blocks."""
+        return self._free.qsize()
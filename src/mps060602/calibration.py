@@ -0,0 +1,188 @@
+"""Per unit calibration of a card, compiled into lookup tables.
+
+For every channel and gain, the nominal voltage of :func:`~mps060602.core.to_volt_array`
+is corrected as ``(nominal - offset) * scale``. As there are only 65536 raw
+codes, the correction is compiled once into a table per channel, gain and
+dtype, and converting a block is a single gather, ``table[raw]``.
+
+Channels are keyed by input number, 1 and 2, and 0 for ``difference`` mode.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .block import Block
+from .core import MPS060602, ADChannelMode, AmpRate, to_volt_array
+
+_CODES = np.arange(65536, dtype=np.uint16)
+_FILE_PATTERN = "calibration-{}.json"
+
+
+def calibration_directory() -> Path:
+    """Directory of calibration files, ``$MPS060602_CALIBRATION_DIR`` or ``~/.mps060602``."""
+    return Path(os.environ.get("MPS060602_CALIBRATION_DIR", Path.home() / ".mps060602"))
+
+
+@dataclass
+class ChannelCalibration:
+    """Correction of one channel at one gain.
+
+    Attributes:
+        offset (float): Nominal voltage read with the input shorted.
+        scale (float): Gain error correction, true over nominal voltage.
+    """
+
+    offset: float = 0.0
+    scale: float = 1.0
+
+
+class Calibration:
+    """Calibration of one card, see module documentation.
+
+    Args:
+        device_number (int, optional): Device number of the card. Defaults to 0.
+        entries (Dict[Tuple[int, int], ChannelCalibration], optional):
+        Corrections by ``(channel, gain index)``, missing ones are identity. Defaults to None.
+    """
+
+    def __init__(self, device_number: int = 0, entries: Dict[Tuple[int, int], ChannelCalibration] = None) -> None:
+        self.device_number = device_number
+        self.entries: Dict[Tuple[int, int], ChannelCalibration] = dict(entries or {})
+        self._tables: Dict[tuple, np.ndarray] = {}
+
+    def __getstate__(self) -> dict:
+        # Blocks sent to process stages carry their calibration, not the tables.
+        return {"device_number": self.device_number, "entries": self.entries, "_tables": {}}
+
+    def get(self, channel: int, gain: AmpRate) -> ChannelCalibration:
+        return self.entries.get((channel, gain.index), ChannelCalibration())
+
+    def set(self, channel: int, gain: AmpRate, offset: float = None, scale: float = None):
+        """Change the correction of ``channel`` at ``gain``, None keeps a value."""
+        entry = self.get(channel, gain)
+        self.entries[(channel, gain.index)] = ChannelCalibration(
+            entry.offset if offset is None else offset,
+            entry.scale if scale is None else scale,
+        )
+        self._tables = {k: v for k, v in self._tables.items() if k[:2] != (channel, gain.index)}
+
+    def table(self, channel: int, gain: AmpRate, dtype=np.float64) -> np.ndarray:
+        """Lookup table from raw code to calibrated volt, built on first use.
+
+        Returns:
+            np.ndarray: 65536 values, read only.
+        """
+        key = (channel, gain.index, np.dtype(dtype))
+        table = self._tables.get(key)
+        if table is None:
+            entry = self.get(channel, gain)
+            nominal = to_volt_array(_CODES, gain)
+            table = ((nominal - entry.offset) * entry.scale).astype(dtype)
+            table.flags.writeable = False
+            self._tables[key] = table
+        return table
+
+    def convert(self, raw, mode: ADChannelMode, gain: AmpRate, dtype=np.float64, out: np.ndarray = None) -> np.ndarray:
+        """Calibrated version of :func:`~mps060602.core.to_volt_array`.
+
+        Args:
+            raw: Raw samples as read in ``mode``, starting on a frame when interleaved.
+            mode (ADChannelMode): Channel mode of ``raw``.
+            gain (AmpRate): Gain of ``raw``.
+            dtype (optional): Output float dtype. Defaults to np.float64.
+            out (np.ndarray, optional): Preallocated output array. Defaults to None.
+
+        Returns:
+            np.ndarray: Voltage values.
+        """
+        raw = np.asarray(raw, dtype=np.uint16)
+        if out is None:
+            out = np.empty(raw.shape, dtype=dtype)
+        mode = ADChannelMode(mode)
+        if mode == ADChannelMode.in1_and_2:
+            np.take(self.table(1, gain, out.dtype), raw[0::2], out=out[0::2], mode="clip")
+            np.take(self.table(2, gain, out.dtype), raw[1::2], out=out[1::2], mode="clip")
+        else:
+            channel = {ADChannelMode.in1: 1, ADChannelMode.in2: 2}.get(mode, 0)
+            np.take(self.table(channel, gain, out.dtype), raw, out=out, mode="clip")
+        return out
+
+    def volts(self, block: Block, channel: int = None, dtype=np.float64, out: np.ndarray = None) -> np.ndarray:
+        """Calibrated version of :func:`Block.volts <mps060602.block.Block.volts>`."""
+        if channel is None:
+            return self.convert(block.raw, block.mode, block.gain, dtype, out)
+        raw = block.channel(channel)
+        if out is None:
+            out = np.empty(len(raw), dtype=dtype)
+        return np.take(self.table(channel, block.gain, out.dtype), raw, out=out, mode="clip")
+
+    def derive_offsets(self, block: Block):
+        """Set the offsets of the channels of ``block``, captured with shorted inputs.
+
+        The offset is the mean nominal voltage, at the gain of the block,
+        whatever calibration the block carries.
+        """
+        for channel in block.channels or (0,):
+            raw = block.channel(channel) if channel else block.raw
+            self.set(channel, block.gain, offset=float(to_volt_array(raw, block.gain).mean()))
+
+    def calibrate_offsets(self, card: MPS060602, sample_number: int = 65536):
+        """Capture ``sample_number`` values from ``card``, inputs shorted, and derive the offsets."""
+        started = card.state.started
+        if not started:
+            card.start()
+        try:
+            self.derive_offsets(card.read_block(sample_number))
+        finally:
+            if not started:
+                card.suspend()
+
+    def to_dict(self) -> dict:
+        return {
+            "device_number": self.device_number,
+            "entries": [
+                {
+                    "channel": channel,
+                    "gain_index": gain_index,
+                    "offset": entry.offset,
+                    "scale": entry.scale,
+                }
+                for (channel, gain_index), entry in sorted(self.entries.items())
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Calibration":
+        return cls(
+            data["device_number"],
+            {
+                (e["channel"], e["gain_index"]): ChannelCalibration(e["offset"], e["scale"])
+                for e in data["entries"]
+            },
+        )
+
+    @staticmethod
+    def path(device_number: int, directory=None) -> Path:
+        """File of the calibration of ``device_number``."""
+        directory = calibration_directory() if directory is None else Path(directory)
+        return directory / _FILE_PATTERN.format(device_number)
+
+    def save(self, directory=None) -> Path:
+        """Write to :func:`path`, creating the directory if necessary."""
+        path = self.path(self.device_number, directory)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+        return path
+
+    @classmethod
+    def load(cls, device_number: int, directory=None) -> "Calibration":
+        """Read the calibration of ``device_number``, identity when there is no file."""
+        path = cls.path(device_number, directory)
+        if not path.exists():
+            return cls(device_number)
+        return cls.from_dict(json.loads(path.read_text()))
@@ -0,0 +1,121 @@
+import time
+from typing import Callable
+
+import numpy as np
+
+
+class SampleClock:
+    """Host time of samples, from a running sample counter and the sample rate.
+
+    The card has no timestamps, but its sample clock is regular: frame ``k``
+    is acquired at ``t0 + k * period``. Every read gives an observation, the
+    number of frames acquired so far against the host time the read
+    returned. ``t0`` and ``period`` are fitted online by exponentially
+    weighted least squares over these observations, so the timestamps follow
+    the drift of the card oscillator against the host clock while the jitter
+    of single reads averages out.
+
+    Frames count one sample of every acquired channel.
+
+    Args:
+        sample_rate (float): ``ADSampleRate`` of the card.
+        memory (float, optional): Observations over which the fit averages,
+        older ones weigh exponentially less. Defaults to 10000.
+        clock (Callable[[], float], optional): Monotonic host clock, in seconds.
+        Defaults to time.perf_counter.
+    """
+
+    def __init__(self, sample_rate: float, memory: float = 10000, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.sample_rate = sample_rate
+        self.forgetting = 1 - 1 / memory
+        self.clock = clock
+        self.start()
+
+    def start(self, host_time: float = None):
+        """Restart counting frames, frame 0 being acquired now or at ``host_time``."""
+        self.frames = 0
+        """int: Frames acquired since :func:`start`."""
+        self.start_time = self.clock() if host_time is None else host_time
+        self.last_block_time = self.start_time
+        """float: Host time of the first frame of the last block."""
+        self._reset_fit(0, self.start_time, 1 / self.sample_rate)
+
+    def _reset_fit(self, index: int, host_time: float, period: float):
+        # Observations are centered on the first one, for precision over long runs.
+        self._origin_index = index
+        self._origin_time = host_time
+        self._weight = 1.0
+        self._mean_x = self._mean_y = 0.0
+        self._cxx = self._cxy = 0.0
+        self._period = period
+
+    def configure(self, sample_rate: float):
+        """Change the sample rate, keeping the timestamps of acquired frames."""
+        now = float(self.time_of(self.frames))
+        self.sample_rate = sample_rate
+        self._reset_fit(self.frames, now, 1 / sample_rate)
+
+    def advance(self, frames: int, host_time: float = None) -> float:
+        """Count a block of ``frames`` read now or at ``host_time``.
+
+        Returns:
+            float: Host time of the first frame of the block.
+        """
+        first = self.frames
+        self.frames += frames
+        self.observe(self.frames, self.clock() if host_time is None else host_time)
+        self.last_block_time = float(self.time_of(first))
+        return self.last_block_time
+
+    def observe(self, frames: int, host_time: float):
+        """Add an observation: ``frames`` were acquired at ``host_time``."""
+        x = frames - self._origin_index
+        y = host_time - self._origin_time
+        self._weight = self.forgetting * self._weight + 1
+        a = 1 / self._weight
+        dx = x - self._mean_x
+        self._mean_x += a * dx
+        self._mean_y += a * (y - self._mean_y)
+        self._cxx = self.forgetting * self._cxx + dx * (x - self._mean_x)
+        self._cxy = self.forgetting * self._cxy + dx * (y - self._mean_y)
+        if self._cxx > 0:
+            self._period = self._cxy / self._cxx
+
+    @property
+    def period(self) -> float:
+        """float: Estimated duration of a frame in host seconds."""
+        return self._period
+
+    @property
+    def drift(self) -> float:
+        """float: Estimated rate error of the card clock against the host clock, ppm.
+
+        Positive when the card samples slower than ``sample_rate``.
+        """
+        return (self._period * self.sample_rate - 1) * 1e6
+
+    @property
+    def offset(self) -> float:
+        """float: Estimated host time of frame 0 minus :attr:`start_time`, seconds."""
+        return float(self.time_of(0)) - self.start_time
+
+    def time_of(self, index):
+        """Host time of frames, vectorized.
+
+        Args:
+            index: Frame index since :func:`start`, int or array.
+
+        Returns:
+            Host time in seconds, float or float64 array.
+        """
+        x = np.asarray(index, dtype=np.float64) - self._origin_index
+        return self._origin_time + self._mean_y + (x - self._mean_x) * self._period
+
+    def index_at(self, host_time):
+        """Frame acquired at ``host_time``, vectorized inverse of :func:`time_of`.
+
+        Returns:
+            Frame index, float or float64 array, fractional between frames.
+        """
+        y = np.asarray(host_time, dtype=np.float64) - self._origin_time
+        return self._origin_index + self._mean_x + (y - self._mean_y) / self._period
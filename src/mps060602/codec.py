@@ -0,0 +1,178 @@
+"""Lossless codec of raw samples, for recordings, see :class:`~mps060602.recorder.Recorder`.
+
+Samples are encoded in chunks of whole frames. Each channel of a chunk is
+predicted from its previous samples, with a first or a second order
+difference, whichever leaves smaller residuals; noise-like channels, which
+don't predict, are stored as is (order 0). Residuals are zigzag mapped
+to unsigned integers and bit-packed by groups of :data:`GROUP` values, each
+group with the smallest bit width that holds it. Everything is vectorized:
+groups of the same width are packed together with one ``packbits``.
+
+Chunk layout, little endian:
+
+* header: payload bytes (uint32), frames (uint32), frame width (uint8), 3 reserved bytes;
+* per channel: order (uint8), first sample (uint16), one width per
+  group (uint8), then the packed groups, ``GROUP * width / 8`` bytes each.
+"""
+
+import struct
+from typing import Iterator, Tuple
+
+import numpy as np
+
+CODEC_RAW = 0
+"""Codec id of plain uint16 samples, in :attr:`RecordingHeader.codec <mps060602.fileformat.RecordingHeader.codec>`."""
+CODEC_DELTA = 1
+"""Codec id of this codec."""
+
+GROUP = 256
+"""Values bit-packed with a shared width."""
+
+_CHUNK = struct.Struct("<IIB3x")
+_CHANNEL = struct.Struct("<BH")
+
+CHUNK_HEADER_SIZE = _CHUNK.size
+
+
+def _residuals(x: np.ndarray, order: int) -> np.ndarray:
+    """Zigzag mapped prediction residuals, the samples themselves for order 0."""
+    if order == 0:
+        return x.astype(np.uint32)
+    x = x.astype(np.int32)
+    r = np.zeros(len(x), dtype=np.int32)
+    if order == 1:
+        r[1:] = np.diff(x)
+    else:
+        r[1:2] = x[1:2] - x[:1]
+        r[2:] = x[2:] - 2 * x[1:-1] + x[:-2]
+    return ((r << 1) ^ (r >> 31)).view(np.uint32)
+
+
+def _widths(u: np.ndarray) -> np.ndarray:
+    """Bits needed by each group of zigzag values."""
+    maxima = u.reshape(-1, GROUP).max(axis=1)
+    widths = np.zeros(len(maxima), dtype=np.uint8)
+    nonzero = maxima > 0
+    widths[nonzero] = np.floor(np.log2(maxima[nonzero])).astype(np.uint8) + 1
+    return widths
+
+
+def _pack(u: np.ndarray, widths: np.ndarray) -> bytes:
+    groups = u.reshape(-1, GROUP)
+    offsets = np.concatenate(([0], np.cumsum(widths.astype(np.int64) * (GROUP // 8))))
+    packed = np.empty(offsets[-1], dtype=np.uint8)
+    for width in np.unique(widths):
+        if width == 0:
+            continue
+        rows = np.flatnonzero(widths == width)
+        bits = (groups[rows, :, None] >> np.arange(width, dtype=np.uint32)) & 1
+        data = np.packbits(bits.astype(np.uint8).reshape(len(rows), -1), axis=1, bitorder="little")
+        # Rows of the same width are GROUP * width / 8 bytes apart from their offsets.
+        index = offsets[rows, None] + np.arange(data.shape[1])
+        packed[index] = data
+    return packed.tobytes()
+
+
+def _unpack(data: np.ndarray, widths: np.ndarray) -> np.ndarray:
+    offsets = np.concatenate(([0], np.cumsum(widths.astype(np.int64) * (GROUP // 8))))
+    groups = np.zeros((len(widths), GROUP), dtype=np.uint32)
+    for width in np.unique(widths):
+        if width == 0:
+            continue
+        rows = np.flatnonzero(widths == width)
+        index = offsets[rows, None] + np.arange(GROUP * int(width) // 8)
+        bits = np.unpackbits(data[index], axis=1, bitorder="little").reshape(len(rows), GROUP, width)
+        groups[rows] = bits.astype(np.uint32) @ (np.uint32(1) << np.arange(width, dtype=np.uint32))
+    return groups.reshape(-1)
+
+
+def _encode_channel(x: np.ndarray) -> bytes:
+    padded = -len(x) % GROUP
+    best = None
+    for order in (1, 2, 0):
+        u = np.concatenate((_residuals(x, order), np.zeros(padded, dtype=np.uint32)))
+        widths = _widths(u)
+        size = int(widths.sum())
+        if best is None or size < best[0]:
+            best = (size, order, u, widths)
+    _, order, u, widths = best
+    first = int(x[0]) if len(x) else 0
+    return _CHANNEL.pack(order, first) + widths.tobytes() + _pack(u, widths)
+
+
+def encode(raw: np.ndarray, frame_width: int = 1) -> bytes:
+    """Encode whole frames of raw samples into one chunk.
+
+    Args:
+        raw (np.ndarray): uint16 samples, interleaved when ``frame_width`` is 2.
+        frame_width (int, optional): Values per frame. Defaults to 1.
+
+    Raises:
+        ValueError: ``raw`` doesn't hold whole frames.
+
+    Returns:
+        bytes: The chunk, header included.
+    """
+    raw = np.asarray(raw, dtype=np.uint16)
+    if len(raw) % frame_width:
+        raise ValueError("{} values aren't whole frames of {}.".format(len(raw), frame_width))
+    frames = raw.reshape(-1, frame_width)
+    payload = b"".join(_encode_channel(frames[:, c]) for c in range(frame_width))
+    return _CHUNK.pack(len(payload), len(frames), frame_width) + payload
+
+
+def chunk_header(data, offset: int = 0) -> Tuple[int, int, int]:
+    """``(payload bytes, frames, frame width)`` of the chunk at ``offset``."""
+    return _CHUNK.unpack_from(data, offset)
+
+
+def decode(data, offset: int = 0, out: np.ndarray = None) -> np.ndarray:
+    """Decode the chunk at ``offset`` of ``data``.
+
+    Args:
+        data: bytes, or uint8 array such as a memory map of a recording.
+        offset (int, optional): Start of the chunk. Defaults to 0.
+        out (np.ndarray, optional): uint16 destination. Defaults to None, allocate one.
+
+    Returns:
+        np.ndarray: Interleaved uint16 samples.
+    """
+    data = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+    _, n_frames, width = _CHUNK.unpack_from(data, offset)
+    if out is None:
+        out = np.empty(n_frames * width, dtype=np.uint16)
+    frames = out.reshape(-1, width)
+    n_groups = -(-n_frames // GROUP)
+    position = offset + _CHUNK.size
+    for c in range(width):
+        order, first = _CHANNEL.unpack_from(data, position)
+        position += _CHANNEL.size
+        widths = data[position:position + n_groups]
+        position += n_groups
+        size = int(widths.sum(dtype=np.int64)) * (GROUP // 8)
+        u = _unpack(data[position:position + size], widths)[:n_frames]
+        position += size
+        if order == 0:
+            frames[:, c] = u
+            continue
+        r = (u >> 1).astype(np.int64) ^ -(u & 1).astype(np.int64)
+        if order == 1:
+            x = first + np.cumsum(r)
+        else:
+            d = np.cumsum(r[1:])
+            x = np.empty(n_frames, dtype=np.int64)
+            x[:1] = first
+            x[1:] = first + np.cumsum(d)
+        frames[:, c] = x
+    return out
+
+
+def iter_chunks(data, offset: int = 0) -> Iterator[Tuple[int, int]]:
+    """Yield ``(offset, frames)`` of the chunks from ``offset`` on, stopping at a truncated one."""
+    end = len(data)
+    while offset + _CHUNK.size <= end:
+        payload, n_frames, _ = _CHUNK.unpack_from(data, offset)
+        if offset + _CHUNK.size + payload > end:
+            return
+        yield offset, n_frames
+        offset += _CHUNK.size + payload
@@ -1,14 +1,19 @@
-import platform
-from ctypes import POINTER, c_int, c_ushort, cdll, sizeof
-from ctypes.wintypes import HANDLE
+from ctypes import c_int, c_ushort
+from time import perf_counter_ns
 from typing import Iterable
 from dataclasses import dataclass
 from enum import IntEnum, Enum
-from pathlib import Path
 
+import numpy as np
+
+from .backends import INVALID_HANDLE, Backend, load_dll, static_file_path  # noqa: F401
+from .buffers import as_ushort_array
+from .clock import SampleClock
+from .metrics import AcquisitionMetrics
 from .errors import (
     ADSampleRateOutOfRange,
     ADSampleRateRoundToNearest1000,
+    BufferTooSmall,
     ConfigureDeviceFailed,
     DataInFailed,
     DeviceCloseFailed,
@@ -20,21 +25,6 @@ from .errors import (
 )
 
 
-def _is_os_64bit() -> bool:
-    return platform.machine().endswith("64")
-
-
-def static_file_path() -> Path:
-    return Path(__file__).parent / "static"
-
-
-def _inpackage_dll_path() -> str:
-    filename = "MPS-060602.dll"
-    if _is_os_64bit:
-        filename = "MPS-060602x64.dll"
-    return str(static_file_path() / filename)
-
-
 class ADChannelMode(IntEnum):
     """Mode to select input AD channel.
 
@@ -43,6 +33,9 @@ class ADChannelMode(IntEnum):
     * ``MPS060602.buffer[0::2]`` are data from ``In1``.
     * ``MPS060602.buffer[1::2]`` are data from ``In2``.
 
+    :func:`MPS060602.read_block` returns a :class:`~mps060602.block.Block`
+    exposing both as zero-copy views, ``block.in1`` and ``block.in2``.
+
     In ``difference`` mode, :func:`MPS060602.data_in` put
     voltage difference of ``In1`` and ``In2`` into buffer.
     """
@@ -61,8 +54,15 @@ class AmpRate:
 
         # FIXME: fix weird behavior in range...
         #        to_volt() still uses formula in the documentation.
+        #        Per card corrections belong to :class:`~mps060602.calibration.Calibration`.
         self.correct_factor = correct_factor
 
+    @property
+    def full_scale(self) -> float:
+        """Volt range used for conversion, the nominal :attr:`volt`."""
+        return self.volt
+
+
 class PGAAmpRate():
     """Information to control on board Programmable Gain Amplifier (PGA).
 
@@ -72,7 +72,8 @@ class PGAAmpRate():
     handled in :func:`MPS060602.configure_and_update_state`.
 
     * ``volt`` is the corresponding volt range of the ``index``, used to
-    convert raw data to voltage in :func:`MPS060602.to_volt`.
+    convert raw data to voltage in :func:`MPS060602.to_volt` and
+    :func:`to_volt_array`, see :attr:`AmpRate.full_scale`.
     """
 
     range_10V = AmpRate(0, 10, 2)
@@ -80,6 +81,44 @@ class PGAAmpRate():
     range_2V = AmpRate(2, 2, 0.4)
     range_1V = AmpRate(3, 1, 0.2)
 
+    @classmethod
+    def from_index(cls, index: int) -> AmpRate:
+        """Find the gain passed to ``MPS_Configure`` as ``index``.
+
+        Args:
+            index (int): ``AmpRate.index``.
+
+        Raises:
+            KeyError: No gain has this index.
+
+        Returns:
+            AmpRate: Corresponding gain.
+        """
+        for rate in (cls.range_10V, cls.range_5V, cls.range_2V, cls.range_1V):
+            if rate.index == index:
+                return rate
+        raise KeyError(index)
+
+
+def to_volt_array(data, gain: AmpRate, dtype=np.float64, out: np.ndarray = None) -> np.ndarray:
+    """Vectorized version of :func:`MPS060602.to_volt`.
+
+    Args:
+        data: Raw ushort samples, anything exposing the buffer protocol or a numpy array.
+        gain (AmpRate): Gain in effect when ``data`` was acquired.
+        dtype (optional): Output float dtype, ``np.float32`` or ``np.float64``. Defaults to np.float64.
+        out (np.ndarray, optional): Preallocated output array. Defaults to None.
+
+    Returns:
+        np.ndarray: Voltage values.
+    """
+    raw = np.asarray(data, dtype=np.uint16)
+    if out is None:
+        out = np.empty(raw.shape, dtype=dtype)
+    full_scale = gain.full_scale
+    np.multiply(raw, -2 * full_scale / 65536, out=out, casting="unsafe")
+    out += full_scale
+    return out
 
 
 class MPS060602Para:
@@ -118,6 +157,10 @@ class MPS060602:
         para (MPS060602Para): Configuration parameters for MPS060602 card.
         device_number (int, optional): Device number of card, int in [0, 9]. Defaults to 0.
         buffer_size (int, optional): Data buffer size for :func:`MPS060602.data_in`. Defaults to 1024.
+        backend (Backend, optional): Implementation of the DLL functions, e.g.
+        :class:`~mps060602.simulated.SimulatedBackend`. Defaults to None, load the DLL.
+        metrics (AcquisitionMetrics, optional): Instrumentation of the reads,
+        e.g. with an alert callback. Defaults to None, a plain one.
 
     Raises:
         InvalidDeviceNumber: Given invliad ``device_number``.
@@ -125,7 +168,7 @@ class MPS060602:
 
     @dataclass
     class __Device:
-        handle: HANDLE
+        handle: int
         number: int
 
     @dataclass
@@ -134,43 +177,33 @@ class MPS060602:
         started: bool = False
 
     def __init__(
-        self, para: MPS060602Para, device_number: int = 0, buffer_size: int = 1024
+        self,
+        para: MPS060602Para,
+        device_number: int = 0,
+        buffer_size: int = 1024,
+        backend: Backend = None,
+        metrics: AcquisitionMetrics = None,
     ) -> None:
         def invalid(dn): return dn < 0 or dn > 9
         if invalid(device_number):
             raise InvalidDeviceNumber(device_number)
 
-        self.dll = cdll.LoadLibrary(_inpackage_dll_path())
-        self.__init_dll_wrappers()
+        self.dll = backend if backend is not None else load_dll()
+        self.metrics = metrics if metrics is not None else AcquisitionMetrics()
+        """AcquisitionMetrics: Latency, rate and backlog of the reads, see :func:`AcquisitionMetrics.snapshot`."""
+        self.clock = SampleClock(para.ADSampleRate)
+        """SampleClock: Host time of the frames read since :func:`start`."""
+        self.calibration = None
+        """Calibration: Applied by :func:`to_volt_array` and carried by the blocks read when set, see
+        :func:`Calibration.load <mps060602.calibration.Calibration.load>`."""
 
         self.device = self.__open_device(device_number)
         self.buffer = (c_ushort * buffer_size)()
         self.state = self.__InternalState()
         self.configure(para)
 
-    def __init_dll_wrappers(self):
-        # TODO: Refactor with self.dll.__getitem__()
-        self.dll.MPS_OpenDevice.argtypes = (c_int,)
-        self.dll.MPS_OpenDevice.restype = HANDLE
-
-        self.dll.MPS_Configure.argtypes = (c_int, c_int, c_int, HANDLE)
-        self.dll.MPS_Configure.restype = c_int
-
-        self.dll.MPS_Start.argtypes = (HANDLE,)
-        self.dll.MPS_Start.restype = c_int
-
-        self.dll.MPS_DataIn.argtypes = (POINTER(c_ushort), c_int, HANDLE)
-        self.dll.MPS_DataIn.restype = c_int
-
-        self.dll.MPS_Stop.argtypes = (HANDLE,)
-        self.dll.MPS_Stop.restype = c_int
-
-        self.dll.MPS_CloseDevice.argtypes = (HANDLE,)
-        self.dll.MPS_CloseDevice.restype = c_int
-
     def __open_device(self, device_number: int) -> __Device:
-        all_bit_1 = sum([1 << i for i in range(sizeof(HANDLE) * 8)])
-        def failed(handle): return handle == all_bit_1
+        def failed(handle): return handle == INVALID_HANDLE
 
         handle = self.dll.MPS_OpenDevice(device_number)
         if failed(handle):
@@ -197,6 +230,10 @@ class MPS060602:
         ):
             raise ConfigureDeviceFailed(self.device.number)
         self.state.parameter = para
+        self._frame_width = 2 if para.ADChannel == ADChannelMode.in1_and_2 else 1
+        self.metrics.configured(para.ADSampleRate, self._frame_width)
+        if para.ADSampleRate != self.clock.sample_rate:
+            self.clock.configure(para.ADSampleRate)
 
     def __configure_raw(self, ADChannel, ADSampleRate, Gain, DeviceHandle) -> c_int:
         return self.dll.MPS_Configure(ADChannel, ADSampleRate, Gain, DeviceHandle)
@@ -211,16 +248,19 @@ class MPS060602:
         if failed(self.__start_raw(self.device.handle)):
             raise DeviceStartFailed(self.device.number)
         self.state.started = True
+        self.metrics.started()
+        self.clock.start()
 
     def resize_buffer(self, size: int):
-        """Resize internal buffer
+        """Resize internal buffer, the buffer is kept when size doesn't change.
 
         Args:
             size (int): new buffer size.
         """
-        self.buffer = (c_ushort * size)()
+        if len(self.buffer) != size:
+            self.buffer = (c_ushort * size)()
 
-    def __start_raw(self, handle: HANDLE) -> c_int:
+    def __start_raw(self, handle: int) -> c_int:
         return self.dll.MPS_Start(handle)
 
     def data_in(self, sample_number: int = None) -> Iterable[c_ushort]:
@@ -238,25 +278,171 @@ class MPS060602:
         self._data_into_buffer(self.buffer, sample_number)
         return self.buffer[0:sample_number]
 
+    def readinto(self, out, sample_number: int = None) -> int:
+        """Read data directly into a caller supplied buffer, without copying.
+
+        Args:
+            out: Writable buffer: ``c_ushort`` array, :class:`~mps060602.buffers.PoolBuffer`,
+            bytearray, uint16 numpy array, memoryview, ``SharedMemory.buf``...
+            sample_number (int, optional): Sample number, when None is given,
+            fill the whole ``out``. Defaults to None.
+
+        Raises:
+            TypeError: ``out`` isn't a buffer of uint16 samples or raw bytes.
+            BufferTooSmall: ``out`` can't hold ``sample_number`` samples.
+            DataInFailed: Failed to run DataIn function in DLL.
+
+        Returns:
+            int: Number of samples read.
+        """
+        buffer = as_ushort_array(out)
+        if not sample_number:
+            sample_number = len(buffer)
+        if sample_number > len(buffer):
+            raise BufferTooSmall(sample_number, len(buffer))
+        self._data_into_buffer(buffer, sample_number)
+        return sample_number
+
+    def read_block(self, sample_number: int = None, out: np.ndarray = None):
+        """Read into ``out`` and tag it with the current channel mode and gain.
+
+        Args:
+            sample_number (int, optional): Sample number, when None is given,
+            use ``out`` size, or buffer size without ``out``. Defaults to None.
+            out (np.ndarray, optional): uint16 destination. Defaults to None, allocate one.
+
+        Returns:
+            Block: Samples with per channel views and timestamp, see :class:`~mps060602.block.Block`.
+        """
+        from .block import Block
+
+        if out is None:
+            out = np.empty(sample_number or len(self.buffer), dtype=np.uint16)
+        n = self.readinto(out, sample_number)
+        return Block.from_para(
+            out[:n], self.state.parameter, timestamp=self.clock.last_block_time, calibration=self.calibration
+        )
+
+    def capture(self, sample_number: int, block_size: int = None, out: np.ndarray = None):
+        """Read ``sample_number`` samples in blocks, straight into one 2-D array.
+
+        The loop only calls ``MPS_DataIn``: the DLL function, handle and row
+        arrays are looked up once, and a failed read is recorded instead of
+        raising, so one bad block doesn't lose the whole capture. Metrics
+        record the calls together, at their mean latency.
+
+        Args:
+            sample_number (int): Total samples.
+            block_size (int, optional): Samples per ``MPS_DataIn`` call.
+            Defaults to None, buffer size.
+            out (np.ndarray, optional): C-contiguous uint16 array of
+            ``(n_blocks, block_size)`` or more rows. Defaults to None, allocate one.
+
+        Raises:
+            DeviceNotStarted: Card not started.
+            TypeError: ``out`` isn't uint16.
+            ValueError: ``out`` isn't C-contiguous.
+            BufferTooSmall: ``out`` can't hold ``sample_number`` samples.
+
+        Returns:
+            BatchCapture: Samples, with the return value of every call.
+        """
+        from .block import BatchCapture
+
+        if not self.state.started:
+            raise DeviceNotStarted(self.device.number)
+        block_size = block_size or len(self.buffer)
+        n_blocks = -(-sample_number // block_size)
+        if out is None:
+            out = np.zeros((n_blocks, block_size), dtype=np.uint16)
+        elif out.dtype != np.uint16:
+            raise TypeError("Capture array must be uint16, not {}.".format(out.dtype))
+        elif not out.flags.c_contiguous:
+            raise ValueError("Capture array must be C-contiguous.")
+        elif out.ndim != 2 or out.shape[1] != block_size or out.shape[0] < n_blocks:
+            raise BufferTooSmall(sample_number, out.size)
+        rows = (c_ushort * block_size * len(out)).from_buffer(out)
+        status = np.zeros(n_blocks, dtype=np.int64)
+        last = sample_number - (n_blocks - 1) * block_size
+
+        data_in = self.dll.MPS_DataIn
+        handle = self.device.handle
+        start = perf_counter_ns()
+        for i in range(n_blocks - 1):
+            status[i] = data_in(rows[i], block_size, handle)
+        if n_blocks:
+            status[n_blocks - 1] = data_in(rows[n_blocks - 1], last, handle)
+        failed = status == 0
+        failed_values = int(failed[:-1].sum()) * block_size + (last if n_blocks and failed[-1] else 0)
+        duration = perf_counter_ns() - start
+        self.metrics.record_calls(n_blocks, sample_number - failed_values, duration, int(failed.sum()))
+        self.clock.advance(sample_number // self._frame_width)
+
+        para = self.state.parameter
+        return BatchCapture(out[:n_blocks], status, sample_number, para.ADChannel, para.Gain, self.calibration)
+
     def _data_into_buffer(self, buffer, sample_number: int = None) -> None:
         if not sample_number:
             sample_number = len(buffer)
 
         def failed(res): return res == 0
-        if failed(self.__data_in_raw(buffer, sample_number, self.device.handle)):
+        start = perf_counter_ns()
+        res = self.__data_in_raw(buffer, sample_number, self.device.handle)
+        self.metrics.record_call(sample_number, perf_counter_ns() - start, failed(res))
+        if failed(res):
             raise DataInFailed(self.device.number)
+        self.clock.advance(sample_number // self._frame_width)
 
-    def to_volt(self, data: c_ushort) -> float:
+    def to_volt(self, data: c_ushort, channel: int = None) -> float:
         """Convert internal ushort data to volt: (1 - (data / 65536) * 2) * volt_range
 
+        ``volt_range`` is :attr:`AmpRate.full_scale` of the current gain.
+        With a :attr:`calibration`, the value is looked up in its tables, as
+        :func:`to_volt_array` does.
+
         Args:
             data (c_ushort): Internal ushort data.
+            channel (int, optional): Input ``data`` was read from, 1 or 2,
+            needed in ``in1_and_2`` mode with a :attr:`calibration`.
+            Defaults to None, the input of the current mode.
+
+        Raises:
+            ValueError: No ``channel`` in ``in1_and_2`` mode with a :attr:`calibration`.
 
         Returns:
             float: Voltage value.
         """
-        volt_range = self.state.parameter.Gain.volt
-        return (1 - (data / 65536) * 2) * volt_range
+        para = self.state.parameter
+        if self.calibration is None:
+            volt_range = para.Gain.full_scale
+            return (1 - (data / 65536) * 2) * volt_range
+        if channel is None:
+            channel = {ADChannelMode.in1: 1, ADChannelMode.in2: 2, ADChannelMode.difference: 0}.get(para.ADChannel)
+            if channel is None:
+                raise ValueError("Calibrated conversion needs the channel in in1_and_2 mode.")
+        return float(self.calibration.table(channel, para.Gain)[int(data)])
+
+    def to_volt_array(self, data, dtype=np.float64, out: np.ndarray = None) -> np.ndarray:
+        """Convert a block of ushort data to volt in one vectorized operation.
+
+        With a :attr:`calibration`, values are looked up in its tables instead.
+
+        Args:
+            data: Raw ushort samples, e.g. ``MPS060602.buffer`` or a numpy array.
+            dtype (optional): Output float dtype. Defaults to np.float64.
+            out (np.ndarray, optional): Preallocated output array. Defaults to None.
+
+        Returns:
+            np.ndarray: Voltage values.
+        """
+        start = perf_counter_ns()
+        para = self.state.parameter
+        if self.calibration is not None:
+            out = self.calibration.convert(data, para.ADChannel, para.Gain, dtype, out)
+        else:
+            out = to_volt_array(data, para.Gain, dtype, out)
+        self.metrics.record_conversion(perf_counter_ns() - start)
+        return out
 
     def read_to_volt(self, sample_number: int = None) -> Iterable[float]:
         """Read ``sample_number`` of data, convert to voltage, and return 
@@ -269,11 +455,30 @@ class MPS060602:
         Returns:
             Iterable[float]: Immutable copy of data, converted to volt.
         """
-        buffer = self.data_in(sample_number)
-        return tuple(self.to_volt(i) for i in buffer)
+        return tuple(self.read_to_volt_array(sample_number).tolist())
+
+    def read_to_volt_array(self, sample_number: int = None, dtype=np.float64) -> np.ndarray:
+        """Read ``sample_number`` of data and convert to voltage as a numpy array.
+
+        ``MPS060602.buffer`` is viewed through the buffer protocol, so no
+        intermediate Python objects are created.
+
+        Args:
+            sample_number (int, optional): Sample number, when None is given,
+            use buffer size. Defaults to None.
+            dtype (optional): Output float dtype, ``np.float32`` or ``np.float64``.
+            Defaults to np.float64.
+
+        Returns:
+            np.ndarray: Newly allocated array of voltage values.
+        """
+        if not sample_number:
+            sample_number = len(self.buffer)
+        self._data_into_buffer(self.buffer, sample_number)
+        raw = np.frombuffer(self.buffer, dtype=np.uint16, count=sample_number)
+        return self.to_volt_array(raw, dtype)
 
     def __data_in_raw(self, DataBuffer, SampleNumber, DeviceHandle) -> c_int:
-        # TODO: async this.
         if not self.state.started:
             raise DeviceNotStarted(self.device.number)
         return self.dll.MPS_DataIn(DataBuffer, SampleNumber, DeviceHandle)
@@ -291,8 +496,9 @@ class MPS060602:
         if failed(self.__stop_raw(self.device.handle)):
             raise DeviceStopFailed(self.device.number)
         self.state.started = False
+        self.metrics.stopped()
 
-    def __stop_raw(self, handle: HANDLE) -> c_int:
+    def __stop_raw(self, handle: int) -> c_int:
         return self.dll.MPS_Stop(handle)
 
     def close(self):
@@ -305,6 +511,7 @@ class MPS060602:
         if failed(self.__close_raw(self.device.handle)):
             raise DeviceCloseFailed(self.device.number)
         self.state.started = False
+        self.metrics.stopped()
 
-    def __close_raw(self, handle: HANDLE) -> c_int:
+    def __close_raw(self, handle: int) -> c_int:
         return self.dll.MPS_CloseDevice(handle)
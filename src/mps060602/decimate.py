@@ -0,0 +1,200 @@
+import math
+from typing import Dict, List
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .block import Block
+
+
+def lowpass_taps(input_rate: float, pass_edge: float, stop_edge: float, attenuation: float = 80.0) -> np.ndarray:
+    """Kaiser windowed-sinc lowpass FIR with unit DC gain.
+
+    Args:
+        input_rate (float): Sample rate of the filter input, Hz.
+        pass_edge (float): End of pass band, Hz.
+        stop_edge (float): Start of stop band, Hz.
+        attenuation (float, optional): Stop band attenuation, dB. Defaults to 80.0.
+
+    Returns:
+        np.ndarray: Odd number of taps.
+    """
+    width = (stop_edge - pass_edge) / input_rate
+    n = int(math.ceil((attenuation - 7.95) / (14.36 * width))) + 1
+    n += 1 - n % 2
+    if attenuation > 50:
+        beta = 0.1102 * (attenuation - 8.7)
+    elif attenuation > 21:
+        beta = 0.5842 * (attenuation - 21) ** 0.4 + 0.07886 * (attenuation - 21)
+    else:
+        beta = 0.0
+    cutoff = (pass_edge + stop_edge) / 2 / input_rate
+    taps = 2 * cutoff * np.sinc(2 * cutoff * (np.arange(n) - (n - 1) / 2)) * np.kaiser(n, beta)
+    return taps / taps.sum()
+
+
+def split_factor(factor: int, max_stage: int = 8) -> List[int]:
+    """Split a decimation factor into stage factors of at most ``max_stage``, largest first.
+
+    Raises:
+        ValueError: ``factor`` has a prime factor larger than ``max_stage``.
+    """
+    primes = []
+    n, p = factor, 2
+    while n > 1:
+        while n % p == 0:
+            primes.append(p)
+            n //= p
+        p += 1
+    if primes and primes[-1] > max_stage:
+        raise ValueError("Prime factor {} of {} exceeds {}.".format(primes[-1], factor, max_stage))
+    stages = []
+    for p in sorted(primes, reverse=True):
+        for i, stage in enumerate(stages):
+            if stage * p <= max_stage:
+                stages[i] *= p
+                break
+        else:
+            stages.append(p)
+    return sorted(stages, reverse=True)
+
+
+class FIRStage:
+    """Decimate by ``factor`` with an FIR filter, keeping state across blocks.
+
+    Only the kept outputs are computed (polyphase cost): each output is the
+    dot product of one strided window of the input with the taps.
+
+    Args:
+        taps (np.ndarray): Filter taps.
+        factor (int): Decimation factor.
+    """
+
+    def __init__(self, taps: np.ndarray, factor: int) -> None:
+        self.taps = np.ascontiguousarray(taps[::-1], dtype=np.float64)
+        self.factor = factor
+        self._history = np.zeros(len(taps) - 1)
+        self._offset = 0
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        if len(x) == 0:
+            return np.empty(0)
+        extended = np.concatenate((self._history, x))
+        windows = sliding_window_view(extended, len(self.taps))[self._offset:: self.factor]
+        y = windows @ self.taps
+        self._offset += len(y) * self.factor - len(x)
+        if len(self.taps) > 1:
+            self._history = extended[len(extended) - len(self.taps) + 1:]
+        return y
+
+    def reset(self):
+        self._history[:] = 0
+        self._offset = 0
+
+
+class Decimator:
+    """Streaming multistage decimator for one channel.
+
+    The factor is split into stages of at most 8 (see :func:`split_factor`).
+    Every stage only has to keep aliases out of the final pass band, so early
+    stages, running at the highest rates, get short filters and only the last
+    one is sharp.
+
+    Args:
+        input_rate (float): Input sample rate, Hz.
+        factor (int): Total decimation factor.
+        passband (float, optional): Fraction of the output Nyquist band kept
+        flat. Defaults to 0.8.
+        attenuation (float, optional): Alias rejection, dB. Defaults to 80.0.
+        dtype (optional): Output dtype. Defaults to np.float64.
+    """
+
+    def __init__(
+        self,
+        input_rate: float,
+        factor: int,
+        passband: float = 0.8,
+        attenuation: float = 80.0,
+        dtype=np.float64,
+    ) -> None:
+        self.input_rate = input_rate
+        self.factor = factor
+        self.dtype = dtype
+        self.output_rate = input_rate / factor
+        pass_edge = passband * self.output_rate / 2
+
+        self.stages: List[FIRStage] = []
+        rate = input_rate
+        for stage_factor in split_factor(factor):
+            stage_output = rate / stage_factor
+            taps = lowpass_taps(rate, pass_edge, stage_output - pass_edge, attenuation)
+            self.stages.append(FIRStage(taps, stage_factor))
+            rate = stage_output
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Decimate the next block of samples.
+
+        Args:
+            x (np.ndarray): Samples, raw uint16 codes or volts.
+
+        Returns:
+            np.ndarray: Decimated samples, in the unit of ``x``.
+        """
+        y = np.asarray(x, dtype=np.float64)
+        for stage in self.stages:
+            y = stage.process(y)
+        return y.astype(self.dtype, copy=False)
+
+    def reset(self):
+        """Forget the state carried across blocks."""
+        for stage in self.stages:
+            stage.reset()
+
+
+class BlockDecimator:
+    """Decimate every channel of :class:`~mps060602.block.Block` streams to volts.
+
+    Blocks are converted with :func:`Block.volts <mps060602.block.Block.volts>`,
+    calibration included, before filtering. The filter history is thus in
+    volts and stays valid when the gain changes between blocks, e.g. under
+    :class:`~mps060602.autorange.AutoRange`.
+
+    Args:
+        sample_rate (int): ``ADSampleRate`` of the card.
+        factor (int): Total decimation factor.
+        **kwargs: Passed to :class:`Decimator`.
+    """
+
+    def __init__(self, sample_rate: int, factor: int, **kwargs) -> None:
+        self.sample_rate = sample_rate
+        self.factor = factor
+        self._kwargs = kwargs
+        self._decimators: Dict[int, Decimator] = {}
+        self._volts: Dict[int, np.ndarray] = {}
+
+    @property
+    def output_rate(self) -> float:
+        return self.sample_rate / self.factor
+
+    def process(self, block: Block) -> Dict[int, np.ndarray]:
+        """Decimate a block.
+
+        Args:
+            block (Block): Next block.
+
+        Returns:
+            Dict[int, np.ndarray]: Volts per channel, channel 0 in ``difference`` mode.
+        """
+        result = {}
+        for channel in block.channels or (0,):
+            decimator = self._decimators.get(channel)
+            if decimator is None:
+                decimator = self._decimators[channel] = Decimator(
+                    self.sample_rate, self.factor, **self._kwargs
+                )
+            n = len(block.raw) if channel == 0 else len(block.channel(channel))
+            volts = self._volts.get(channel)
+            if volts is None or len(volts) < n:
+                volts = self._volts[channel] = np.empty(n)
+            result[channel] = decimator.process(block.volts(channel or None, out=volts[:n]))
+        return result
@@ -64,3 +64,43 @@ class DataInFailed(MPS060602Error):
             device_number
         )
         super().__init__(message, *args)
+
+
+class BufferTooSmall(MPS060602Error):
+    def __init__(self, sample_number: int, capacity: int, *args: object) -> None:
+        message = "Buffer holds {} samples, cannot read {} samples.".format(
+            capacity, sample_number
+        )
+        super().__init__(message, *args)
+
+
+class AcquisitionNotRunning(MPS060602Error):
+    def __init__(self, device_number: int, *args: object) -> None:
+        message = "Continuous acquisition is not running, device number {}.".format(
+            device_number
+        )
+        super().__init__(message, *args)
+
+
+class ChannelNotAcquired(MPS060602Error):
+    def __init__(self, channel: int, mode: str, *args: object) -> None:
+        message = "Channel In{} is not acquired in {} mode.".format(channel, mode)
+        super().__init__(message, *args)
+
+
+class InvalidRecording(MPS060602Error):
+    def __init__(self, reason: str, *args: object) -> None:
+        message = "Invalid recording file: {}.".format(reason)
+        super().__init__(message, *args)
+
+
+class InvalidFrame(MPS060602Error):
+    def __init__(self, reason: str, *args: object) -> None:
+        message = "Invalid stream frame: {}.".format(reason)
+        super().__init__(message, *args)
+
+
+class StageFailed(MPS060602Error):
+    def __init__(self, stage: str, reason: str, *args: object) -> None:
+        message = "Pipeline stage {} failed: {}.".format(stage, reason)
+        super().__init__(message, *args)
@@ -0,0 +1,137 @@
+"""Binary recording format written by :class:`~mps060602.recorder.Recorder`.
+
+A recording is a fixed size little endian header followed by the raw
+uint16 samples exactly as ``MPS_DataIn`` returned them, interleaved in
+``in1_and_2`` mode. The data section starts at :data:`HEADER_SIZE`, so it can
+be memory-mapped directly.
+
+Frames lost before reaching the file are listed in a gap index after the
+data section, :attr:`RecordingHeader.gap_count` pairs of uint64: position
+in the file, in frames, and number of frames missing there. Version 1
+files have no gap index.
+"""
+
+import struct
+from dataclasses import dataclass
+
+from .core import ADChannelMode, AmpRate, MPS060602Para, PGAAmpRate
+from .errors import InvalidRecording
+
+MAGIC = b"MPS0606R"
+VERSION = 2
+HEADER_SIZE = 512
+
+_HEADER = struct.Struct("<8sHHBBBBIdQQQI")
+_GAP = struct.Struct("<QQ")
+
+
+@dataclass
+class RecordingHeader:
+    """Metadata stored at the start of a recording.
+
+    Attributes:
+        channel_mode (ADChannelMode): Channel mode of the card.
+        sample_rate (int): ``ADSampleRate`` of the card.
+        gain_index (int): ``AmpRate.index`` of the gain.
+        device_number (int): Device number of the card.
+        start_time (float): Unix time of the first sample.
+        sample_count (int): Values in the data section, 0 if the recording wasn't closed.
+        first_sample (int): Index of the first value since the card started.
+        codec (int): Codec of the data section, 0 for raw uint16.
+        data_size (int): Bytes in the data section, 0 if the recording wasn't closed.
+        gap_count (int): Entries in the gap index.
+    """
+
+    channel_mode: ADChannelMode
+    sample_rate: int
+    gain_index: int
+    device_number: int = 0
+    start_time: float = 0.0
+    sample_count: int = 0
+    first_sample: int = 0
+    codec: int = 0
+    data_size: int = 0
+    gap_count: int = 0
+
+    @classmethod
+    def from_para(cls, para: MPS060602Para, device_number: int = 0, **kwargs) -> "RecordingHeader":
+        return cls(para.ADChannel, para.ADSampleRate, para.Gain.index, device_number, **kwargs)
+
+    @property
+    def gain(self) -> AmpRate:
+        """AmpRate: Gain of the recording."""
+        return PGAAmpRate.from_index(self.gain_index)
+
+    @property
+    def para(self) -> MPS060602Para:
+        """MPS060602Para: Parameters the card was configured with."""
+        return MPS060602Para(self.channel_mode, self.sample_rate, self.gain)
+
+    @property
+    def frame_width(self) -> int:
+        """int: Values per sample instant, 2 when channels are interleaved."""
+        return 2 if self.channel_mode == ADChannelMode.in1_and_2 else 1
+
+    def pack(self) -> bytes:
+        """Serialize, padded to :data:`HEADER_SIZE`."""
+        packed = _HEADER.pack(
+            MAGIC,
+            VERSION,
+            HEADER_SIZE,
+            self.channel_mode,
+            self.gain_index,
+            self.device_number,
+            self.codec,
+            self.sample_rate,
+            self.start_time,
+            self.sample_count,
+            self.first_sample,
+            self.data_size,
+            self.gap_count,
+        )
+        return packed.ljust(HEADER_SIZE, b"\0")
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "RecordingHeader":
+        """Parse a header.
+
+        Raises:
+            InvalidRecording: Not a recording, or an unsupported version.
+        """
+        if len(data) < _HEADER.size:
+            raise InvalidRecording("file too short")
+        (
+            magic, version, _, mode, gain, device, codec, rate, start, count, first, size, gaps,
+        ) = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise InvalidRecording("bad magic {!r}".format(magic))
+        if version > VERSION:
+            raise InvalidRecording("unsupported version {}".format(version))
+        return cls(ADChannelMode(mode), rate, gain, device, start, count, first, codec, size, gaps)
+
+
+def read_header(path) -> RecordingHeader:
+    """Read the header of the recording at ``path``."""
+    with open(path, "rb") as f:
+        return RecordingHeader.unpack(f.read(HEADER_SIZE))
+
+
+def pack_gaps(gaps) -> bytes:
+    """Serialize a gap index, ``(position, missing)`` frame pairs."""
+    return b"".join(_GAP.pack(position, missing) for position, missing in gaps)
+
+
+def read_gaps(path, header: RecordingHeader):
+    """Gap index of the recording at ``path``, a list of ``(position, missing)`` frame pairs.
+
+    Raises:
+        InvalidRecording: The index is cut short.
+    """
+    if not header.gap_count:
+        return []
+    with open(path, "rb") as f:
+        f.seek(HEADER_SIZE + header.data_size)
+        data = f.read(header.gap_count * _GAP.size)
+    if len(data) < header.gap_count * _GAP.size:
+        raise InvalidRecording("gap index cut short")
+    return [_GAP.unpack_from(data, i * _GAP.size) for i in range(header.gap_count)]
@@ -0,0 +1,188 @@
+import math
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable, List
+
+# Latency bucket ``k`` holds calls of ``[2 ** (k - 1), 2 ** k)`` microseconds,
+# bucket 0 calls under a microsecond. The last one is open ended (over 35 min).
+LATENCY_BUCKETS = 32
+
+
+@dataclass
+class MetricsSnapshot:
+    """Health of an acquisition at one instant, see :class:`AcquisitionMetrics`.
+
+    Rates and backlog count frames: one sample of every acquired channel.
+
+    Attributes:
+        calls (int): ``MPS_DataIn`` calls.
+        frames (int): Frames read by successful calls.
+        configured_rate (int): ``ADSampleRate``.
+        achieved_rate (float): Frames read per second since the card was started.
+        dll_seconds (float): Time spent in ``MPS_DataIn``.
+        conversion_seconds (float): Time spent converting to volt.
+        latency_max (float): Slowest call, seconds.
+        latency_histogram (List[int]): Calls per latency bucket, see :func:`latency_edges`.
+        backlog (int): Frames acquired by the card but not read yet, estimated
+        from the time since the card was started.
+        failures (int): Calls that failed, their values aren't counted as frames.
+    """
+
+    calls: int
+    frames: int
+    configured_rate: int
+    achieved_rate: float
+    dll_seconds: float
+    conversion_seconds: float
+    latency_max: float
+    latency_histogram: List[int]
+    backlog: int
+    failures: int = 0
+
+    @property
+    def latency_mean(self) -> float:
+        return self.dll_seconds / self.calls if self.calls else math.nan
+
+    @property
+    def lag(self) -> float:
+        """float: Backlog in seconds."""
+        return self.backlog / self.configured_rate if self.configured_rate else 0.0
+
+    def latency_percentile(self, percent: float) -> float:
+        """Upper bound of the latency under which ``percent`` of the calls fall, seconds."""
+        if not self.calls:
+            return math.nan
+        rank = percent / 100 * self.calls
+        seen = 0
+        for edge, count in zip(latency_edges(), self.latency_histogram):
+            seen += count
+            if seen >= rank:
+                return edge
+        return math.inf
+
+
+def latency_edges() -> List[float]:
+    """Upper edges of the latency buckets, seconds."""
+    return [2 ** k * 1e-6 for k in range(LATENCY_BUCKETS - 1)] + [math.inf]
+
+
+class AcquisitionMetrics:
+    """Instrumentation of the ``MPS_DataIn`` calls of a :class:`~mps060602.core.MPS060602`.
+
+    Every call costs two ``perf_counter`` reads and a few integer updates,
+    latencies go to a log2 histogram of fixed size. Snapshots are computed
+    on demand, and are consistent enough for monitoring when taken from
+    another thread.
+
+    The backlog compares the frames read with the frames the card acquired
+    since :func:`~mps060602.core.MPS060602.start`: a backlog growing over
+    snapshots means the loop falls behind and the card buffer will overrun.
+
+    Args:
+        callback (Callable[[MetricsSnapshot], None], optional): Called with a
+        snapshot every ``callback_every`` calls, e.g. to alert when
+        ``snapshot.lag`` grows. Defaults to None.
+        callback_every (int, optional): Calls between callbacks, at least 1. Defaults to 1.
+
+    Raises:
+        ValueError: ``callback_every`` is less than 1.
+    """
+
+    def __init__(self, callback: Callable[[MetricsSnapshot], None] = None, callback_every: int = 1) -> None:
+        if callback_every < 1:
+            raise ValueError("callback_every must be at least 1, not {}.".format(callback_every))
+        self.callback = callback
+        self.callback_every = callback_every
+        self._rate = 0
+        self._frame_width = 1
+        self._started_at = None
+        self._session_values = 0
+        self.reset()
+
+    def reset(self):
+        """Clear counters, the current acquisition keeps its start time."""
+        self._calls = 0
+        self._failures = 0
+        self._values = 0
+        self._dll_ns = 0
+        self._conversion_ns = 0
+        self._latency_max_ns = 0
+        self._histogram = [0] * LATENCY_BUCKETS
+
+    def configured(self, sample_rate: int, frame_width: int):
+        """Record the configured rate, values per frame being ``frame_width``."""
+        self._rate = sample_rate
+        self._frame_width = frame_width
+
+    def started(self):
+        """Record the card starting to acquire."""
+        self._started_at = perf_counter()
+        self._session_values = 0
+
+    def stopped(self):
+        """Record the card being suspended or closed."""
+        self._started_at = None
+
+    def record_call(self, values: int, latency_ns: int, failed: bool = False):
+        """Record one ``MPS_DataIn`` call of ``values`` samples, none read if it ``failed``."""
+        self._calls += 1
+        if failed:
+            self._failures += 1
+        else:
+            self._values += values
+            self._session_values += values
+        self._dll_ns += latency_ns
+        if latency_ns > self._latency_max_ns:
+            self._latency_max_ns = latency_ns
+        self._histogram[min((latency_ns // 1000).bit_length(), LATENCY_BUCKETS - 1)] += 1
+        if self.callback is not None and self._calls % self.callback_every == 0:
+            self.callback(self.snapshot())
+
+    def record_calls(self, calls: int, values: int, duration_ns: int, failures: int = 0):
+        """Record ``calls`` back to back calls together, counted at their mean latency.
+
+        ``values`` counts the samples of the successful calls only, ``failures``
+        the calls that failed.
+        """
+        if not calls:
+            return
+        latency_ns = duration_ns // calls
+        previous = self._calls
+        self._calls += calls
+        self._failures += failures
+        self._values += values
+        self._session_values += values
+        self._dll_ns += duration_ns
+        if latency_ns > self._latency_max_ns:
+            self._latency_max_ns = latency_ns
+        self._histogram[min((latency_ns // 1000).bit_length(), LATENCY_BUCKETS - 1)] += calls
+        # Once per batch that crossed a multiple of ``callback_every``.
+        if self.callback is not None and self._calls // self.callback_every > previous // self.callback_every:
+            self.callback(self.snapshot())
+
+    def record_conversion(self, duration_ns: int):
+        """Record time spent converting samples to volt."""
+        self._conversion_ns += duration_ns
+
+    def snapshot(self) -> MetricsSnapshot:
+        """Current metrics."""
+        session_frames = self._session_values // self._frame_width
+        achieved = math.nan
+        backlog = 0
+        if self._started_at is not None:
+            elapsed = perf_counter() - self._started_at
+            if elapsed > 0:
+                achieved = session_frames / elapsed
+            backlog = max(int(elapsed * self._rate) - session_frames, 0)
+        return MetricsSnapshot(
+            self._calls,
+            self._values // self._frame_width,
+            self._rate,
+            achieved,
+            self._dll_ns * 1e-9,
+            self._conversion_ns * 1e-9,
+            self._latency_max_ns * 1e-9,
+            list(self._histogram),
+            backlog,
+            self._failures,
+        )
@@ -0,0 +1,146 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, Mapping, Union
+
+from .backends import Backend
+from .block import Block
+from .core import MPS060602, MPS060602Para
+from .streaming import ContinuousAcquisition
+
+
+@dataclass
+class MultiCardBlock:
+    """Blocks of several cards with the same block index.
+
+    Attributes:
+        index (int): Block index since start, shared by every card.
+        blocks (Dict[int, Block]): Block of each device number.
+        sample_counters (Dict[int, int]): Index of the first sample of each
+        block since its card started.
+    """
+
+    index: int
+    blocks: Dict[int, Block]
+    sample_counters: Dict[int, int]
+
+
+class MultiCardManager:
+    """Acquire from several cards at full rate, each read on its own thread.
+
+    Every card is driven by a :class:`~mps060602.streaming.ContinuousAcquisition`.
+    The DLL releases the GIL in ``MPS_DataIn``, so reads of different cards
+    run in parallel. :func:`get` returns the blocks of all cards with the same
+    block index, skipping blocks that some card dropped.
+
+    Args:
+        device_numbers (Iterable[int]): Device numbers of the cards.
+        para (MPS060602Para or Mapping[int, MPS060602Para]): Shared
+        parameters, or parameters per device number.
+        block_size (int or Mapping[int, int], optional): Samples per block,
+        shared or per device number. Cards with different rates need
+        proportional sizes to stay aligned in time. Defaults to 4096.
+        n_blocks (int, optional): Ring length of each card. Defaults to 32.
+        backend (Backend, optional): Backend shared by all cards. Defaults to None, the DLL.
+    """
+
+    def __init__(
+        self,
+        device_numbers: Iterable[int],
+        para: Union[MPS060602Para, Mapping[int, MPS060602Para]],
+        block_size: Union[int, Mapping[int, int]] = 4096,
+        n_blocks: int = 32,
+        backend: Backend = None,
+    ) -> None:
+        self.device_numbers = tuple(device_numbers)
+
+        def per_card(value, number):
+            return value[number] if isinstance(value, Mapping) else value
+
+        self.cards: Dict[int, MPS060602] = {}
+        try:
+            for number in self.device_numbers:
+                size = per_card(block_size, number)
+                self.cards[number] = MPS060602(
+                    per_card(para, number), number, buffer_size=size, backend=backend
+                )
+        except Exception:
+            self.close()
+            raise
+        self.acquisitions = {
+            number: ContinuousAcquisition(
+                card, per_card(block_size, number), n_blocks
+            )
+            for number, card in self.cards.items()
+        }
+        self.skipped = {number: 0 for number in self.device_numbers}
+        """Dict[int, int]: Blocks discarded by :func:`get` to keep cards aligned."""
+        self.start_skew = None
+        """float: Seconds between the first and the last card start."""
+
+    @property
+    def overruns(self) -> Dict[int, int]:
+        """Dict[int, int]: Blocks each card dropped because its ring was full."""
+        return {n: a.overruns for n, a in self.acquisitions.items()}
+
+    def start(self):
+        """Start all cards back to back, then their acquisition threads."""
+        first = time.perf_counter()
+        for card in self.cards.values():
+            card.start()
+        self.start_skew = time.perf_counter() - first
+        for acquisition in self.acquisitions.values():
+            acquisition.start()
+
+    def stop(self):
+        """Stop acquisition threads and suspend all cards."""
+        for acquisition in self.acquisitions.values():
+            acquisition.stop()
+        for card in self.cards.values():
+            if card.state.started:
+                card.suspend()
+
+    def close(self):
+        """Stop and close all cards."""
+        if hasattr(self, "acquisitions"):
+            self.stop()
+        for card in self.cards.values():
+            card.close()
+
+    def get(self, timeout: float = None) -> MultiCardBlock:
+        """Wait until every card has a block with the same index.
+
+        Blocks are views into the rings, valid until the next :func:`get`.
+
+        Args:
+            timeout (float, optional): Seconds to wait for each block. Defaults to None.
+
+        Returns:
+            MultiCardBlock: Aligned blocks.
+        """
+        blocks = {n: a.get(timeout) for n, a in self.acquisitions.items()}
+        aligned = False
+        while not aligned:
+            target = max(a.block_index for a in self.acquisitions.values())
+            aligned = True
+            for number, acquisition in self.acquisitions.items():
+                while acquisition.block_index < target:
+                    blocks[number] = acquisition.get(timeout)
+                    self.skipped[number] += 1
+                # This card dropped the target block, realign on its block.
+                aligned = aligned and acquisition.block_index == target
+        return MultiCardBlock(
+            target,
+            blocks,
+            {n: target * a.block_size for n, a in self.acquisitions.items()},
+        )
+
+    def __iter__(self) -> Iterator[MultiCardBlock]:
+        while True:
+            yield self.get()
+
+    def __enter__(self) -> "MultiCardManager":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
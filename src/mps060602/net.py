@@ -0,0 +1,288 @@
+"""Stream blocks of a card to remote consumers over TCP.
+
+Every block is sent as one frame: a little endian header followed by the
+raw uint16 samples exactly as ``MPS_DataIn`` returned them.
+
+======  ========  ==========================================
+Offset  Type      Field
+======  ========  ==========================================
+0       4s        ``b"MPSB"``
+4       uint8     Version, 1
+5       uint8     ``ADChannelMode``
+6       uint8     ``AmpRate.index`` of the gain
+7       uint8     Reserved, 0
+8       uint32    ``ADSampleRate``
+12      uint32    Samples in the frame
+16      uint64    Block index since the acquisition started
+======  ========  ==========================================
+"""
+
+import queue
+import socket
+import struct
+import threading
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from .block import Block
+from .core import MPS060602, PGAAmpRate
+from .errors import AcquisitionNotRunning, InvalidFrame
+from .streaming import ContinuousAcquisition
+
+FRAME_MAGIC = b"MPSB"
+FRAME_VERSION = 1
+_FRAME = struct.Struct("<4sBBBxIIQ")
+
+
+def pack_frame_header(block: Block, sample_rate: int) -> bytes:
+    """Frame header of ``block``."""
+    return _FRAME.pack(
+        FRAME_MAGIC, FRAME_VERSION, block.mode, block.gain.index, sample_rate, len(block), block.index or 0
+    )
+
+
+class _Client:
+    def __init__(self, sock: socket.socket, address, max_queue: int) -> None:
+        self.sock = sock
+        self.address = address
+        self.frames = queue.Queue(max_queue)
+        self.sent = 0
+        self.dropped = 0
+        self.closed = False
+
+
+class StreamServer:
+    """Serve the blocks of a card to any number of TCP clients.
+
+    The card is read by a :class:`~mps060602.streaming.ContinuousAcquisition`.
+    Each block is packed once, header and samples, and queued to every
+    client; a thread per client sends its queue, so a slow client only
+    delays itself. When a client queue is full:
+
+    * ``"drop"``: the frame is dropped for this client and counted, the
+      client sees a gap in block indices.
+    * ``"block"``: the server waits for the client, the backpressure reaches
+      the acquisition ring, whose overruns then drop blocks for everyone.
+
+    Args:
+        card (MPS060602): Configured card. Started on :func:`start` if it isn't.
+        host (str, optional): Address to bind. Defaults to "127.0.0.1".
+        port (int, optional): Port, 0 to pick a free one, see :attr:`address`. Defaults to 0.
+        block_size (int, optional): Samples per block. Defaults to 4096.
+        n_blocks (int, optional): Number of blocks in the acquisition ring. Defaults to 32.
+        policy (str, optional): ``"drop"`` or ``"block"``. Defaults to "drop".
+        max_queue (int, optional): Frames queued per client. Defaults to 16.
+    """
+
+    def __init__(
+        self,
+        card: MPS060602,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        block_size: int = 4096,
+        n_blocks: int = 32,
+        policy: str = "drop",
+        max_queue: int = 16,
+    ) -> None:
+        if policy not in ("drop", "block"):
+            raise ValueError("Unknown policy {!r}.".format(policy))
+        self.card = card
+        self.policy = policy
+        self.max_queue = max_queue
+        self.acquisition = ContinuousAcquisition(card, block_size, n_blocks)
+
+        self._listener = socket.create_server((host, port))
+        # Closing a socket doesn't wake up ``accept`` on every platform, poll instead.
+        self._listener.settimeout(0.1)
+        self._clients: Dict[Tuple, _Client] = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self._threads = []
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Tuple[str, int]: Host and port clients connect to."""
+        return self._listener.getsockname()[:2]
+
+    def client_stats(self) -> Dict[Tuple, Tuple[int, int]]:
+        """Frames sent and dropped, by address of connected clients."""
+        with self._lock:
+            return {c.address: (c.sent, c.dropped) for c in self._clients.values()}
+
+    def start(self):
+        """Start acquiring and accepting clients."""
+        if self._running:
+            return
+        self._running = True
+        self.acquisition.start()
+        for target, name in ((self._accept, "accept"), (self._distribute, "distribute")):
+            thread = threading.Thread(target=target, name="mps060602-net-" + name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _accept(self):
+        while self._running:
+            try:
+                sock, address = self._listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client = _Client(sock, address, self.max_queue)
+            with self._lock:
+                self._clients[address] = client
+            threading.Thread(target=self._send, args=(client,), daemon=True).start()
+
+    def _distribute(self):
+        sample_rate = self.card.state.parameter.ADSampleRate
+        while self._running:
+            try:
+                block = self.acquisition.get(timeout=0.1)
+            except TimeoutError:
+                continue
+            except AcquisitionNotRunning:
+                break
+            frame = pack_frame_header(block, sample_rate) + block.raw.tobytes()
+            with self._lock:
+                clients = list(self._clients.values())
+            for client in clients:
+                if self.policy == "drop":
+                    try:
+                        client.frames.put_nowait(frame)
+                    except queue.Full:
+                        client.dropped += 1
+                else:
+                    while not client.closed and self._running:
+                        try:
+                            client.frames.put(frame, timeout=0.1)
+                            break
+                        except queue.Full:
+                            pass
+        # Wake up senders, so they notice the server stopped.
+        with self._lock:
+            clients = list(self._clients.values())
+        for client in clients:
+            client.closed = True
+            try:
+                client.frames.put_nowait(None)
+            except queue.Full:
+                pass
+
+    def _send(self, client: _Client):
+        try:
+            while not client.closed:
+                frame = client.frames.get()
+                if frame is None:
+                    break
+                client.sock.sendall(frame)
+                client.sent += 1
+        except OSError:
+            pass
+        finally:
+            client.closed = True
+            with self._lock:
+                self._clients.pop(client.address, None)
+            client.sock.close()
+
+    def stop(self):
+        """Stop acquiring, disconnect clients and close the listening socket."""
+        self._running = False
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._listener.close()
+        self.acquisition.stop()
+        with self._lock:
+            clients = list(self._clients.values())
+        for client in clients:
+            client.closed = True
+            try:
+                client.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    close = stop
+
+    def __enter__(self) -> "StreamServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+class StreamClient:
+    """Receive the blocks of a :class:`StreamServer`.
+
+    Every frame is received straight into a new uint16 array.
+
+    Args:
+        host (str): Server address.
+        port (int): Server port.
+        timeout (float, optional): Socket timeout in seconds. Defaults to None.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = None) -> None:
+        self.sock = socket.create_connection((host, port), timeout)
+        self._header = bytearray(_FRAME.size)
+        self.sample_rate = None
+        """int: ``ADSampleRate`` of the last block."""
+
+        self.missed = 0
+        """int: Blocks missing between received block indices."""
+        self._last_index = None
+
+    def _receive_into(self, view: memoryview) -> bool:
+        while len(view):
+            n = self.sock.recv_into(view)
+            if n == 0:
+                return False
+            view = view[n:]
+        return True
+
+    def receive(self) -> Block:
+        """Wait for the next block.
+
+        Raises:
+            InvalidFrame: Not a frame of a :class:`StreamServer`.
+            ConnectionError: Server closed the connection.
+
+        Returns:
+            Block: Samples, tagged with mode, gain and block index.
+        """
+        if not self._receive_into(memoryview(self._header)):
+            raise ConnectionError("Server closed the connection.")
+        magic, version, mode, gain, rate, n_samples, index = _FRAME.unpack(self._header)
+        if magic != FRAME_MAGIC:
+            raise InvalidFrame("bad magic {!r}".format(magic))
+        if version != FRAME_VERSION:
+            raise InvalidFrame("unsupported version {}".format(version))
+        raw = np.empty(n_samples, dtype=np.uint16)
+        if not self._receive_into(memoryview(raw).cast("B")):
+            raise ConnectionError("Server closed the connection.")
+
+        if self._last_index is not None:
+            self.missed += index - self._last_index - 1
+        self._last_index = index
+        self.sample_rate = rate
+        return Block(raw, mode, PGAAmpRate.from_index(gain), index)
+
+    def __iter__(self) -> Iterator[Block]:
+        """Blocks until the server closes the connection."""
+        while True:
+            try:
+                yield self.receive()
+            except ConnectionError:
+                return
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self) -> "StreamClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
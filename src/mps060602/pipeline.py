@@ -0,0 +1,518 @@
+"""Dataflow pipelines of stages fed by a card.
+
+A :class:`Pipeline` reads a card with a
+:class:`~mps060602.streaming.ContinuousAcquisition` and pushes every block
+through a tree of :class:`Stage` objects::
+
+    pipeline = Pipeline(card, block_size=4096)
+    stats = statistics(window_blocks=10)
+    pipeline.then(stats).then(sink(print_stats))
+    pipeline.then(decimate(450000, 45)).then(sink(plot))
+    pipeline.run(seconds=10)
+
+A stage is a function of one item, a block at first; it returns the item
+for the next stages, or None to drop it. Stages run on workers, one thread
+or one process each, connected by bounded queues: a full queue blocks the
+worker feeding it, and the back pressure ends in the acquisition ring,
+whose overruns count the lost blocks.
+
+Chains of fusible stages with the same placement are fused into one
+worker, which calls them back to back. Fused stages hand items over
+directly, so a stage may reuse its output buffer (``reuses_output``), and
+blocks are processed in place in the acquisition ring; items are only
+copied where they enter a queue. The first fusible stages run on the worker
+taking blocks out of the ring.
+
+Every stage counts the items it took and gave and its busy time, and every
+worker input queue its depth, see :func:`Pipeline.stats`. The stage with
+the highest utilization is the bottleneck.
+
+Process stages need picklable functions unless processes are forked, and
+their state, statistics for instance, lives in the worker process.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from .block import Block
+from .calibration import Calibration
+from .core import MPS060602
+from .decimate import BlockDecimator
+from .errors import AcquisitionNotRunning, StageFailed
+from .stats import StreamingStats
+from .streaming import ContinuousAcquisition
+
+PLACEMENTS = ("thread", "process")
+
+# Counters of a stage, shared with worker processes.
+_IN, _OUT, _BUSY_NS, _MAX_DEPTH = range(4)
+
+
+class Stage:
+    """One step of a :class:`Pipeline`.
+
+    Args:
+        function (Callable): Maps an item to the next item, None to drop it.
+        name (str, optional): Name in statistics. Defaults to the function name.
+        placement (str, optional): ``"thread"`` or ``"process"``. Defaults to "thread".
+        fusible (bool, optional): May share a worker with adjacent stages. Defaults to True.
+        reuses_output (bool, optional): Returned items are overwritten by the
+        next call, they are copied before entering a queue. Defaults to False.
+        queue_size (int, optional): Items queued for the stage when it starts
+        a worker. Defaults to 8.
+    """
+
+    def __init__(
+        self,
+        function: Callable,
+        name: str = None,
+        placement: str = "thread",
+        fusible: bool = True,
+        reuses_output: bool = False,
+        queue_size: int = 8,
+    ) -> None:
+        if placement not in PLACEMENTS:
+            raise ValueError("Unknown placement {!r}.".format(placement))
+        self.function = function
+        self.name = name or getattr(function, "__name__", type(function).__name__)
+        self.placement = placement
+        self.fusible = fusible
+        self.reuses_output = reuses_output
+        self.queue_size = queue_size
+        self.downstream: List["Stage"] = []
+        self.upstream: Optional["Stage"] = None
+        self._counters = multiprocessing.RawArray("q", 4)
+
+    def then(self, stage: "Stage") -> "Stage":
+        """Feed the items of this stage to ``stage``, which is returned for chaining."""
+        if stage.upstream is not None:
+            raise ValueError("Stage {} is already connected.".format(stage.name))
+        stage.upstream = self
+        self.downstream.append(stage)
+        return stage
+
+    def __getstate__(self) -> dict:
+        # Workers only run their own stages, don't pickle the whole tree.
+        state = dict(self.__dict__)
+        state["downstream"], state["upstream"] = [], None
+        return state
+
+    def __repr__(self) -> str:
+        return "Stage({!r}, {})".format(self.name, self.placement)
+
+
+def _detach(item):
+    """Copy of an item whose buffers may be reused."""
+    if isinstance(item, (Block, np.ndarray)):
+        return item.copy()
+    if isinstance(item, dict):
+        return {k: _detach(v) for k, v in item.items()}
+    return item
+
+
+def _arrays(item) -> list:
+    if isinstance(item, Block):
+        return [item.raw]
+    if isinstance(item, np.ndarray):
+        return [item]
+    if isinstance(item, dict):
+        return [a for v in item.values() for a in _arrays(v)]
+    return []
+
+
+def _shares_memory(result, item) -> bool:
+    """Whether ``result`` may view the buffers of ``item``, e.g. ``block.channel(1)``."""
+    if result is item:
+        return True
+    inputs = _arrays(item)
+    return any(np.may_share_memory(a, b) for a in _arrays(result) for b in inputs)
+
+
+def _process(stages: List[Stage], item, borrowed: bool):
+    """Run fused stages on ``item``, returns the result and whether it is borrowed."""
+    for stage in stages:
+        counters = stage._counters
+        counters[_IN] += 1
+        start = time.perf_counter_ns()
+        result = stage.function(item)
+        counters[_BUSY_NS] += time.perf_counter_ns() - start
+        if result is None:
+            return None, False
+        counters[_OUT] += 1
+        borrowed = stage.reuses_output or (borrowed and _shares_memory(result, item))
+        item = result
+    return item, borrowed
+
+
+def _put(outputs, item, abort) -> bool:
+    """Put ``item`` in every output queue, waiting for room; False if aborted meanwhile."""
+    for q, counters in outputs:
+        while True:
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                if abort.is_set():
+                    return False
+        try:
+            counters[_MAX_DEPTH] = max(counters[_MAX_DEPTH], q.qsize())
+        except NotImplementedError:  # pragma: no cover, macOS multiprocessing queues
+            pass
+    return True
+
+
+def _run_worker(stages, inbox, outputs, abort, errors):
+    """Loop of a worker: process its inbox until the end of stream None."""
+    try:
+        while True:
+            try:
+                item = inbox.get(timeout=0.1)
+            except queue.Empty:
+                if abort.is_set():
+                    return
+                continue
+            if item is None:
+                _put(outputs, None, abort)
+                return
+            item, borrowed = _process(stages, item, False)
+            if item is not None and outputs:
+                if not _put(outputs, _detach(item) if borrowed else item, abort):
+                    return
+    except Exception as e:
+        abort.set()
+        errors.put(("+".join(s.name for s in stages), repr(e)))
+
+
+@dataclass
+class StageStats:
+    """Counters of a stage, see :func:`Pipeline.stats`.
+
+    Attributes:
+        name (str): Stage name.
+        worker (str): Name of the worker the stage runs on, fused stages share one.
+        placement (str): ``"thread"`` or ``"process"``.
+        items_in (int): Items given to the stage.
+        items_out (int): Items the stage passed on.
+        busy_seconds (float): Time spent in the stage function.
+        elapsed (float): Seconds since the pipeline started.
+        queue_depth (int): Items waiting for the worker, for the first stage of a worker.
+        max_queue_depth (int): Largest ``queue_depth`` seen.
+    """
+
+    name: str
+    worker: str
+    placement: str
+    items_in: int
+    items_out: int
+    busy_seconds: float
+    elapsed: float
+    queue_depth: int
+    max_queue_depth: int
+
+    @property
+    def throughput(self) -> float:
+        """float: Items taken per second."""
+        return self.items_in / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def utilization(self) -> float:
+        """float: Fraction of the time spent in the stage, near 1 for a bottleneck."""
+        return self.busy_seconds / self.elapsed if self.elapsed else 0.0
+
+
+class _Worker:
+    def __init__(self, stages: List[Stage]) -> None:
+        self.stages = stages
+        self.name = "+".join(s.name for s in stages)
+        self.inbox = None
+        self.outputs = []
+        self.runner = None
+
+
+class Pipeline:
+    """Tree of stages fed with the blocks of a card, see module documentation.
+
+    The blocks given to the first stages are views of the acquisition ring,
+    tagged with mode, gain, index and timestamp.
+
+    Args:
+        card (MPS060602): Configured card. Started on :func:`start` if it isn't.
+        block_size (int, optional): Samples per block. Defaults to 4096.
+        n_blocks (int, optional): Number of blocks in the acquisition ring. Defaults to 32.
+        context (optional): :mod:`multiprocessing` context of process stages.
+        Defaults to None, the default context.
+    """
+
+    def __init__(self, card: MPS060602, block_size: int = 4096, n_blocks: int = 32, context=None) -> None:
+        self.card = card
+        self.acquisition = ContinuousAcquisition(card, block_size, n_blocks)
+        self.source = Stage(lambda block: block, "source", reuses_output=True)
+        self._context = context or multiprocessing.get_context()
+        self._workers: List[_Worker] = []
+        self._threads = []
+        self._abort = None
+        self._errors = None
+        self._running = False
+        self._start_time = None
+        self._stop_time = None
+
+    def then(self, stage: Stage) -> Stage:
+        """Feed the blocks of the card to ``stage``, which is returned for chaining."""
+        return self.source.then(stage)
+
+    @property
+    def overruns(self) -> int:
+        """int: Blocks lost because the pipeline didn't keep up."""
+        return self.acquisition.overruns
+
+    def _plan(self) -> List[_Worker]:
+        """Split the tree into workers, fusing chains of fusible stages."""
+        workers = []
+
+        def visit(head: Stage, upstream: Optional[_Worker]):
+            stages = [head]
+            while len(stages[-1].downstream) == 1:
+                last, following = stages[-1], stages[-1].downstream[0]
+                if not (last.fusible and following.fusible and last.placement == following.placement):
+                    break
+                stages.append(following)
+            worker = _Worker(stages)
+            workers.append(worker)
+            if upstream is not None:
+                process = head.placement == "process" or upstream.stages[0].placement == "process"
+                worker.inbox = self._context.Queue(head.queue_size) if process else queue.Queue(head.queue_size)
+                upstream.outputs.append((worker.inbox, head._counters))
+            for stage in stages[-1].downstream:
+                visit(stage, worker)
+
+        visit(self.source, None)
+        return workers
+
+    def start(self):
+        """Start the workers, then the acquisition."""
+        if self._running:
+            return
+        for stage in self._stages():
+            stage._counters[:] = [0, 0, 0, 0]
+        self._workers = self._plan()
+        self._abort = self._context.Event()
+        self._errors = self._context.Queue()
+        for worker in self._workers[1:]:
+            args = (worker.stages, worker.inbox, worker.outputs, self._abort, self._errors)
+            if worker.stages[0].placement == "process":
+                worker.runner = self._context.Process(target=_run_worker, args=args, name=worker.name, daemon=True)
+            else:
+                worker.runner = threading.Thread(target=_run_worker, args=args, name=worker.name, daemon=True)
+            worker.runner.start()
+        self._running = True
+        self._start_time = time.perf_counter()
+        self._stop_time = None
+        self.acquisition.start()
+        self._workers[0].runner = threading.Thread(
+            target=self._run_source, name="mps060602-pipeline-source", daemon=True
+        )
+        self._workers[0].runner.start()
+
+    def _run_source(self):
+        worker = self._workers[0]
+        try:
+            while self._running and not self._abort.is_set():
+                try:
+                    block = self.acquisition.get(timeout=0.1)
+                except TimeoutError:
+                    continue
+                except AcquisitionNotRunning as e:
+                    raise e.__cause__ or e
+                item, borrowed = _process(worker.stages, block, True)
+                if item is not None and worker.outputs:
+                    if not _put(worker.outputs, _detach(item) if borrowed else item, self._abort):
+                        break
+            self.acquisition.release()
+            _put(worker.outputs, None, self._abort)
+        except Exception as e:
+            self._abort.set()
+            self._errors.put((worker.name, repr(e)))
+
+    def _stages(self) -> List[Stage]:
+        stages, pending = [], [self.source]
+        while pending:
+            stage = pending.pop()
+            stages.append(stage)
+            pending.extend(stage.downstream)
+        return stages
+
+    @property
+    def running(self) -> bool:
+        """bool: Started, and no stage failed."""
+        return self._running and self._abort is not None and not self._abort.is_set()
+
+    def stop(self):
+        """Stop acquiring, let the workers drain their queues and wait for them.
+
+        Raises:
+            StageFailed: A stage raised, the first failure is reported.
+        """
+        if not self._running:
+            return
+        self._running = False
+        for worker in self._workers:
+            worker.runner.join()
+        self.acquisition.stop()
+        self._stop_time = time.perf_counter()
+        # Only failures abort.
+        if self._abort.is_set():
+            name, reason = self._errors.get(timeout=1)
+            raise StageFailed(name, reason)
+
+    close = stop
+
+    def run(self, seconds: float = None, blocks: int = None):
+        """Start, process ``seconds`` of data or ``blocks`` blocks, whichever comes first, and stop.
+
+        Raises:
+            StageFailed: A stage raised.
+        """
+        self.start()
+        deadline = None if seconds is None else time.perf_counter() + seconds
+        try:
+            while self.running:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                if blocks is not None and self.source._counters[_IN] >= blocks:
+                    break
+                time.sleep(0.001)
+        finally:
+            self.stop()
+
+    def stats(self) -> List[StageStats]:
+        """Counters of every stage, source first, in pipeline order."""
+        end = self._stop_time or time.perf_counter()
+        elapsed = end - self._start_time if self._start_time is not None else 0.0
+        result = []
+        for worker in self._workers:
+            for i, stage in enumerate(worker.stages):
+                counters = stage._counters
+                depth = 0
+                if i == 0:
+                    try:
+                        depth = self.acquisition.pending if worker.inbox is None else worker.inbox.qsize()
+                    except NotImplementedError:  # pragma: no cover
+                        depth = -1
+                result.append(
+                    StageStats(
+                        stage.name,
+                        worker.name,
+                        stage.placement,
+                        counters[_IN],
+                        counters[_OUT],
+                        counters[_BUSY_NS] / 1e9,
+                        elapsed,
+                        depth,
+                        counters[_MAX_DEPTH],
+                    )
+                )
+        return result
+
+    def bottleneck(self) -> StageStats:
+        """Statistics of the most utilized stage."""
+        return max(self.stats(), key=lambda s: s.utilization)
+
+    def __enter__(self) -> "Pipeline":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+# ---- Stages ----
+
+
+class _Volts:
+    def __init__(self, channel: Optional[int], dtype, calibration: Optional[Calibration]) -> None:
+        self.channel = channel
+        self.dtype = dtype
+        self.calibration = calibration
+        self._out = np.empty(0, dtype=dtype)
+
+    def __call__(self, block: Block) -> np.ndarray:
+        n = len(block) if self.channel is None else len(block.channel(self.channel))
+        if len(self._out) < n:
+            self._out = np.empty(n, dtype=self.dtype)
+        out = self._out[:n]
+        if self.calibration is not None:
+            return self.calibration.volts(block, self.channel, self.dtype, out)
+        return block.volts(self.channel, self.dtype, out)
+
+
+def convert(channel: int = None, dtype=np.float64, calibration: Calibration = None, **kwargs) -> Stage:
+    """Stage converting blocks to volts, into a buffer reused from block to block.
+
+    Args:
+        channel (int, optional): 1 or 2, None for all values. Defaults to None.
+        dtype (optional): Output float dtype. Defaults to np.float64.
+        calibration (Calibration, optional): Convert with its tables. Defaults to None,
+        the calibration carried by the blocks.
+        **kwargs: Passed to :class:`Stage`.
+    """
+    kwargs.setdefault("name", "convert")
+    return Stage(_Volts(channel, dtype, calibration), reuses_output=True, **kwargs)
+
+
+def select(predicate: Callable, **kwargs) -> Stage:
+    """Stage passing on the items for which ``predicate`` is true."""
+    kwargs.setdefault("name", "select")
+    return Stage(lambda item: item if predicate(item) else None, **kwargs)
+
+
+def decimate(sample_rate: int, factor: int, decimator_kwargs: dict = None, **kwargs) -> Stage:
+    """Stage low-pass filtering and decimating blocks, see :class:`~mps060602.decimate.BlockDecimator`.
+
+    Items are dicts of volts per channel. Not fused by default, filtering
+    being heavy enough for a worker of its own.
+
+    Args:
+        sample_rate (int): Frames per second of the blocks.
+        factor (int): Decimation factor.
+        decimator_kwargs (dict, optional): Passed to :class:`~mps060602.decimate.BlockDecimator`,
+        e.g. ``passband``. Defaults to None.
+        **kwargs: Passed to :class:`Stage`.
+    """
+    kwargs.setdefault("name", "decimate")
+    kwargs.setdefault("fusible", False)
+    decimator = BlockDecimator(sample_rate, factor, **(decimator_kwargs or {}))
+    return Stage(decimator.process, **kwargs)
+
+
+def statistics(window_blocks: int = None, **kwargs) -> Stage:
+    """Stage updating a :class:`~mps060602.stats.StreamingStats` with blocks or volts.
+
+    Items are passed on unchanged. The statistics are the ``stats``
+    attribute of the stage, meaningful for thread placement only.
+    """
+    kwargs.setdefault("name", "statistics")
+    stats = StreamingStats(window_blocks)
+
+    def update(item):
+        stats.update(item)
+        return item
+
+    stage = Stage(update, **kwargs)
+    stage.stats = stats
+    return stage
+
+
+def sink(function: Callable, **kwargs) -> Stage:
+    """Stage ending a branch: ``function`` is called with every item."""
+    kwargs.setdefault("name", getattr(function, "__name__", "sink"))
+
+    def consume(item):
+        function(item)
+
+    return Stage(consume, **kwargs)
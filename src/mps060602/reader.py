@@ -0,0 +1,213 @@
+import math
+import os
+
+import numpy as np
+
+from . import codec as _codec
+from .block import Block
+from .fileformat import HEADER_SIZE, RecordingHeader, read_gaps, read_header
+
+
+class Recording:
+    """Memory-mapped access to a recording written by :class:`~mps060602.recorder.Recorder`.
+
+    Nothing is read until a slice is accessed, and slices are numpy views of
+    the mapping. Conversion to volt is only done by :func:`volts`, for the
+    requested slice only, with the gain stored in the header.
+
+    Times are seconds since the first sample of the recording. Frames lost
+    while recording, listed in the gap index of the file, take their time,
+    so a time slice across a gap holds fewer frames, see :attr:`gaps`.
+
+    Compressed recordings are mapped too, and indexed by chunk on opening: a
+    slice only decodes the chunks it overlaps, see :func:`read_frames`. For
+    them, :attr:`raw` and :attr:`frames` decode the whole recording on first
+    access.
+
+    Args:
+        path: Recording file.
+    """
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.header: RecordingHeader = read_header(path)
+        width = self.header.frame_width
+        self._raw = None
+        self._chunk_offsets = self._chunk_frames = None
+        self._cached_chunk = (None, None)
+        gaps = np.array(read_gaps(path, self.header), dtype=np.int64).reshape(-1, 2)
+        self.gaps = gaps
+        """np.ndarray: ``(n, 2)`` rows of frame position in the file and frames missing there."""
+        # Frames missing before each gap, and in total.
+        self._missing = np.concatenate(([0], np.cumsum(gaps[:, 1])))
+        # Position of each gap in acquired frames, gaps included.
+        self._gap_starts = gaps[:, 0] + self._missing[:-1]
+        if self.header.codec != _codec.CODEC_RAW:
+            self._index_chunks()
+            return
+        count = self.header.sample_count
+        if not count:
+            # Not closed properly, trust the file size.
+            count = (os.path.getsize(path) - HEADER_SIZE) // 2
+        count -= count % width
+        if count:
+            self._raw = np.memmap(path, dtype=np.uint16, mode="r", offset=HEADER_SIZE, shape=(count,))
+        else:
+            self._raw = np.empty(0, dtype=np.uint16)
+
+    def _index_chunks(self):
+        size = self.header.data_size or os.path.getsize(self.path) - HEADER_SIZE
+        if size > 0:
+            self._data = np.memmap(self.path, dtype=np.uint8, mode="r", offset=HEADER_SIZE, shape=(size,))
+        else:
+            self._data = np.empty(0, dtype=np.uint8)
+        # A chunk cut short by a crash is left out.
+        chunks = list(_codec.iter_chunks(self._data))
+        self._chunk_offsets = np.array([offset for offset, _ in chunks], dtype=np.int64)
+        # Frame index of the start of every chunk, and of the end.
+        self._chunk_frames = np.concatenate(([0], np.cumsum([n for _, n in chunks], dtype=np.int64)))
+
+    @property
+    def raw(self) -> np.ndarray:
+        """np.ndarray: All values, interleaved in ``in1_and_2`` mode."""
+        if self._raw is None and self._chunk_offsets is not None:
+            self._raw = self.read_frames(0, len(self)).reshape(-1)
+            self._chunk_offsets = None
+        return self._raw
+
+    @property
+    def frames(self) -> np.ndarray:
+        """np.ndarray: ``(n_frames, frame_width)`` view, one row per sample instant."""
+        raw = self.raw
+        return None if raw is None else raw.reshape(-1, self.header.frame_width)
+
+    def read_frames(self, first: int, stop: int) -> np.ndarray:
+        """Frames ``first`` to ``stop``, a view of the mapping, decoded if compressed.
+
+        Returns:
+            np.ndarray: ``(stop - first, frame_width)`` uint16 array.
+        """
+        if self._chunk_offsets is None:
+            return self.frames[first:stop]
+        bounds = self._chunk_frames
+        first, stop = max(first, 0), min(stop, int(bounds[-1]))
+        out = np.empty((max(stop - first, 0), self.header.frame_width), dtype=np.uint16)
+        if stop <= first:
+            return out
+        c = int(np.searchsorted(bounds, first, side="right")) - 1
+        while c < len(self._chunk_offsets) and bounds[c] < stop:
+            chunk = self._chunk(c)
+            lo, hi = max(first, int(bounds[c])), min(stop, int(bounds[c + 1]))
+            out[lo - first:hi - first] = chunk[lo - bounds[c]:hi - bounds[c]]
+            c += 1
+        return out
+
+    def _chunk(self, c: int) -> np.ndarray:
+        # Sequential reads in small slices decode every chunk once.
+        index, frames = self._cached_chunk
+        if index != c:
+            raw = _codec.decode(self._data, int(self._chunk_offsets[c]))
+            frames = raw.reshape(-1, self.header.frame_width)
+            self._cached_chunk = (c, frames)
+        return frames
+
+    @property
+    def sample_rate(self) -> int:
+        return self.header.sample_rate
+
+    def __len__(self) -> int:
+        """Number of sample instants."""
+        if self._raw is None and self._chunk_offsets is not None:
+            return int(self._chunk_frames[-1])
+        return len(self._raw) // self.header.frame_width
+
+    @property
+    def duration(self) -> float:
+        """float: Recorded seconds, gaps included."""
+        return self.acquired_frames / self.sample_rate
+
+    def frame_range(self, start: float = None, stop: float = None) -> slice:
+        """Frames between two times, ``start`` inclusive and ``stop`` exclusive.
+
+        Args:
+            start (float, optional): Seconds since recording start. Defaults to None, the beginning.
+            stop (float, optional): Seconds since recording start. Defaults to None, the end.
+
+        Returns:
+            slice: Slice of frame indices, clipped to the recording.
+        """
+        n = len(self)
+        first = 0 if start is None else min(max(self._first_frame_at(start), 0), n)
+        last = n if stop is None else min(max(self._first_frame_at(stop), first), n)
+        return slice(first, last)
+
+    def _first_frame_at(self, t: float) -> int:
+        # Tolerate float error, 0.3 * 1000 is 300.00000000000006.
+        return self.frame_position(math.ceil(round(t * self.sample_rate, 6)))
+
+    def frame_position(self, acquired: int) -> int:
+        """Position in the file of the frame acquired ``acquired`` frames after the start.
+
+        A lost frame maps to the frame after its gap. Inverse of :func:`acquired_index`.
+        """
+        missing = np.clip(acquired - self._gap_starts, 0, self.gaps[:, 1]).sum()
+        return acquired - int(missing)
+
+    @property
+    def acquired_frames(self) -> int:
+        """int: Frames spanned by the recording, lost frames included."""
+        return len(self) + int(self._missing[-1])
+
+    def acquired_index(self, frames) -> np.ndarray:
+        """Index of frames since the recording started, counting lost frames.
+
+        Args:
+            frames: Frame positions in the file, int or array.
+        """
+        frames = np.asarray(frames, dtype=np.int64)
+        return frames + self._missing[np.searchsorted(self.gaps[:, 0], frames, side="right")]
+
+    def block(self, start: float = None, stop: float = None) -> Block:
+        """Samples between two times as a :class:`~mps060602.block.Block` viewing the mapping."""
+        frames = self.frame_range(start, stop)
+        frames = self.read_frames(frames.start, frames.stop)
+        return Block(frames.reshape(-1), self.header.channel_mode, self.header.gain)
+
+    def samples(self, start: float = None, stop: float = None, channel: int = None) -> np.ndarray:
+        """Raw samples between two times, a view of the mapping.
+
+        Args:
+            start (float, optional): Seconds since recording start. Defaults to None.
+            stop (float, optional): Seconds since recording start. Defaults to None.
+            channel (int, optional): 1 or 2, None for all values, interleaved in
+            ``in1_and_2`` mode. Defaults to None.
+
+        Raises:
+            ChannelNotAcquired: ``channel`` was not recorded.
+
+        Returns:
+            np.ndarray: uint16 view.
+        """
+        block = self.block(start, stop)
+        return block.raw if channel is None else block.channel(channel)
+
+    def volts(self, start: float = None, stop: float = None, channel: int = None, dtype=np.float64) -> np.ndarray:
+        """Like :func:`samples`, converted to volt. Only the slice is read and converted."""
+        return self.block(start, stop).volts(channel, dtype)
+
+    def times(self, start: float = None, stop: float = None) -> np.ndarray:
+        """Time of each frame between two times, in seconds since recording start."""
+        frames = self.frame_range(start, stop)
+        return self.acquired_index(np.arange(frames.start, frames.stop)) / self.sample_rate
+
+    def close(self):
+        """Drop the mapping, it is unmapped once no view of it is left."""
+        self._raw = self._data = None
+        self._chunk_offsets = self._chunk_frames = None
+        self._cached_chunk = (None, None)
+
+    def __enter__(self) -> "Recording":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,261 @@
+import threading
+import time
+from queue import Empty, Queue
+
+import numpy as np
+
+from . import codec as _codec
+from .buffers import BufferPool
+from .core import ADChannelMode, MPS060602, MPS060602Para
+from .fileformat import RecordingHeader, pack_gaps
+from .streaming import ContinuousAcquisition
+
+_WRITE_BUFFER_SIZE = 1 << 22
+
+
+class Recorder:
+    """Write raw uint16 blocks to a recording file on a background thread.
+
+    :func:`write` only copies the block into a pooled buffer and queues it, it
+    never waits for the disk. If the disk falls so far behind that the queue
+    is full, the block is dropped and counted in :attr:`dropped`, the
+    acquisition is never stalled. Dropped frames, and frames lost upstream
+    and reported with :func:`skip`, are listed in the gap index of the file,
+    so readers keep the time of later samples right.
+
+    With ``codec=CODEC_DELTA`` the writer thread compresses the samples
+    losslessly in chunks of ``chunk_size`` values, see :mod:`mps060602.codec`.
+
+    Args:
+        path: Destination file, overwritten.
+        para (MPS060602Para): Parameters of the card, stored in the header.
+        device_number (int, optional): Device number, stored in the header. Defaults to 0.
+        block_size (int, optional): Largest block passed to :func:`write`,
+        larger ones are split. Defaults to 65536.
+        queue_blocks (int, optional): Blocks buffered for the writer thread. Defaults to 64.
+        start_time (float, optional): Unix time of the first sample. Defaults to None, now.
+        first_sample (int, optional): Index of the first sample since the card started. Defaults to 0.
+        codec (int, optional): ``CODEC_RAW`` or ``CODEC_DELTA``. Defaults to CODEC_RAW.
+        chunk_size (int, optional): Values per compressed chunk. Defaults to 65536.
+    """
+
+    def __init__(
+        self,
+        path,
+        para: MPS060602Para,
+        device_number: int = 0,
+        block_size: int = 65536,
+        queue_blocks: int = 64,
+        start_time: float = None,
+        first_sample: int = 0,
+        codec: int = _codec.CODEC_RAW,
+        chunk_size: int = 65536,
+    ) -> None:
+        if codec not in (_codec.CODEC_RAW, _codec.CODEC_DELTA):
+            raise ValueError("Unknown codec {}.".format(codec))
+        self.path = path
+        self.header = RecordingHeader.from_para(
+            para,
+            device_number,
+            start_time=time.time() if start_time is None else start_time,
+            first_sample=first_sample,
+            codec=codec,
+        )
+        self.samples_written = 0
+        """int: Values written to disk so far."""
+        self.bytes_written = 0
+        """int: Bytes of samples written to disk so far, compressed or not."""
+        self.dropped = 0
+        """int: Values dropped because the writer queue was full."""
+        self.gaps = []
+        """List[List[int]]: ``[position, missing]`` frames lost, position counting frames in the file."""
+        self._values_accepted = 0
+
+        self._pool = BufferPool(block_size, queue_blocks)
+        width = self.header.frame_width
+        self._chunk = np.empty(max(chunk_size - chunk_size % width, width), dtype=np.uint16)
+        self._chunk_fill = 0
+        self._queue = Queue()
+        self._file = open(path, "wb", buffering=_WRITE_BUFFER_SIZE)
+        self._file.write(self.header.pack())
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="mps060602-recorder", daemon=True)
+        self._thread.start()
+
+    @property
+    def samples_queued(self) -> int:
+        """int: Values waiting for the writer thread."""
+        return (self._pool.count - self._pool.available()) * self._pool.block_size
+
+    def write(self, block) -> bool:
+        """Queue a block for writing.
+
+        Args:
+            block: :class:`~mps060602.block.Block`, uint16 array or anything
+            :func:`numpy.asarray` turns into one.
+
+        Raises:
+            Exception: The writer thread failed earlier, with this error.
+
+        Returns:
+            bool: False if (part of) the block was dropped.
+        """
+        if self._error is not None:
+            raise self._error
+        data = np.asarray(block, dtype=np.uint16).reshape(-1)
+        block_size = self._pool.block_size
+        for start in range(0, len(data), block_size):
+            piece = data[start:start + block_size]
+            try:
+                buffer = self._pool.acquire(block=False)
+            except Empty:
+                self.dropped += len(data) - start
+                self.skip((len(data) - start) // self.header.frame_width)
+                return False
+            buffer.array[: len(piece)] = piece
+            self._queue.put_nowait((buffer, len(piece)))
+            self._values_accepted += len(piece)
+        return True
+
+    def skip(self, frames: int):
+        """Note that ``frames`` were lost before the next :func:`write`, e.g. in a ring overrun."""
+        if frames <= 0:
+            return
+        position = self._values_accepted // self.header.frame_width
+        if self.gaps and self.gaps[-1][0] == position:
+            self.gaps[-1][1] += frames
+        else:
+            self.gaps.append([position, frames])
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            buffer, length = item
+            try:
+                if self._error is None:
+                    self._write_samples(buffer.array[:length])
+            except Exception as e:
+                self._error = e
+            finally:
+                buffer.release()
+
+    def _write_samples(self, values: np.ndarray):
+        if self.header.codec == _codec.CODEC_RAW:
+            self._file.write(memoryview(values))
+            self.samples_written += len(values)
+            self.bytes_written += values.nbytes
+            return
+        chunk = self._chunk
+        while len(values):
+            n = min(len(values), len(chunk) - self._chunk_fill)
+            chunk[self._chunk_fill:self._chunk_fill + n] = values[:n]
+            self._chunk_fill += n
+            values = values[n:]
+            if self._chunk_fill == len(chunk):
+                self._write_chunk()
+
+    def _write_chunk(self):
+        # A partial frame can only be left at the very end, it is dropped.
+        n = self._chunk_fill - self._chunk_fill % self.header.frame_width
+        self.dropped += self._chunk_fill - n
+        self._chunk_fill = 0
+        if n:
+            data = _codec.encode(self._chunk[:n], self.header.frame_width)
+            self._file.write(data)
+            self.samples_written += n
+            self.bytes_written += len(data)
+
+    def close(self):
+        """Flush queued blocks, store the final sample count in the header and close the file."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        try:
+            if self._chunk_fill and self._error is None:
+                self._write_chunk()
+            self.header.sample_count = self.samples_written
+            self.header.data_size = self.bytes_written
+            self.header.gap_count = len(self.gaps)
+            self._file.write(pack_gaps(self.gaps))
+            self._file.seek(0)
+            self._file.write(self.header.pack())
+        except Exception as e:
+            if self._error is None:
+                self._error = e
+        finally:
+            self._file.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def record(
+    card: MPS060602,
+    path,
+    seconds: float,
+    block_size: int = 16384,
+    n_blocks: int = 64,
+    codec: int = _codec.CODEC_RAW,
+) -> Recorder:
+    """Record ``seconds`` of data from ``card`` into ``path``.
+
+    Acquisition, the consumer loop and disk writes run on three different
+    threads, see :class:`~mps060602.streaming.ContinuousAcquisition` and
+    :class:`Recorder`. Blocks lost in ring overruns are recorded as gaps.
+
+    Args:
+        card (MPS060602): Configured card.
+        path: Destination file.
+        seconds (float): Duration.
+        block_size (int, optional): Samples per read. Defaults to 16384.
+        n_blocks (int, optional): Blocks in acquisition ring and writer queue. Defaults to 64.
+        codec (int, optional): Codec of the samples, see :class:`Recorder`. Defaults to CODEC_RAW.
+
+    Returns:
+        Recorder: The closed recorder, with its counters.
+    """
+    para = card.state.parameter
+    frame_width = 2 if para.ADChannel == ADChannelMode.in1_and_2 else 1
+    total = int(seconds * para.ADSampleRate) * frame_width
+    acquisition = ContinuousAcquisition(card, block_size, n_blocks)
+    recorder = Recorder(path, para, card.device.number, block_size, n_blocks, codec=codec)
+    with recorder, acquisition:
+        record_blocks(acquisition, recorder, total, frame_width)
+    return recorder
+
+
+def record_blocks(acquisition: ContinuousAcquisition, target, total: int, frame_width: int):
+    """Write the next ``total`` values of a running ``acquisition`` to ``target``.
+
+    Blocks lost in ring overruns, seen as jumps of
+    :attr:`Block.index <mps060602.block.Block.index>`, are reported with
+    ``target.skip``.
+
+    Args:
+        acquisition (ContinuousAcquisition): Started acquisition.
+        target: :class:`Recorder` or :class:`~mps060602.store.SegmentedStore`,
+        anything with ``write(values)`` and ``skip(frames)``.
+        total (int): Values to write, whole frames.
+        frame_width (int): Values per frame.
+    """
+    received = 0
+    expected = None
+    while received < total:
+        block = acquisition.get()
+        if expected is not None and block.index > expected:
+            lost = (block.index - expected) * len(block.raw)
+            target.skip(min(lost, total - received) // frame_width)
+            received += lost
+        expected = block.index + 1
+        block_data = block.raw[: max(total - received, 0)]
+        target.write(block_data)
+        received += len(block_data)
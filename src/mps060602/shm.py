@@ -0,0 +1,298 @@
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .block import Block
+from .core import MPS060602, PGAAmpRate
+from .errors import AcquisitionNotRunning
+
+# Header, int64 words.
+_MAGIC = 0x4D50533036303652  # "MPS0606R"
+_H_MAGIC, _H_BLOCK_SIZE, _H_N_BLOCKS, _H_WRITE_SEQ, _H_RUNNING, _H_DEVICE = range(6)
+_HEADER_WORDS = 8
+# Slot metadata, int64 words per slot, the timestamp is a float64.
+_M_SEQ, _M_MODE, _M_GAIN, _M_TIME = range(4)
+_META_WORDS = 4
+
+
+def _layout(block_size: int, n_blocks: int):
+    meta_offset = _HEADER_WORDS * 8
+    data_offset = meta_offset + n_blocks * _META_WORDS * 8
+    data_offset += -data_offset % 64
+    return meta_offset, data_offset, data_offset + n_blocks * block_size * 2
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the segment with the
+        # resource tracker, which would unlink it when this process exits.
+        from multiprocessing import resource_tracker
+
+        memory = shared_memory.SharedMemory(name)
+        resource_tracker.unregister(memory._name, "shared_memory")
+        return memory
+
+
+class _SharedRing:
+    def __init__(self, memory: shared_memory.SharedMemory, block_size: int, n_blocks: int) -> None:
+        self.memory = memory
+        meta_offset, data_offset, _ = _layout(block_size, n_blocks)
+        buf = memory.buf
+        self.header = np.ndarray((_HEADER_WORDS,), np.int64, buf)
+        self.meta = np.ndarray((n_blocks, _META_WORDS), np.int64, buf, meta_offset)
+        self.times = self.meta.view(np.float64)[:, _M_TIME]
+        self.data = np.ndarray((n_blocks, block_size), np.uint16, buf, data_offset)
+
+    def release(self):
+        # Views have to go before the mapping can be closed.
+        del self.header, self.meta, self.times, self.data
+        self.memory.close()
+
+
+class SharedMemoryProducer:
+    """Read a card into a ring in shared memory, for consumers in other processes.
+
+    A card can only be opened by one process. The producer owns it and
+    broadcasts every block to any number of :class:`SharedMemoryConsumer`,
+    attached by :attr:`name`, which read the blocks in place.
+
+    The producer never waits for consumers, a slow consumer can't stall the
+    acquisition: it's lapped instead, and detects it, see
+    :attr:`SharedMemoryConsumer.overruns`. Every slot carries the sequence
+    number of its block, the write sequence is published after the data.
+
+    Args:
+        card (MPS060602): Configured card. Started on :func:`start` if it isn't.
+        name (str, optional): Shared memory name. Defaults to None, generated.
+        block_size (int, optional): Samples per block. Defaults to 4096.
+        n_blocks (int, optional): Number of blocks in ring. Defaults to 64.
+    """
+
+    def __init__(self, card: MPS060602, name: str = None, block_size: int = 4096, n_blocks: int = 64) -> None:
+        self.card = card
+        self.block_size = block_size
+        self.n_blocks = n_blocks
+        memory = shared_memory.SharedMemory(name, create=True, size=_layout(block_size, n_blocks)[2])
+        self._ring = _SharedRing(memory, block_size, n_blocks)
+        header = self._ring.header
+        header[:] = 0
+        header[_H_BLOCK_SIZE] = block_size
+        header[_H_N_BLOCKS] = n_blocks
+        header[_H_DEVICE] = card.device.number
+        self._ring.meta[:, _M_SEQ] = -1
+        header[_H_MAGIC] = _MAGIC
+
+        self._running = False
+        self._started_card = False
+        self._thread = None
+        self.error = None
+        """Exception: Error that stopped the acquisition thread, if any."""
+
+    @property
+    def name(self) -> str:
+        """str: Name consumers attach to."""
+        return self._ring.memory.name
+
+    @property
+    def blocks_acquired(self) -> int:
+        """int: Blocks published so far."""
+        return int(self._ring.header[_H_WRITE_SEQ])
+
+    def start(self):
+        """Start the card if necessary, then the acquisition thread."""
+        if self._running:
+            return
+        if not self.card.state.started:
+            self.card.start()
+            self._started_card = True
+        self.error = None
+        self._running = True
+        self._ring.header[_H_RUNNING] = 1
+        self._thread = threading.Thread(
+            target=self._run,
+            name="mps060602-shm-{}".format(self.card.device.number),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the acquisition thread, suspend card if it was started here."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._ring.header[_H_RUNNING] = 0
+        if self._started_card:
+            self.card.suspend()
+            self._started_card = False
+
+    def _run(self):
+        header, meta, times, data = self._ring.header, self._ring.meta, self._ring.times, self._ring.data
+        n_blocks = self.n_blocks
+        readinto = self.card.readinto
+        seq = int(header[_H_WRITE_SEQ])
+        try:
+            while self._running:
+                slot = seq % n_blocks
+                readinto(data[slot])
+                para = self.card.state.parameter
+                meta[slot, _M_MODE] = para.ADChannel
+                meta[slot, _M_GAIN] = para.Gain.index
+                times[slot] = self.card.clock.last_block_time
+                meta[slot, _M_SEQ] = seq
+                seq += 1
+                header[_H_WRITE_SEQ] = seq
+        except Exception as e:
+            self.error = e
+            self._running = False
+            header[_H_RUNNING] = 0
+
+    def close(self):
+        """Stop, then remove the shared memory. Attached consumers keep their mapping."""
+        self.stop()
+        memory = self._ring.memory
+        self._ring.release()
+        memory.unlink()
+
+    def __enter__(self) -> "SharedMemoryProducer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SharedMemoryConsumer:
+    """Read the blocks of a :class:`SharedMemoryProducer`, from any process.
+
+    Each consumer keeps its own read position, consumers don't affect each
+    other or the producer. A consumer lapped by the producer skips to the
+    oldest block still in the ring and counts the missed blocks in
+    :attr:`overruns`; :attr:`lag` tells how close it is to being lapped.
+
+    Blocks are views into shared memory: the producer may overwrite one when
+    the consumer falls ``n_blocks`` behind, :func:`intact` tells whether the
+    current block was still untouched once processed.
+
+    Args:
+        name (str): :attr:`SharedMemoryProducer.name`.
+        start (str, optional): ``"latest"`` to start with the next block
+        published, ``"oldest"`` with the oldest one in the ring. Defaults to "latest".
+        poll_interval (float, optional): Seconds between checks while waiting. Defaults to 0.0005.
+    """
+
+    def __init__(self, name: str, start: str = "latest", poll_interval: float = 0.0005) -> None:
+        if start not in ("latest", "oldest"):
+            raise ValueError("Unknown start {!r}.".format(start))
+        memory = _attach(name)
+        header = np.ndarray((_HEADER_WORDS,), np.int64, memory.buf)
+        if header[_H_MAGIC] != _MAGIC:
+            del header
+            memory.close()
+            raise ValueError("{!r} isn't a sample ring.".format(name))
+        self.block_size = int(header[_H_BLOCK_SIZE])
+        self.n_blocks = int(header[_H_N_BLOCKS])
+        self.device_number = int(header[_H_DEVICE])
+        del header
+        self._ring = _SharedRing(memory, self.block_size, self.n_blocks)
+        self.poll_interval = poll_interval
+
+        write_seq = self._write_seq
+        self.read_seq = write_seq if start == "latest" else max(write_seq - self.n_blocks + 1, 0)
+        """int: Sequence number of the next block to read."""
+        self._held = None
+
+        self.overruns = 0
+        """int: Blocks missed because the producer lapped this consumer."""
+
+    @property
+    def _write_seq(self) -> int:
+        return int(self._ring.header[_H_WRITE_SEQ])
+
+    @property
+    def lag(self) -> int:
+        """int: Blocks published but not read yet, ``n_blocks - 1`` means about to be lapped."""
+        return self._write_seq - self.read_seq
+
+    def get(self, timeout: float = None) -> Block:
+        """Wait for the next block.
+
+        Args:
+            timeout (float, optional): Seconds to wait. Defaults to None.
+
+        Raises:
+            AcquisitionNotRunning: Producer stopped and every block was read.
+            TimeoutError: No block arrived within ``timeout``.
+
+        Returns:
+            Block: View into shared memory, valid until the next :func:`get`
+            or until lapped, see :func:`intact`. ``Block.index`` is the sequence number.
+        """
+        self.release()
+        header = self._ring.header
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            write_seq = int(header[_H_WRITE_SEQ])
+            if write_seq > self.read_seq:
+                break
+            if not header[_H_RUNNING]:
+                raise AcquisitionNotRunning(self.device_number)
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("No block within {} seconds.".format(timeout))
+            time.sleep(self.poll_interval)
+
+        # The slot of ``write_seq - n_blocks`` may be being rewritten already.
+        oldest = write_seq - self.n_blocks + 1
+        if self.read_seq < oldest:
+            self.overruns += oldest - self.read_seq
+            self.read_seq = oldest
+        seq = self.read_seq
+        slot = seq % self.n_blocks
+        meta = self._ring.meta[slot]
+        self._held = seq
+        return Block(
+            self._ring.data[slot],
+            int(meta[_M_MODE]),
+            PGAAmpRate.from_index(int(meta[_M_GAIN])),
+            seq,
+            float(self._ring.times[slot]),
+        )
+
+    def intact(self) -> bool:
+        """Whether the block returned by :func:`get` hasn't been overwritten yet.
+
+        Check it after processing a block in place, a False means the result
+        may mix two blocks and the consumer is too slow.
+        """
+        held = self._held
+        if held is None:
+            return False
+        return self._write_seq < held + self.n_blocks and self._ring.meta[held % self.n_blocks, _M_SEQ] == held
+
+    def release(self):
+        """Done with the block returned by :func:`get`."""
+        if self._held is not None:
+            self._held = None
+            self.read_seq += 1
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.get()
+            except AcquisitionNotRunning:
+                return
+
+    def close(self):
+        """Detach from the shared memory, blocks returned by :func:`get` must be dropped before."""
+        self._held = None
+        self._ring.release()
+
+    def __enter__(self) -> "SharedMemoryConsumer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,167 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Sequence
+
+import numpy as np
+
+from .backends import INVALID_HANDLE, Backend
+from .core import ADChannelMode, PGAAmpRate
+
+Signal = Callable[[np.ndarray], np.ndarray]
+"""Test signal, maps sample times in seconds to volts."""
+
+
+def sine(frequency: float, amplitude: float = 1.0, offset: float = 0.0, phase: float = 0.0) -> Signal:
+    """Sine wave test signal.
+
+    Args:
+        frequency (float): Frequency in Hz.
+        amplitude (float, optional): Peak volt. Defaults to 1.0.
+        offset (float, optional): DC offset in volt. Defaults to 0.0.
+        phase (float, optional): Phase in rad. Defaults to 0.0.
+    """
+    def signal(t):
+        return amplitude * np.sin(2 * np.pi * frequency * t + phase) + offset
+    return signal
+
+
+def noise(std: float, seed: int = 0) -> Signal:
+    """Gaussian white noise test signal.
+
+    Args:
+        std (float): Standard deviation in volt.
+        seed (int, optional): Random seed. Defaults to 0.
+    """
+    rng = np.random.default_rng(seed)
+
+    def signal(t):
+        return rng.normal(0.0, std, t.shape)
+    return signal
+
+
+def constant(volt: float) -> Signal:
+    """Constant test signal, e.g. a shorted input when ``volt`` is 0."""
+    def signal(t):
+        return np.full(t.shape, volt)
+    return signal
+
+
+def mix(*signals: Signal) -> Signal:
+    """Sum of several test signals."""
+    def signal(t):
+        return sum(s(t) for s in signals)
+    return signal
+
+
+def _to_raw(volt: np.ndarray, full_scale: float) -> np.ndarray:
+    """Inverse of :func:`~mps060602.core.to_volt_array`, clipped like the ADC."""
+    code = np.rint((1 - volt / full_scale) * 32768)
+    return np.clip(code, 0, 65535).astype(np.uint16)
+
+
+@dataclass
+class _SimulatedDevice:
+    number: int
+    mode: int = None
+    rate: int = None
+    gain: int = None
+    started: bool = False
+    start_time: float = 0.0
+    frames: int = 0
+
+
+class SimulatedBackend(Backend):
+    """Pure Python card, implements the DLL functions for tests and benchmarks.
+
+    ``MPS_DataIn`` returns samples of the configured test signals, sampled at
+    ``ADSampleRate`` since ``MPS_Start`` and quantized with the configured gain.
+    In ``in1_and_2`` mode the two channels are interleaved, each at full rate.
+
+    Args:
+        devices (Iterable[int], optional): Device numbers that can be opened. Defaults to (0,).
+        signals (Sequence[Signal], optional): Signals on ``In1`` and ``In2``.
+        Defaults to a 100 Hz, 1 V sine and a 250 Hz, 0.5 V sine.
+        paced (bool, optional): Block in ``MPS_DataIn`` until the requested samples
+        would have been acquired by a real card. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        devices: Iterable[int] = (0,),
+        signals: Sequence[Signal] = None,
+        paced: bool = True,
+    ) -> None:
+        self.devices = set(devices)
+        if signals is None:
+            signals = (sine(100, 1.0), sine(250, 0.5))
+        self.signals = tuple(signals)
+        self.paced = paced
+        self._opened: Dict[int, _SimulatedDevice] = {}
+
+    def MPS_OpenDevice(self, DeviceNumber: int) -> int:
+        if DeviceNumber not in self.devices:
+            return INVALID_HANDLE
+        if any(d.number == DeviceNumber for d in self._opened.values()):
+            return INVALID_HANDLE
+        handle = DeviceNumber + 1
+        self._opened[handle] = _SimulatedDevice(DeviceNumber)
+        return handle
+
+    def MPS_Configure(self, ADChannel: int, ADSampleRate: int, Gain: int, DeviceHandle) -> int:
+        device = self._opened.get(DeviceHandle)
+        if device is None or ADChannel == ADChannelMode.forbid:
+            return 0
+        device.mode, device.rate, device.gain = ADChannel, ADSampleRate, Gain
+        return 1
+
+    def MPS_Start(self, DeviceHandle) -> int:
+        device = self._opened.get(DeviceHandle)
+        if device is None or device.rate is None:
+            return 0
+        if not device.started:
+            device.started = True
+            device.start_time = time.perf_counter()
+            device.frames = 0
+        return 1
+
+    def MPS_DataIn(self, DataBuffer, SampleNumber: int, DeviceHandle) -> int:
+        device = self._opened.get(DeviceHandle)
+        if device is None or not device.started:
+            return 0
+        interleaved = device.mode == ADChannelMode.in1_and_2
+        frames = -(-SampleNumber // 2) if interleaved else SampleNumber
+
+        if self.paced:
+            ready_at = device.start_time + (device.frames + frames) / device.rate
+            delay = ready_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        t = (device.frames + np.arange(frames)) / device.rate
+        device.frames += frames
+        full_scale = PGAAmpRate.from_index(device.gain).full_scale
+        out = np.frombuffer(DataBuffer, dtype=np.uint16, count=SampleNumber)
+        if interleaved:
+            pair = np.empty(frames * 2, dtype=np.uint16)
+            pair[0::2] = _to_raw(self.signals[0](t), full_scale)
+            pair[1::2] = _to_raw(self.signals[1](t), full_scale)
+            out[:] = pair[:SampleNumber]
+        elif device.mode == ADChannelMode.in1:
+            out[:] = _to_raw(self.signals[0](t), full_scale)
+        elif device.mode == ADChannelMode.in2:
+            out[:] = _to_raw(self.signals[1](t), full_scale)
+        else:
+            out[:] = _to_raw(self.signals[0](t) - self.signals[1](t), full_scale)
+        return 1
+
+    def MPS_Stop(self, DeviceHandle) -> int:
+        device = self._opened.get(DeviceHandle)
+        if device is None:
+            return 0
+        device.started = False
+        return 1
+
+    def MPS_CloseDevice(self, DeviceHandle) -> int:
+        if self._opened.pop(DeviceHandle, None) is None:
+            return 0
+        return 1
@@ -0,0 +1,141 @@
+from typing import Dict, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .block import Block
+
+
+class _ChannelSpectrum:
+    __slots__ = ("carry", "average", "segments")
+
+    def __init__(self, bins: int) -> None:
+        self.carry = np.empty(0)
+        self.average = np.zeros(bins)
+        self.segments = 0
+
+
+class SpectrumAnalyzer:
+    """Incremental Welch power spectrum of :class:`~mps060602.block.Block` streams.
+
+    Samples are cut into overlapping windowed segments. All segments completed
+    by a block are transformed with one batched ``rfft``; the remainder is
+    carried over to the next block, so memory doesn't grow with the stream.
+    Window, scaling and frequencies are computed once.
+
+    Values are volts, converted with the gain each block was acquired with.
+
+    Args:
+        sample_rate (float): ``ADSampleRate`` of the card.
+        segment_size (int, optional): FFT length. Defaults to 4096.
+        overlap (float, optional): Fraction of overlap between segments. Defaults to 0.5.
+        window (optional): Window array of ``segment_size``, or a numpy window
+        function such as ``np.hanning``. Defaults to np.hanning.
+        averaging (str, optional): ``"linear"``, mean of all segments, or
+        ``"exponential"``. Defaults to "linear".
+        alpha (float, optional): Weight of a new segment in exponential averaging. Defaults to 0.1.
+        scaling (str, optional): ``"density"`` in V²/Hz, or ``"spectrum"`` in V². Defaults to "density".
+    """
+
+    def __init__(
+        self,
+        sample_rate: float,
+        segment_size: int = 4096,
+        overlap: float = 0.5,
+        window=np.hanning,
+        averaging: str = "linear",
+        alpha: float = 0.1,
+        scaling: str = "density",
+    ) -> None:
+        if averaging not in ("linear", "exponential"):
+            raise ValueError("Unknown averaging {!r}.".format(averaging))
+        if scaling not in ("density", "spectrum"):
+            raise ValueError("Unknown scaling {!r}.".format(scaling))
+        self.sample_rate = sample_rate
+        self.segment_size = segment_size
+        self.hop = max(int(round(segment_size * (1 - overlap))), 1)
+        self.averaging = averaging
+        self.alpha = alpha
+
+        self.window = np.asarray(window(segment_size) if callable(window) else window, dtype=np.float64)
+        if scaling == "density":
+            scale = 1 / (sample_rate * np.sum(self.window ** 2))
+        else:
+            scale = 1 / np.sum(self.window) ** 2
+        self.frequencies = np.fft.rfftfreq(segment_size, 1 / sample_rate)
+        # One-sided: fold negative frequencies, except DC and Nyquist.
+        self._scale = np.full(len(self.frequencies), 2 * scale)
+        self._scale[0] = scale
+        if segment_size % 2 == 0:
+            self._scale[-1] = scale
+        self._channels: Dict[int, _ChannelSpectrum] = {}
+
+    def update(self, block):
+        """Add a block.
+
+        Args:
+            block: :class:`~mps060602.block.Block`, or volt array for channel 0.
+        """
+        if isinstance(block, Block):
+            for channel in block.channels or (0,):
+                self._add(channel, block.volts(channel or None))
+        else:
+            self._add(0, np.asarray(block, dtype=np.float64))
+
+    def _add(self, channel: int, x: np.ndarray):
+        state = self._channels.get(channel)
+        if state is None:
+            state = self._channels[channel] = _ChannelSpectrum(len(self.frequencies))
+        if len(state.carry):
+            x = np.concatenate((state.carry, x))
+        n_segments = (len(x) - self.segment_size) // self.hop + 1 if len(x) >= self.segment_size else 0
+        if n_segments:
+            segments = sliding_window_view(x, self.segment_size)[:: self.hop][:n_segments]
+            spectra = np.fft.rfft(segments * self.window, axis=1)
+            power = spectra.real ** 2 + spectra.imag ** 2
+            power *= self._scale
+            self._average(state, power)
+        state.carry = x[n_segments * self.hop:].copy()
+
+    def _average(self, state: _ChannelSpectrum, power: np.ndarray):
+        k = len(power)
+        if self.averaging == "linear":
+            total = state.segments + k
+            state.average *= state.segments / total
+            state.average += power.sum(axis=0) / total
+        else:
+            a = self.alpha
+            start = 0
+            if state.segments == 0:
+                # Seed with the first segment instead of decaying from zero.
+                state.average[:] = power[0]
+                start = 1
+            weights = a * (1 - a) ** np.arange(k - start - 1, -1, -1)
+            state.average *= (1 - a) ** (k - start)
+            state.average += weights @ power[start:]
+        state.segments += k
+
+    @property
+    def channels(self) -> tuple:
+        """tuple: Channels seen so far."""
+        return tuple(self._channels)
+
+    def segments(self, channel: int = 1) -> int:
+        """Segments averaged for ``channel``."""
+        state = self._channels.get(channel)
+        return state.segments if state else 0
+
+    def spectrum(self, channel: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Averaged spectrum of ``channel``.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Frequencies in Hz, and power in V²/Hz
+            or V² depending on ``scaling``. Zeros before the first full segment.
+        """
+        state = self._channels.get(channel)
+        average = state.average if state else np.zeros(len(self.frequencies))
+        return self.frequencies, average.copy()
+
+    def reset(self):
+        """Forget all segments and carried samples."""
+        self._channels.clear()
@@ -0,0 +1,254 @@
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+
+from .block import Block
+
+
+@dataclass
+class ChannelStats:
+    """Statistics of one channel, in volt.
+
+    Attributes:
+        count (int): Samples.
+        mean (float): Mean.
+        variance (float): Population variance.
+        rms (float): Root mean square.
+        peak (float): Largest absolute value.
+        minimum (float): Smallest value.
+        maximum (float): Largest value.
+        kurtosis (float): Pearson kurtosis, 3 for a gaussian signal.
+    """
+
+    count: int
+    mean: float
+    variance: float
+    rms: float
+    peak: float
+    minimum: float
+    maximum: float
+    kurtosis: float
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def crest_factor(self) -> float:
+        """float: ``peak / rms``."""
+        return self.peak / self.rms if self.rms else math.nan
+
+
+class _Moments:
+    """Count, mean and central moment sums up to the 4th, mergeable (Pébay 2008)."""
+
+    __slots__ = ("n", "mean", "m2", "m3", "m4", "minimum", "maximum")
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.mean = self.m2 = self.m3 = self.m4 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    @classmethod
+    def of(cls, x: np.ndarray, scratch: np.ndarray) -> "_Moments":
+        moments = cls()
+        moments.n = len(x)
+        moments.mean = float(x.mean())
+        d = np.subtract(x, moments.mean, out=scratch[: len(x)])
+        d2 = d * d
+        moments.m2 = float(d2.sum())
+        moments.m3 = float(np.dot(d2, d))
+        moments.m4 = float(np.dot(d2, d2))
+        moments.minimum = float(x.min())
+        moments.maximum = float(x.max())
+        return moments
+
+    def merge(self, b: "_Moments"):
+        if b.n == 0:
+            return
+        if self.n == 0:
+            for name in self.__slots__:
+                setattr(self, name, getattr(b, name))
+            return
+        na, nb = self.n, b.n
+        n = na + nb
+        delta = b.mean - self.mean
+        d_n = delta / n
+        m2 = self.m2 + b.m2 + delta * d_n * na * nb
+        m3 = (
+            self.m3 + b.m3
+            + delta * d_n * d_n * na * nb * (na - nb)
+            + 3 * d_n * (na * b.m2 - nb * self.m2)
+        )
+        m4 = (
+            self.m4 + b.m4
+            + delta * d_n ** 3 * na * nb * (na * na - na * nb + nb * nb)
+            + 6 * d_n * d_n * (na * na * b.m2 + nb * nb * self.m2)
+            + 4 * d_n * (na * b.m3 - nb * self.m3)
+        )
+        self.n, self.mean, self.m2, self.m3, self.m4 = n, self.mean + d_n * nb, m2, m3, m4
+        self.minimum = min(self.minimum, b.minimum)
+        self.maximum = max(self.maximum, b.maximum)
+
+    def stats(self) -> ChannelStats:
+        n = self.n
+        if n == 0:
+            return ChannelStats(0, *([math.nan] * 7))
+        variance = self.m2 / n
+        kurtosis = n * self.m4 / (self.m2 * self.m2) if self.m2 else math.nan
+        return ChannelStats(
+            n,
+            self.mean,
+            variance,
+            math.sqrt(variance + self.mean * self.mean),
+            max(-self.minimum, self.maximum),
+            self.minimum,
+            self.maximum,
+            kurtosis,
+        )
+
+
+class _Window:
+    """Sliding window over the last blocks, O(1) per block.
+
+    Power sums of ``x - shift`` are added for a new block and subtracted for
+    the block leaving the window; the shift (first block mean) keeps them
+    well conditioned. Extremes use monotonic queues of block extremes.
+    """
+
+    def __init__(self, blocks: int) -> None:
+        self.blocks = blocks
+        self.shift = None
+        self.sums = np.zeros(5)  # n, S1..S4
+        self.history = deque()
+        self.maxima = deque()
+        self.minima = deque()
+        self.index = 0
+
+    def add(self, x: np.ndarray, scratch: np.ndarray):
+        if self.shift is None:
+            self.shift = float(x.mean())
+        y = np.subtract(x, self.shift, out=scratch[: len(x)])
+        y2 = y * y
+        sums = np.array([len(x), y.sum(), y2.sum(), np.dot(y2, y), np.dot(y2, y2)])
+        self.sums += sums
+        self.history.append(sums)
+
+        index = self.index
+        self.index += 1
+        for queue, value, better in (
+            (self.maxima, float(x.max()), float.__ge__),
+            (self.minima, float(x.min()), float.__le__),
+        ):
+            while queue and better(value, queue[-1][1]):
+                queue.pop()
+            queue.append((index, value))
+            while queue[0][0] <= index - self.blocks:
+                queue.popleft()
+
+        if len(self.history) > self.blocks:
+            self.sums -= self.history.popleft()
+
+    def stats(self) -> ChannelStats:
+        n, s1, s2, s3, s4 = self.sums
+        if n == 0:
+            return ChannelStats(0, *([math.nan] * 7))
+        m = s1 / n
+        # Central moments from power sums of the shifted values.
+        c2 = max(s2 / n - m * m, 0.0)
+        c4 = s4 / n - 4 * m * s3 / n + 6 * m * m * s2 / n - 3 * m ** 4
+        mean = m + self.shift
+        minimum, maximum = self.minima[0][1], self.maxima[0][1]
+        return ChannelStats(
+            int(n),
+            mean,
+            c2,
+            math.sqrt(c2 + mean * mean),
+            max(-minimum, maximum),
+            minimum,
+            maximum,
+            c4 / (c2 * c2) if c2 else math.nan,
+        )
+
+
+class StreamingStats:
+    """Per channel running statistics of a stream of blocks.
+
+    Each block is converted to volt once and reduced with a few vectorized
+    passes; only per channel accumulators are kept, so the work per block
+    doesn't depend on how much has been seen.
+
+    Channels are keyed by input number, 1 and 2. Blocks of ``difference`` mode
+    and plain volt arrays are keyed 0.
+
+    Args:
+        window_blocks (int, optional): Blocks in the sliding window, None to
+        only keep cumulative statistics. Defaults to None.
+    """
+
+    def __init__(self, window_blocks: int = None) -> None:
+        self.window_blocks = window_blocks
+        self._cumulative: Dict[int, _Moments] = {}
+        self._windows: Dict[int, _Window] = {}
+        self._volts = np.empty(0)
+        self._scratch = np.empty(0)
+
+    def _buffers(self, n: int):
+        if len(self._volts) < n:
+            self._volts = np.empty(n)
+            self._scratch = np.empty(n)
+        return self._volts, self._scratch
+
+    def update(self, block):
+        """Add a block.
+
+        Args:
+            block: :class:`~mps060602.block.Block`, or volt array for channel 0.
+        """
+        if isinstance(block, Block):
+            channels = block.channels or (0,)
+            volts, scratch = self._buffers(len(block))
+            for channel in channels:
+                raw = block.raw if channel == 0 else block.channel(channel)
+                self._add(channel, block.volts(channel or None, out=volts[: len(raw)]), scratch)
+        else:
+            x = np.asarray(block, dtype=np.float64)
+            self._add(0, x, self._buffers(len(x))[1])
+
+    def _add(self, channel: int, x: np.ndarray, scratch: np.ndarray):
+        if len(x) == 0:
+            return
+        moments = self._cumulative.get(channel)
+        if moments is None:
+            moments = self._cumulative[channel] = _Moments()
+        moments.merge(_Moments.of(x, scratch))
+        if self.window_blocks:
+            window = self._windows.get(channel)
+            if window is None:
+                window = self._windows[channel] = _Window(self.window_blocks)
+            window.add(x, scratch)
+
+    @property
+    def channels(self) -> tuple:
+        """tuple: Channels seen so far."""
+        return tuple(self._cumulative)
+
+    def cumulative(self, channel: int = 1) -> ChannelStats:
+        """Statistics of everything seen on ``channel`` since creation or :func:`reset`."""
+        return self._cumulative.get(channel, _Moments()).stats()
+
+    def window(self, channel: int = 1) -> ChannelStats:
+        """Statistics of the last ``window_blocks`` blocks of ``channel``."""
+        if not self.window_blocks:
+            raise ValueError("Sliding window disabled, pass window_blocks.")
+        window = self._windows.get(channel)
+        return window.stats() if window else _Moments().stats()
+
+    def reset(self):
+        """Forget everything seen."""
+        self._cumulative.clear()
+        self._windows.clear()
@@ -0,0 +1,320 @@
+import bisect
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from .block import Block
+from .core import ADChannelMode, MPS060602, MPS060602Para
+from .fileformat import HEADER_SIZE, read_header
+from .reader import Recording
+from .recorder import Recorder, record_blocks
+from .streaming import ContinuousAcquisition
+
+_SEGMENT_PATTERN = "segment-{:020d}.mps"
+# Recorders split larger writes, so the writer queue of a segment holds
+# 64 blocks of this size whatever the writes.
+_SEGMENT_BLOCK_SIZE = 65536
+
+
+@dataclass
+class Segment:
+    """Entry of the sparse index, one per closed segment file.
+
+    Attributes:
+        path (Path): Segment file.
+        start_time (float): Unix time of the first frame.
+        first_frame (int): Sample counter of the first frame.
+        n_frames (int): Frames spanned by the segment, frames lost while recording included.
+        sample_rate (int): Sample rate of the segment.
+    """
+
+    path: Path
+    start_time: float
+    first_frame: int
+    n_frames: int
+    sample_rate: int
+
+    @property
+    def end_time(self) -> float:
+        return self.start_time + self.n_frames / self.sample_rate
+
+    @property
+    def end_frame(self) -> int:
+        return self.first_frame + self.n_frames
+
+
+class SegmentedStore:
+    """Rolling store of recordings, split into segment files by size or duration.
+
+    Every segment is a recording, see :class:`~mps060602.recorder.Recorder`.
+    Closed segments are kept in a sparse index sorted by time and sample
+    counter, so :func:`query` finds the segments of a window by bisection and
+    reads only the requested frames through :class:`~mps060602.reader.Recording`.
+    The index is rebuilt from segment headers when a store is reopened.
+
+    Sample counters and times count every acquired frame: frames dropped by
+    the recorder, or reported lost with :func:`skip`, are gaps of the
+    segment, see :class:`~mps060602.reader.Recording`. At most
+    ``max_open`` segments are kept mapped for queries, least recently used
+    ones are closed first.
+
+    Retention is applied whenever a segment is closed: oldest segments are
+    deleted while the store exceeds ``max_bytes``, or ended more than
+    ``max_age`` seconds ago.
+
+    Args:
+        directory: Directory of segment files, created if necessary.
+        para (MPS060602Para): Parameters of the card. Defaults to None, read only.
+        device_number (int, optional): Device number. Defaults to 0.
+        segment_seconds (float, optional): Roll over after this duration. Defaults to 3600.
+        segment_bytes (int, optional): Roll over after this size. Defaults to None.
+        max_bytes (int, optional): Retention size of all segments. Defaults to None.
+        max_age (float, optional): Retention age in seconds. Defaults to None.
+        max_open (int, optional): Segments kept mapped between queries. Defaults to 16.
+    """
+
+    def __init__(
+        self,
+        directory,
+        para: MPS060602Para = None,
+        device_number: int = 0,
+        segment_seconds: float = 3600,
+        segment_bytes: int = None,
+        max_bytes: int = None,
+        max_age: float = None,
+        max_open: int = 16,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.para = para
+        self.device_number = device_number
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_open = max_open
+
+        self.segments: List[Segment] = []
+        """List[Segment]: Sparse index of closed segments, oldest first."""
+        # Bisection keys, kept in step with ``segments``.
+        self._starts: List[float] = []
+        self._firsts: List[int] = []
+        for path in sorted(self.directory.glob("segment-*.mps")):
+            self._index(path)
+
+        self._recorder: Recorder = None
+        self._segment_frames = 0
+        self._frame_counter = self.segments[-1].end_frame if self.segments else 0
+        self._session_first_frame = self._frame_counter
+        self._start_time = None
+        self._recordings: "OrderedDict[Path, Recording]" = OrderedDict()
+
+    def _index(self, path: Path):
+        header = read_header(path)
+        with Recording(path) as recording:
+            n_frames = recording.acquired_frames
+        segment = Segment(
+            path,
+            header.start_time,
+            header.first_sample // header.frame_width,
+            n_frames,
+            header.sample_rate,
+        )
+        self.segments.append(segment)
+        self._starts.append(segment.start_time)
+        self._firsts.append(segment.first_frame)
+
+    @property
+    def _frame_width(self) -> int:
+        return 2 if self.para.ADChannel == ADChannelMode.in1_and_2 else 1
+
+    @property
+    def _max_segment_frames(self) -> int:
+        limits = []
+        if self.segment_seconds:
+            limits.append(int(self.segment_seconds * self.para.ADSampleRate))
+        if self.segment_bytes:
+            limits.append((self.segment_bytes - HEADER_SIZE) // 2 // self._frame_width)
+        return max(min(limits), 1) if limits else None
+
+    def write(self, block, start_time: float = None):
+        """Append a block, rolling over to a new segment when the current one is full.
+
+        Args:
+            block: :class:`~mps060602.block.Block` or uint16 array of whole frames.
+            start_time (float, optional): Unix time of the first sample written
+            to the store, used for the first block only. Defaults to None, now.
+        """
+        if self._start_time is None:
+            self._start_time = time.time() if start_time is None else start_time
+        data = np.asarray(block, dtype=np.uint16).reshape(-1)
+        width = self._frame_width
+        max_frames = self._max_segment_frames
+        while len(data):
+            if self._recorder is None:
+                self._open_segment()
+            frames = len(data) // width
+            if max_frames is not None:
+                frames = min(frames, max_frames - self._segment_frames)
+            # Dropped frames are gaps of the segment, they still take their time.
+            self._recorder.write(data[: frames * width])
+            self._advance(frames)
+            data = data[frames * width:]
+
+    def skip(self, frames: int):
+        """Note that ``frames`` were lost before the next :func:`write`, e.g. in a ring overrun."""
+        max_frames = self._max_segment_frames
+        while frames > 0:
+            if self._recorder is None:
+                self._open_segment()
+            n = frames if max_frames is None else min(frames, max_frames - self._segment_frames)
+            self._recorder.skip(n)
+            self._advance(n)
+            frames -= n
+
+    def _advance(self, frames: int):
+        self._segment_frames += frames
+        self._frame_counter += frames
+        max_frames = self._max_segment_frames
+        if max_frames is not None and self._segment_frames >= max_frames:
+            self._close_segment()
+
+    def _open_segment(self):
+        width = self._frame_width
+        path = self.directory / _SEGMENT_PATTERN.format(self._frame_counter)
+        elapsed = (self._frame_counter - self._session_first_frame) / self.para.ADSampleRate
+        self._recorder = Recorder(
+            path,
+            self.para,
+            self.device_number,
+            block_size=_SEGMENT_BLOCK_SIZE,
+            start_time=self._start_time + elapsed,
+            first_sample=self._frame_counter * width,
+        )
+        self._segment_frames = 0
+
+    def _close_segment(self):
+        self._recorder.close()
+        self._index(Path(self._recorder.path))
+        self._recorder = None
+        self.apply_retention()
+
+    def flush(self):
+        """Close the current segment, making its data visible to :func:`query`."""
+        if self._recorder is not None:
+            self._close_segment()
+
+    def close(self):
+        """Close the current segment and the segments mapped for queries."""
+        self.flush()
+        for recording in self._recordings.values():
+            recording.close()
+        self._recordings.clear()
+
+    def apply_retention(self, now: float = None):
+        """Delete oldest segments exceeding ``max_bytes`` or ``max_age``.
+
+        Args:
+            now (float, optional): Current unix time. Defaults to None, ``time.time()``.
+        """
+        now = time.time() if now is None else now
+        sizes = [os.path.getsize(s.path) for s in self.segments]
+        total = sum(sizes)
+        while self.segments:
+            oldest = self.segments[0]
+            too_big = self.max_bytes is not None and total > self.max_bytes
+            too_old = self.max_age is not None and oldest.end_time < now - self.max_age
+            if not (too_big or too_old):
+                break
+            # A mapped file can't be deleted on Windows.
+            recording = self._recordings.pop(oldest.path, None)
+            if recording is not None:
+                recording.close()
+            oldest.path.unlink()
+            total -= sizes.pop(0)
+            self.segments.pop(0)
+            self._starts.pop(0)
+            self._firsts.pop(0)
+
+    def _recording(self, segment: Segment) -> Recording:
+        recording = self._recordings.get(segment.path)
+        if recording is None:
+            recording = self._recordings[segment.path] = Recording(segment.path)
+            while len(self._recordings) > self.max_open:
+                _, evicted = self._recordings.popitem(last=False)
+                evicted.close()
+        else:
+            self._recordings.move_to_end(segment.path)
+        return recording
+
+    def query(self, start_time: float, stop_time: float, channel: int = None) -> np.ndarray:
+        """Raw samples between two unix times, across segment boundaries.
+
+        Segments are located by bisection, only the overlapping frames are read.
+
+        Args:
+            start_time (float): Unix time, inclusive.
+            stop_time (float): Unix time, exclusive.
+            channel (int, optional): 1 or 2, None for all values. Defaults to None.
+
+        Returns:
+            np.ndarray: uint16 samples, a copy when the window spans several segments.
+        """
+        first = max(bisect.bisect_right(self._starts, start_time) - 1, 0)
+        last = bisect.bisect_left(self._starts, stop_time)
+        pieces = []
+        for segment in self.segments[first:last]:
+            if segment.end_time <= start_time:
+                continue
+            recording = self._recording(segment)
+            pieces.append(
+                recording.samples(
+                    start_time - segment.start_time, stop_time - segment.start_time, channel
+                )
+            )
+        return self._join(pieces)
+
+    def query_frames(self, first_frame: int, stop_frame: int, channel: int = None) -> np.ndarray:
+        """Raw samples between two sample counters, like :func:`query`."""
+        first = max(bisect.bisect_right(self._firsts, first_frame) - 1, 0)
+        last = bisect.bisect_left(self._firsts, stop_frame)
+        pieces = []
+        for segment in self.segments[first:last]:
+            lo = max(first_frame - segment.first_frame, 0)
+            hi = min(stop_frame - segment.first_frame, segment.n_frames)
+            if hi <= lo:
+                continue
+            recording = self._recording(segment)
+            block = Block(
+                recording.read_frames(recording.frame_position(lo), recording.frame_position(hi)).reshape(-1),
+                recording.header.channel_mode,
+                recording.header.gain,
+            )
+            pieces.append(block.raw if channel is None else block.channel(channel))
+        return self._join(pieces)
+
+    @staticmethod
+    def _join(pieces) -> np.ndarray:
+        if not pieces:
+            return np.empty(0, dtype=np.uint16)
+        if len(pieces) == 1:
+            return pieces[0]
+        return np.concatenate(pieces)
+
+    def record(self, card: MPS060602, seconds: float, block_size: int = 16384, n_blocks: int = 64):
+        """Acquire ``seconds`` from ``card`` into the store, see :func:`~mps060602.recorder.record`."""
+        total = int(seconds * card.state.parameter.ADSampleRate) * self._frame_width
+        with ContinuousAcquisition(card, block_size, n_blocks) as acquisition:
+            record_blocks(acquisition, self, total, self._frame_width)
+        self.flush()
+
+    def __enter__(self) -> "SegmentedStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,178 @@
+import threading
+from ctypes import c_ushort
+from typing import Iterator
+
+import numpy as np
+
+from .block import Block
+from .core import MPS060602
+from .errors import AcquisitionNotRunning
+
+
+class ContinuousAcquisition:
+    """Continuously read a card on a dedicated thread into a ring of blocks.
+
+    The acquisition thread calls ``MPS_DataIn`` back to back into a
+    preallocated ring, so processing time on the consumer side doesn't turn
+    into lost samples. The ring is single producer, single consumer: the
+    thread only moves the write position and the consumer only moves the
+    read position, no lock is taken on the data path.
+
+    When the consumer falls behind and the ring is full, the thread keeps
+    draining the card into a scratch block and counts the block as an
+    overrun, see :attr:`overruns`.
+
+    Args:
+        card (MPS060602): Configured card. Started on :func:`start` if it isn't.
+        block_size (int, optional): Samples per block. Defaults to 4096.
+        n_blocks (int, optional): Number of blocks in ring. Defaults to 32.
+    """
+
+    def __init__(self, card: MPS060602, block_size: int = 4096, n_blocks: int = 32) -> None:
+        self.card = card
+        self.block_size = block_size
+        self.n_blocks = n_blocks
+
+        self._ring = (c_ushort * (block_size * n_blocks))()
+        self._slots = [
+            (c_ushort * block_size).from_buffer(self._ring, i * block_size * 2)
+            for i in range(n_blocks)
+        ]
+        self._views = np.frombuffer(self._ring, dtype=np.uint16).reshape(
+            n_blocks, block_size
+        )
+        self._scratch = (c_ushort * block_size)()
+        self._indices = [0] * n_blocks
+        self._paras = [None] * n_blocks
+        self._times = [None] * n_blocks
+
+        self._blocks_read = 0
+        self._write_seq = 0
+        self._read_seq = 0
+        self._holding = False
+        self._published = threading.Event()
+        self._running = False
+        self._started_card = False
+        self._thread = None
+        self._error = None
+
+        self.overruns = 0
+        """int: Blocks dropped because the ring was full."""
+
+        self.block_index = None
+        """int: Index since start of the block returned by :func:`get`, counting dropped blocks."""
+
+    @property
+    def blocks_acquired(self) -> int:
+        """int: Blocks written into the ring so far."""
+        return self._write_seq
+
+    @property
+    def pending(self) -> int:
+        """int: Blocks waiting to be consumed."""
+        return self._write_seq - self._read_seq - self._holding
+
+    def start(self):
+        """Start the card if necessary, then the acquisition thread."""
+        if self._running:
+            return
+        if not self.card.state.started:
+            self.card.start()
+            self._started_card = True
+        self._error = None
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run,
+            name="mps060602-acquisition-{}".format(self.card.device.number),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the acquisition thread, suspend card if it was started here."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._published.set()
+        if self._started_card:
+            self.card.suspend()
+            self._started_card = False
+
+    def _run(self):
+        n_blocks = self.n_blocks
+        readinto = self.card.readinto
+        try:
+            while self._running:
+                if self._write_seq - self._read_seq >= n_blocks:
+                    readinto(self._scratch)
+                    self._blocks_read += 1
+                    self.overruns += 1
+                    continue
+                slot = self._write_seq % n_blocks
+                readinto(self._slots[slot])
+                self._paras[slot] = self.card.state.parameter
+                self._times[slot] = self.card.clock.last_block_time
+                self._indices[slot] = self._blocks_read
+                self._blocks_read += 1
+                self._write_seq += 1
+                self._published.set()
+        except Exception as e:
+            self._error = e
+            self._running = False
+            self._published.set()
+
+    def get(self, timeout: float = None) -> Block:
+        """Wait for the next complete block.
+
+        The returned block is a view into the ring, it stays valid until the
+        next :func:`get` or :func:`release` call, see :func:`Block.copy`.
+
+        Args:
+            timeout (float, optional): Seconds to wait. Defaults to None.
+
+        Raises:
+            AcquisitionNotRunning: Acquisition stopped, or thread failed
+            (the original exception is chained).
+            TimeoutError: No block arrived within ``timeout``.
+
+        Returns:
+            Block: The block, tagged with the mode and gain it was read with.
+        """
+        self.release()
+        while self._write_seq == self._read_seq:
+            if not self._running:
+                raise AcquisitionNotRunning(self.card.device.number) from self._error
+            self._published.clear()
+            if self._write_seq != self._read_seq:
+                break
+            if not self._published.wait(timeout):
+                raise TimeoutError("No block within {} seconds.".format(timeout))
+        self._holding = True
+        slot = self._read_seq % self.n_blocks
+        self.block_index = self._indices[slot]
+        return Block.from_para(
+            self._views[slot], self._paras[slot], self.block_index, self._times[slot], self.card.calibration
+        )
+
+    def release(self):
+        """Hand the block returned by :func:`get` back to the acquisition thread."""
+        if self._holding:
+            self._holding = False
+            self._read_seq += 1
+
+    def __iter__(self) -> Iterator[Block]:
+        while True:
+            try:
+                yield self.get()
+            except AcquisitionNotRunning:
+                if self._error is not None:
+                    raise
+                return
+
+    def __enter__(self) -> "ContinuousAcquisition":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
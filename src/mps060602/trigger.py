@@ -0,0 +1,197 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import List
+
+import numpy as np
+
+from .block import Block
+
+
+class TriggerMode(Enum):
+    """Condition that fires a :class:`Trigger`.
+
+    * ``rising``: signal crosses ``threshold`` upwards.
+    * ``falling``: signal crosses ``threshold`` downwards.
+    * ``level``: signal is at or above ``threshold``.
+    * ``window``: signal leaves ``[threshold, upper]``.
+    """
+
+    rising = "rising"
+    falling = "falling"
+    level = "level"
+    window = "window"
+
+
+@dataclass
+class Capture:
+    """Samples around one trigger.
+
+    Attributes:
+        trigger_index (int): Sample index of the trigger since the first processed block.
+        pre_samples (int): Samples before the trigger in ``data``, fewer than
+        configured at the very beginning of the stream.
+        data (np.ndarray): ``pre_samples`` before the trigger, then
+        ``post_samples`` starting at the trigger sample, in volt.
+    """
+
+    trigger_index: int
+    pre_samples: int
+    data: np.ndarray
+
+
+class Trigger:
+    """Software trigger over a stream of blocks, with pre and post trigger capture.
+
+    Crossings are searched vectorized: samples are classified as arming
+    (back past the hysteresis band) or firing (past the threshold), and a
+    firing sample triggers when the previous classified sample armed. The
+    armed state, the pre-trigger history and unfinished captures are carried
+    across blocks, so events on block boundaries aren't missed. Firing runs
+    of ``level`` mode are collapsed, and holdoff skips ahead by bisection, so
+    the Python loop runs once per capture, not per crossing.
+
+    Args:
+        mode (TriggerMode): Trigger condition.
+        threshold (float): Threshold in volt, lower bound in ``window`` mode.
+        upper (float, optional): Upper bound in ``window`` mode. Defaults to None.
+        hysteresis (float, optional): Volts the signal must come back past the
+        threshold before the trigger re-arms. Defaults to 0.0.
+        pre_samples (int, optional): Samples kept before the trigger. Defaults to 0.
+        post_samples (int, optional): Samples captured from the trigger on. Defaults to 1024.
+        holdoff (int, optional): Samples after the end of a capture during which
+        triggers are ignored. Defaults to 0.
+        channel (int, optional): Input channel, 0 for ``difference`` mode. Defaults to 1.
+    """
+
+    def __init__(
+        self,
+        mode: TriggerMode,
+        threshold: float,
+        upper: float = None,
+        hysteresis: float = 0.0,
+        pre_samples: int = 0,
+        post_samples: int = 1024,
+        holdoff: int = 0,
+        channel: int = 1,
+    ) -> None:
+        self.mode = TriggerMode(mode)
+        if self.mode == TriggerMode.window and upper is None:
+            raise ValueError("Window trigger needs an upper bound.")
+        self.threshold = threshold
+        self.upper = upper
+        self.hysteresis = hysteresis
+        self.pre_samples = pre_samples
+        self.post_samples = max(post_samples, 1)
+        self.holdoff = holdoff
+        self.channel = channel
+
+        self._position = 0
+        self._history = np.empty(0)
+        self._armed = False
+        self._next_allowed = 0
+        self._pending: List[tuple] = []
+
+    def _classify(self, x: np.ndarray):
+        """Return arming and firing masks."""
+        t, h = self.threshold, self.hysteresis
+        if self.mode == TriggerMode.rising:
+            return x < t - h, x >= t
+        if self.mode == TriggerMode.falling:
+            return x > t + h, x <= t
+        if self.mode == TriggerMode.level:
+            fire = x >= t
+            return ~fire, fire
+        outside = (x < t) | (x > self.upper)
+        return (x > t + h) & (x < self.upper - h), outside
+
+    def _runs(self, x: np.ndarray):
+        """Starts and exclusive ends of the runs of samples that may trigger."""
+        if self.mode == TriggerMode.level:
+            edges = np.diff(self._classify(x)[1].astype(np.int8), prepend=0, append=0)
+            return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        crossings = self._crossings(x)
+        return crossings, crossings + 1
+
+    def _crossings(self, x: np.ndarray) -> np.ndarray:
+        arm, fire = self._classify(x)
+        events = np.zeros(len(x), dtype=np.int8)
+        events[arm] = 1
+        events[fire] = 2
+        marked = np.flatnonzero(events)
+        if len(marked) == 0:
+            return marked
+        kinds = events[marked]
+        previous = np.empty(len(kinds), dtype=np.int8)
+        previous[0] = 1 if self._armed else 2
+        previous[1:] = kinds[:-1]
+        self._armed = kinds[-1] == 1
+        return marked[(kinds == 2) & (previous == 1)]
+
+    def process(self, block) -> List[Capture]:
+        """Search a block for triggers.
+
+        Args:
+            block: :class:`~mps060602.block.Block`, or volt array.
+
+        Returns:
+            List[Capture]: Captures completed by this block.
+        """
+        if isinstance(block, Block):
+            x = block.volts(self.channel or None)
+        else:
+            x = np.asarray(block, dtype=np.float64)
+        start = self._position
+        completed = self._continue_pending(x)
+
+        starts, ends = self._runs(x)
+        while True:
+            # Skip to the first run still going on when the holdoff ends; a
+            # level trigger fires again inside a long run.
+            allowed = self._next_allowed - start
+            k = int(np.searchsorted(ends, allowed, side="right"))
+            if k == len(starts):
+                break
+            i = max(int(starts[k]), allowed)
+            index = start + i
+            self._next_allowed = index + self.post_samples + self.holdoff
+            pre = x[max(i - self.pre_samples, 0): i]
+            missing = self.pre_samples - len(pre)
+            if missing:
+                carried = self._history[len(self._history) - min(missing, len(self._history)):]
+                pre = np.concatenate((carried, pre))
+            data = np.empty(len(pre) + self.post_samples)
+            data[: len(pre)] = pre
+            post = x[i: i + self.post_samples]
+            data[len(pre): len(pre) + len(post)] = post
+            capture = Capture(index, len(pre), data)
+            if len(post) == self.post_samples:
+                completed.append(capture)
+            else:
+                self._pending.append((capture, len(pre) + len(post)))
+
+        if self.pre_samples:
+            keep = np.concatenate((self._history, x)) if len(x) < self.pre_samples else x
+            self._history = keep[len(keep) - min(self.pre_samples, len(keep)):].copy()
+        self._position += len(x)
+        return completed
+
+    def _continue_pending(self, x: np.ndarray) -> List[Capture]:
+        completed, pending = [], []
+        for capture, filled in self._pending:
+            n = min(len(capture.data) - filled, len(x))
+            capture.data[filled: filled + n] = x[:n]
+            filled += n
+            if filled == len(capture.data):
+                completed.append(capture)
+            else:
+                pending.append((capture, filled))
+        self._pending = pending
+        return completed
+
+    def reset(self):
+        """Drop history, pending captures and the armed state."""
+        self._position = 0
+        self._history = np.empty(0)
+        self._armed = False
+        self._next_allowed = 0
+        self._pending = []
@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+from mps060602.aio import AsyncMPS060602
+
+from test_streaming import CountingCard
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def test_stream_overlaps_other_tasks():
+    card = CountingCard(delay=0.05)
+    async_card = AsyncMPS060602(card)
+
+    async def consume():
+        firsts = []
+        async for block in async_card.stream(block_size=16, max_queue=2):
+            firsts.append(int(block.raw[0]))
+            if len(firsts) == 4:
+                break
+        return firsts
+
+    async def main():
+        await async_card.start()
+        start = time.perf_counter()
+        firsts, _ = await asyncio.gather(consume(), asyncio.sleep(0.2))
+        return firsts, time.perf_counter() - start
+
+    firsts, elapsed = asyncio.run(main())
+    assert firsts == [0, 1, 2, 3]
+    assert card.state.started
+    assert elapsed < 0.35
+
+
+def test_stream_waits_for_slow_consumer():
+    card = CountingCard(delay=0)
+    async_card = AsyncMPS060602(card)
+
+    async def main():
+        firsts = []
+        async for block in async_card.stream(block_size=16, max_queue=2):
+            firsts.append(int(block.raw[0]))
+            assert (block.raw == firsts[-1]).all()
+            await asyncio.sleep(0.01)
+            if len(firsts) == 20:
+                break
+        return firsts
+
+    assert asyncio.run(main()) == list(range(20))
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+from mps060602.block import Block
+from mps060602.core import ADChannelMode, MPS060602Para, PGAAmpRate, to_volt_array
+from mps060602.errors import ChannelNotAcquired
+from mps060602.recorder import Recorder
+from pytest import raises
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+arrow = pytest.importorskip("mps060602.arrow")
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def test_batch_wraps_block():
+    para = MPS060602Para(ADChannel=ADChannelMode.in2, ADSampleRate=1000, Gain=PGAAmpRate.range_2V)
+    raw = np.arange(100, dtype=np.uint16)
+    batch = arrow.to_batch(Block.from_para(raw, para), arrow.schema(para))
+    assert batch.schema.names == ["in2"]
+    assert batch.column(0).buffers()[1].address == raw.ctypes.data
+    restored = arrow.para(batch.schema)
+    assert (restored.ADChannel, restored.ADSampleRate, restored.Gain) == (ADChannelMode.in2, 1000, PGAAmpRate.range_2V)
+    assert arrow.volts(batch, 2) == pytest.approx(to_volt_array(raw, PGAAmpRate.range_2V))
+    with raises(ChannelNotAcquired):
+        arrow.volts(batch, 1)
+
+
+def test_interleaved_batch():
+    para = MPS060602Para(ADChannel=ADChannelMode.in1_and_2, ADSampleRate=1000, Gain=PGAAmpRate.range_5V)
+    raw = np.arange(200, dtype=np.uint16)
+    block = Block.from_para(raw, para)
+
+    split = arrow.to_batch(block, arrow.schema(para))
+    assert split.schema.names == ["in1", "in2"]
+    assert split.column(1).to_numpy().tolist() == list(range(1, 200, 2))
+
+    batch = arrow.to_batch(block, arrow.schema(para, interleaved=True))
+    assert batch.num_rows == 100
+    assert batch.column(0).values.buffers()[1].address == raw.ctypes.data
+    assert arrow.volts(batch, 2)[0] == pytest.approx(to_volt_array(raw[1:2], PGAAmpRate.range_5V)[0])
+
+    with raises(ValueError):
+        arrow.to_batch(Block.from_para(raw[:-1], para), arrow.schema(para))
+
+
+def test_exporter_row_groups(tmp_path):
+    para = MPS060602Para(ADChannel=ADChannelMode.in1_and_2, ADSampleRate=1000, Gain=PGAAmpRate.range_10V)
+    raw = np.arange(5000, dtype=np.uint16)  # 2500 frames
+    path = tmp_path / "blocks.parquet"
+    with arrow.ParquetExporter(path, para, start_time=100.0, group_seconds=1.0) as exporter:
+        for i in range(0, len(raw), 600):
+            exporter.write(Block.from_para(raw[i:i + 600], para))
+    assert exporter.rows_written == 2500
+
+    file = pq.ParquetFile(path)
+    assert [file.metadata.row_group(i).num_rows for i in range(file.num_row_groups)] == [1000, 1000, 500]
+    table = arrow.read_parquet(path)
+    assert arrow.metadata(table.schema)["start_time"] == 100.0
+    assert table.column("in1").to_numpy().tolist() == list(range(0, 5000, 2))
+    assert arrow.volts(table, 1, np.float32).dtype == np.float32
+    assert arrow.times(table, unix=True)[1000] == pytest.approx(101.0)
+
+
+@pytest.mark.parametrize("codec", [0, 1])
+def test_export_recording(tmp_path, codec):
+    para = MPS060602Para(ADChannel=ADChannelMode.in1, ADSampleRate=1000, Gain=PGAAmpRate.range_5V)
+    values = (np.arange(2500) % 300).astype(np.uint16)
+    path = tmp_path / "in1.mps"
+    with Recorder(path, para, block_size=256, first_sample=7000, codec=codec, chunk_size=700) as recorder:
+        recorder.write(values)
+
+    out = tmp_path / "in1.parquet"
+    assert arrow.export_recording(path, out, group_seconds=0.5) == 2500
+    table = arrow.read_parquet(out)
+    assert pq.ParquetFile(out).num_row_groups == 5
+    assert arrow.metadata(table.schema)["first_frame"] == 7000
+    assert np.array_equal(table.column("in1").to_numpy(), values)
+
+
+def test_calibration_round_trip(tmp_path):
+    from mps060602.calibration import Calibration
+
+    para = MPS060602Para(ADChannel=ADChannelMode.in1_and_2, ADSampleRate=1000, Gain=PGAAmpRate.range_5V)
+    calibration = Calibration()
+    calibration.set(1, PGAAmpRate.range_5V, offset=0.1, scale=1.5)
+    calibration.set(2, PGAAmpRate.range_5V, offset=-0.2)
+    block = Block.from_para(np.arange(0, 65536, 64, dtype=np.uint16), para, calibration=calibration)
+    path = tmp_path / "calibrated.parquet"
+    with arrow.ParquetExporter(path, para, calibration=calibration) as exporter:
+        exporter.write(block)
+
+    table = arrow.read_parquet(path)
+    assert arrow.metadata(table.schema)["calibration"]["1"] == {"offset": 0.1, "scale": 1.5}
+    assert arrow.volts(table, 1) == pytest.approx(block.volts(1))
+    assert arrow.volts(table, 2) == pytest.approx(block.volts(2))
+    # Without calibration, volts are nominal.
+    nominal = arrow.to_batch(block, arrow.schema(para))
+    assert arrow.volts(nominal, 1) == pytest.approx(to_volt_array(block.in1, para.Gain))
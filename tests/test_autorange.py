@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from mps060602.autorange import AutoRange
+from mps060602.block import Block
+from mps060602.core import ADChannelMode, MPS060602, MPS060602Para, PGAAmpRate
+from mps060602.simulated import SimulatedBackend, _to_raw, constant
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+class CountingBackend(SimulatedBackend):
+    def __init__(self, **kwargs):
+        super().__init__(paced=False, **kwargs)
+        self.calls = {"MPS_Configure": 0, "MPS_Start": 0, "MPS_Stop": 0}
+
+    def MPS_Configure(self, *args):
+        self.calls["MPS_Configure"] += 1
+        return super().MPS_Configure(*args)
+
+    def MPS_Start(self, *args):
+        self.calls["MPS_Start"] += 1
+        return super().MPS_Start(*args)
+
+    def MPS_Stop(self, *args):
+        self.calls["MPS_Stop"] += 1
+        return super().MPS_Stop(*args)
+
+
+def make_card(gain, **kwargs):
+    backend = CountingBackend(**kwargs)
+    card = MPS060602(MPS060602Para(ADChannel=ADChannelMode.in1, Gain=gain), backend=backend)
+    backend.calls["MPS_Configure"] = 0
+    return card, backend
+
+
+def sine_block(card, amplitude):
+    volts = amplitude * np.sin(np.linspace(0, 20 * np.pi, 1000))
+    gain = card.state.parameter.Gain
+    return Block(_to_raw(volts, gain.full_scale), ADChannelMode.in1, gain)
+
+
+def test_clipping_widens_range_one_step_per_block():
+    card, backend = make_card(PGAAmpRate.range_1V)
+    card.start()
+    backend.calls["MPS_Start"] = 0
+    auto = AutoRange(card)
+    assert auto.update(sine_block(card, 3.0))
+    assert auto.gain is PGAAmpRate.range_2V
+    assert auto.update(sine_block(card, 3.0))
+    assert auto.gain is PGAAmpRate.range_5V
+    assert not auto.update(sine_block(card, 3.0))
+    assert auto.clipped_blocks == 2
+    assert backend.calls == {"MPS_Configure": 2, "MPS_Start": 2, "MPS_Stop": 2}
+    assert [(s.old, s.new) for s in auto.switches] == [
+        (PGAAmpRate.range_1V, PGAAmpRate.range_2V),
+        (PGAAmpRate.range_2V, PGAAmpRate.range_5V),
+    ]
+
+
+def test_narrowing_needs_quiet_blocks():
+    card, backend = make_card(PGAAmpRate.range_10V)
+    auto = AutoRange(card, hold_blocks=3)
+    changes = [auto.update(sine_block(card, 0.5)) for _ in range(9)]
+    assert changes == [False, False, True] * 3
+    assert auto.gain is PGAAmpRate.range_1V
+    # Card not started: configured only.
+    assert backend.calls == {"MPS_Configure": 3, "MPS_Start": 0, "MPS_Stop": 0}
+
+
+def test_no_flapping_near_boundary():
+    card, backend = make_card(PGAAmpRate.range_2V)
+    auto = AutoRange(card, hold_blocks=1)
+    for amplitude in (0.8, 0.72, 0.85, 0.75) * 5:
+        assert not auto.update(sine_block(card, amplitude))
+    assert backend.calls["MPS_Configure"] == 0
+    assert auto.switches == []
+
+
+def test_blocks_tagged_across_switches():
+    card, _ = make_card(PGAAmpRate.range_1V, signals=(constant(3.0),))
+    card.start()
+    auto = AutoRange(card, restart=False)
+    blocks = [auto.read_block(256) for _ in range(4)]
+    assert [b.gain for b in blocks] == [
+        PGAAmpRate.range_1V, PGAAmpRate.range_2V, PGAAmpRate.range_5V, PGAAmpRate.range_5V,
+    ]
+    assert blocks[-1].volts() == pytest.approx(3.0, abs=1e-3)
+    assert len(auto.switches) == 2
+    assert all(s.dead_time > 0 for s in auto.switches)
+    assert auto.dead_time == pytest.approx(sum(s.dead_time for s in auto.switches))
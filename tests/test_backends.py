@@ -0,0 +1,50 @@
+import subprocess
+import sys
+from ctypes import c_void_p, sizeof
+
+from mps060602 import backends
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+class FakeFunction:
+    argtypes = restype = None
+
+
+class FakeDLL:
+    def __getattr__(self, name):
+        function = FakeFunction()
+        setattr(self, name, function)
+        return function
+
+
+def test_import_is_lazy():
+    code = (
+        "import sys, mps060602, mps060602.simulated; "
+        "assert 'ctypes.wintypes' not in sys.modules; "
+        "assert mps060602.backends._dll is None"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_dll_loaded_once(monkeypatch):
+    loaded = []
+
+    def load_library(path):
+        loaded.append(path)
+        return FakeDLL()
+
+    monkeypatch.setattr(backends, "_dll", None)
+    monkeypatch.setattr(backends.cdll, "LoadLibrary", load_library)
+    dll = backends.load_dll()
+    assert backends.load_dll() is dll
+    assert len(loaded) == 1
+    assert dll.MPS_DataIn.restype is not None
+
+
+def test_dll_matches_interpreter():
+    expected = "MPS-060602x64.dll" if sizeof(c_void_p) == 8 else "MPS-060602.dll"
+    assert backends._inpackage_dll_path().endswith(expected)
+    assert backends.INVALID_HANDLE == 2 ** (sizeof(c_void_p) * 8) - 1
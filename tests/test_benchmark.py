@@ -0,0 +1,22 @@
+from mps060602.benchmark import benchmark, format_results, main
+from mps060602.core import ADChannelMode
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def test_benchmark():
+    results = benchmark(
+        rates=(1000,), modes=(ADChannelMode.in1_and_2,), block_size=64, calls=3
+    )
+    assert {r.operation for r in results} >= {"data_in", "readinto", "read_to_volt"}
+    assert all(r.samples_per_second > 0 for r in results)
+    assert "read_to_volt_array" in format_results(results)
+
+
+def test_main(capsys):
+    main(["--rate", "2000", "--mode", "in1", "--operation", "readinto", "--calls", "2"])
+    captured = capsys.readouterr()
+    assert "readinto" in captured.out
+    assert "in1_and_2" not in captured.out
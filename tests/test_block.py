@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from mps060602.block import Block
+from mps060602.core import ADChannelMode, MPS060602, MPS060602Para, PGAAmpRate
+from mps060602.errors import ChannelNotAcquired
+from mps060602.simulated import SimulatedBackend, constant
+from pytest import raises
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def interleaved_block():
+    raw = np.array([0, 65535, 16384, 49152, 32768, 32768], dtype=np.uint16)
+    return Block(raw, ADChannelMode.in1_and_2, PGAAmpRate.range_10V)
+
+
+def test_channel_views_share_memory():
+    block = interleaved_block()
+    assert block.channels == (1, 2)
+    assert block.frame_width == 2
+    assert block.in1.tolist() == [0, 16384, 32768]
+    assert block.in2.tolist() == [65535, 49152, 32768]
+    assert np.shares_memory(block.in1, block.raw)
+    block.raw[2] = 1
+    assert block.in1[1] == 1
+
+    assert block.volts(1) == pytest.approx([10, 10 - 20 / 65536, 0])
+    assert block.volts(2, dtype=np.float32).dtype == np.float32
+
+
+def test_missing_channel():
+    block = Block(np.zeros(4, dtype=np.uint16), ADChannelMode.in2, PGAAmpRate.range_5V)
+    assert block.channels == (2,)
+    assert block.in2.shape == (4,)
+    with raises(ChannelNotAcquired):
+        block.in1
+    assert block.deinterleave()[0] is None
+
+
+def test_deinterleave_into_preallocated():
+    block = interleaved_block()
+    raw1 = np.zeros(3, dtype=np.uint16)
+    volt2 = np.zeros(3, dtype=np.float32)
+    in1, in2 = block.deinterleave(raw1, volt2)
+    assert in1 is raw1 and in2 is volt2
+    assert raw1.flags.c_contiguous
+    assert raw1.tolist() == [0, 16384, 32768]
+    assert volt2 == pytest.approx([-10, -5, 0], abs=1e-3)
+
+
+def test_read_block():
+    backend = SimulatedBackend(paced=False, signals=(constant(1.0), constant(-2.0)))
+    para = MPS060602Para(ADChannel=ADChannelMode.in1_and_2, Gain=PGAAmpRate.range_5V)
+    card = MPS060602(para, buffer_size=32, backend=backend)
+    card.start()
+    block = card.read_block()
+    assert len(block) == 32
+    assert block.gain is PGAAmpRate.range_5V
+    assert block.volts(1) == pytest.approx(1.0, abs=1e-3)
+    assert block.volts(2) == pytest.approx(-2.0, abs=1e-3)
+
+    out = np.zeros(64, dtype=np.uint16)
+    assert len(card.read_block(16, out=out)) == 16
+    assert np.shares_memory(card.read_block(out=out).raw, out)
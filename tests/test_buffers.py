@@ -0,0 +1,51 @@
+from ctypes import c_ushort
+from queue import Empty
+
+import numpy as np
+from mps060602.buffers import BufferPool, as_ushort_array
+from pytest import raises
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def test_as_ushort_array_shares_memory():
+    array = np.zeros(8, dtype=np.uint16)
+    view = as_ushort_array(array)
+    assert len(view) == 8
+    view[3] = 42
+    assert array[3] == 42
+
+    raw = bytearray(10)
+    view = as_ushort_array(raw)
+    view[0] = 0xFFFF
+    assert raw[:2] == b"\xff\xff"
+
+    ctype_array = (c_ushort * 4)()
+    assert as_ushort_array(ctype_array) is ctype_array
+
+
+def test_as_ushort_array_rejects_other_formats():
+    for buffer in (np.zeros(8), np.zeros(8, dtype=np.int32), bytearray(9)):
+        with raises(TypeError):
+            as_ushort_array(buffer)
+
+
+def test_buffer_pool_reuses_blocks():
+    pool = BufferPool(block_size=16, count=2)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert pool.available() == 0
+    with raises(Empty):
+        pool.acquire(block=False)
+
+    first.array[:] = 7
+    assert list(first.ctypes)[:2] == [7, 7]
+    assert as_ushort_array(first) is first.ctypes
+
+    first.release()
+    with second:
+        pass
+    assert pool.available() == 2
+    assert pool.acquire() is first
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+from mps060602.block import Block
+from mps060602.calibration import Calibration
+from mps060602.core import ADChannelMode, MPS060602, MPS060602Para, PGAAmpRate, to_volt_array
+from mps060602.simulated import SimulatedBackend, constant, mix, noise
+from pytest import raises
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+GAIN = PGAAmpRate.range_2V
+
+
+def test_identity_matches_nominal_conversion():
+    raw = np.random.default_rng(0).integers(0, 65536, 1000).astype(np.uint16)
+    calibration = Calibration()
+    for mode in ADChannelMode:
+        if mode == ADChannelMode.forbid:
+            continue
+        assert calibration.convert(raw, mode, GAIN) == pytest.approx(to_volt_array(raw, GAIN))
+    out = np.empty(1000, dtype=np.float32)
+    assert calibration.convert(raw, ADChannelMode.in1, GAIN, out=out) is out
+    assert out == pytest.approx(to_volt_array(raw, GAIN, np.float32))
+
+
+def test_channels_corrected_independently():
+    calibration = Calibration()
+    calibration.set(1, GAIN, offset=0.1)
+    calibration.set(2, GAIN, scale=2.0)
+    raw = np.empty(8, dtype=np.uint16)
+    raw[0::2] = 16384  # 1 V at 2 V full scale
+    raw[1::2] = 49152  # -1 V
+    block = Block(raw, ADChannelMode.in1_and_2, GAIN)
+    volts = calibration.volts(block)
+    assert volts[0::2] == pytest.approx(0.9)
+    assert volts[1::2] == pytest.approx(-2.0)
+    assert calibration.volts(block, 2) == pytest.approx(-2.0)
+    # Other gains are untouched.
+    assert calibration.table(1, PGAAmpRate.range_1V)[16384] == pytest.approx(0.5)
+
+    calibration.set(1, GAIN, scale=0.5)
+    assert calibration.volts(block, 1) == pytest.approx(0.45)
+
+
+def test_offsets_from_shorted_inputs():
+    backend = SimulatedBackend(
+        paced=False, signals=(mix(constant(0.012), noise(0.001)), mix(constant(-0.007), noise(0.001, seed=1)))
+    )
+    card = MPS060602(MPS060602Para(ADChannel=ADChannelMode.in1_and_2, Gain=GAIN), backend=backend)
+    calibration = Calibration()
+    calibration.calibrate_offsets(card)
+    assert not card.state.started
+    assert calibration.get(1, GAIN).offset == pytest.approx(0.012, abs=2e-4)
+    assert calibration.get(2, GAIN).offset == pytest.approx(-0.007, abs=2e-4)
+
+    card.calibration = calibration
+    card.start()
+    volts = card.to_volt_array(card.read_block(4096).raw)
+    assert volts.mean() == pytest.approx(0, abs=2e-4)
+
+
+def test_saved_by_device_number(tmp_path, monkeypatch):
+    calibration = Calibration(device_number=3)
+    calibration.set(0, PGAAmpRate.range_10V, offset=-0.02, scale=1.001)
+    path = calibration.save(tmp_path)
+    assert path.name == "calibration-3.json"
+
+    loaded = Calibration.load(3, tmp_path)
+    assert loaded.get(0, PGAAmpRate.range_10V).offset == -0.02
+    assert loaded.get(0, PGAAmpRate.range_10V).scale == 1.001
+    assert loaded.table(0, PGAAmpRate.range_10V) == pytest.approx(calibration.table(0, PGAAmpRate.range_10V))
+
+    monkeypatch.setenv("MPS060602_CALIBRATION_DIR", str(tmp_path))
+    assert Calibration.load(3).entries == loaded.entries
+    assert Calibration.load(4).entries == {}
+
+
+def test_blocks_carry_the_card_calibration():
+    from mps060602.streaming import ContinuousAcquisition
+
+    backend = SimulatedBackend(paced=False, signals=(constant(0.5), constant(-0.25)))
+    card = MPS060602(MPS060602Para(ADChannel=ADChannelMode.in1_and_2, Gain=GAIN), buffer_size=512, backend=backend)
+    card.calibration = Calibration()
+    card.calibration.set(1, GAIN, offset=0.1)
+    card.calibration.set(2, GAIN, scale=2.0)
+    card.start()
+    block = card.read_block()
+    assert block.volts() == pytest.approx(card.to_volt_array(block.raw))
+    assert block.volts(1) == pytest.approx(0.4, abs=1e-3)
+    assert block.copy().volts(2) == pytest.approx(-0.5, abs=1e-3)
+    in1, _ = block.deinterleave(np.empty(256))
+    assert in1 == pytest.approx(0.4, abs=1e-3)
+    assert all(b.volts(2) == pytest.approx(-0.5, abs=1e-3) for b in card.capture(1024, 256).blocks())
+
+    with ContinuousAcquisition(card, 256, 4) as acquisition:
+        block = acquisition.get()
+        assert block.volts() == pytest.approx(card.to_volt_array(block.raw))
+    assert card.to_volt(int(block.raw[0]), 1) == pytest.approx(block.volts(1)[0])
+    assert card.to_volt(int(block.raw[1]), 2) == pytest.approx(block.volts(2)[0])
+    with raises(ValueError):
+        card.to_volt(int(block.raw[0]))
+
+    # Offsets are derived from nominal volts, whatever the block carries.
+    derived = Calibration()
+    derived.derive_offsets(block)
+    assert derived.get(1, GAIN).offset == pytest.approx(0.5, abs=1e-3)
+    assert derived.get(2, GAIN).offset == pytest.approx(-0.25, abs=1e-3)
+
+
+def test_scalar_conversion_is_calibrated():
+    card = MPS060602(MPS060602Para(ADChannel=ADChannelMode.in2, Gain=GAIN), backend=SimulatedBackend(paced=False))
+    code = 16384
+    assert card.to_volt(code) == pytest.approx(1.0)
+    card.calibration = Calibration()
+    card.calibration.set(2, GAIN, offset=0.25)
+    assert card.to_volt(code) == pytest.approx(card.to_volt_array(np.array([code]))[0])
+    assert card.to_volt(code) == pytest.approx(0.75)
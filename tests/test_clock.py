@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from mps060602.clock import SampleClock
+from mps060602.core import ADChannelMode, MPS060602, MPS060602Para
+from mps060602.simulated import SimulatedBackend
+from mps060602.streaming import ContinuousAcquisition
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def test_drift_and_offset_under_jitter():
+    rate, block = 1000, 100
+    period = (1 + 50e-6) / rate  # card 50 ppm slow
+    clock = SampleClock(rate, memory=1e9)
+    clock.start(host_time=100.0)
+    rng = np.random.default_rng(0)
+    frames = 0
+    for jitter in rng.exponential(0.0005, 5000):
+        frames += block
+        clock.advance(block, host_time=100.0 + frames * period + jitter)
+    assert clock.drift == pytest.approx(50, abs=2)
+    # Within a sample after 500 seconds, mean read latency included.
+    assert clock.time_of(frames) == pytest.approx(100.0 + frames * period, abs=1 / rate)
+    assert clock.offset == pytest.approx(0, abs=1 / rate)
+
+
+def test_vectorized_conversion():
+    clock = SampleClock(2000)
+    clock.start(host_time=10.0)
+    indices = np.arange(0, 10000, 1000)
+    times = clock.time_of(indices)
+    assert times == pytest.approx(10.0 + indices / 2000)
+    assert clock.index_at(times) == pytest.approx(indices)
+    assert clock.drift == pytest.approx(0)
+
+
+def test_rate_change_keeps_time():
+    clock = SampleClock(1000)
+    clock.start(host_time=0.0)
+    clock.advance(1000, host_time=1.0)
+    clock.configure(4000)
+    assert clock.time_of(1000) == pytest.approx(1.0)
+    assert clock.time_of(5000) == pytest.approx(2.0)
+    assert clock.advance(4000, host_time=2.0) == pytest.approx(1.0)
+
+
+def test_card_blocks_are_timestamped():
+    para = MPS060602Para(ADChannel=ADChannelMode.in1_and_2, ADSampleRate=10000)
+    card = MPS060602(para, buffer_size=200, backend=SimulatedBackend())
+    card.start()
+    blocks = [card.read_block() for _ in range(5)]
+    steps = np.diff([b.timestamp for b in blocks])
+    assert steps == pytest.approx(0.01, abs=0.003)
+    assert blocks[1].times(10000)[[0, -1]] == pytest.approx(blocks[1].timestamp + np.array([0, 0.0099]))
+    assert card.clock.frames == 500
+    card.suspend()
+
+    with ContinuousAcquisition(card, block_size=200, n_blocks=4) as acquisition:
+        first = acquisition.get(timeout=1).timestamp
+        second = acquisition.get(timeout=1).timestamp
+    assert second - first == pytest.approx(0.01, abs=0.003)
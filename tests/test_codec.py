@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from mps060602 import codec
+from mps060602.benchmark import benchmark_codec, vibration
+from mps060602.core import ADChannelMode, MPS060602Para, PGAAmpRate
+from mps060602.reader import Recording
+from mps060602.recorder import Recorder
+from pytest import raises
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        np.zeros(0, dtype=np.uint16),
+        np.array([7], dtype=np.uint16),
+        np.full(1000, 32768, dtype=np.uint16),
+        np.arange(1000, dtype=np.uint16),
+        np.array([0, 65535] * 300, dtype=np.uint16),  # largest residuals
+        np.random.default_rng(0).integers(0, 65536, 4001).astype(np.uint16),
+    ],
+)
+def test_round_trip(raw):
+    data = codec.encode(raw)
+    assert codec.chunk_header(data) == (len(data) - codec.CHUNK_HEADER_SIZE, len(raw), 1)
+    assert codec.decode(data).tolist() == raw.tolist()
+
+
+def test_interleaved_and_compression():
+    raw = vibration(10000, 0.5)
+    data = codec.encode(raw, 2)
+    assert np.array_equal(codec.decode(data), raw)
+    assert len(data) < raw.nbytes
+
+    noise = np.random.default_rng(1).integers(0, 65536, 4000).astype(np.uint16)
+    # Noise is stored as is, with little overhead.
+    assert len(codec.encode(noise)) < noise.nbytes * 1.05
+
+    with raises(ValueError):
+        codec.encode(raw[:-1], 2)
+
+
+def test_iter_chunks_stops_at_truncated():
+    chunks = [codec.encode(np.arange(n, dtype=np.uint16)) for n in (10, 300, 5)]
+    data = b"".join(chunks)
+    assert [n for _, n in codec.iter_chunks(data)] == [10, 300, 5]
+    offsets = [offset for offset, _ in codec.iter_chunks(data[:-1])]
+    assert offsets == [0, len(chunks[0])]
+    assert codec.decode(data, offsets[1]).tolist() == list(range(300))
+
+
+def test_compressed_recording(tmp_path):
+    path = tmp_path / "compressed.mps"
+    para = MPS060602Para(ADChannel=ADChannelMode.in1_and_2, ADSampleRate=1000, Gain=PGAAmpRate.range_5V)
+    values = vibration(1000, 3.0)
+    with Recorder(path, para, block_size=256, codec=codec.CODEC_DELTA, chunk_size=1001) as recorder:
+        recorder.write(values[:1001])
+        recorder.write(values[1001:])
+    assert recorder.samples_written == len(values)
+    assert recorder.bytes_written < values.nbytes
+
+    with Recording(path) as recording:
+        assert recording.header.codec == codec.CODEC_DELTA
+        assert len(recording) == 3000
+        # Chunks hold 500 frames, this slice spans three of them.
+        assert np.array_equal(recording.samples(0.4, 1.2, channel=2), values[801:2400:2])
+        assert np.array_equal(recording.read_frames(2990, 4000).reshape(-1), values[5980:])
+        assert np.array_equal(recording.raw, values)
+
+
+def test_unclosed_compressed_recording(tmp_path):
+    path = tmp_path / "unclosed.mps"
+    para = MPS060602Para(ADChannel=ADChannelMode.in1, ADSampleRate=1000, Gain=PGAAmpRate.range_5V)
+    recorder = Recorder(path, para, block_size=256, codec=codec.CODEC_DELTA, chunk_size=100)
+    recorder.write(np.arange(250, dtype=np.uint16))
+    recorder._queue.put(None)
+    recorder._thread.join()
+    recorder._file.flush()
+
+    # The last 50 values are still staged, and the last chunk is cut short.
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 1)
+    with Recording(path) as recording:
+        assert len(recording) == 100
+        assert recording.samples().tolist() == list(range(100))
+    recorder._file.close()
+
+
+def test_benchmark_codec():
+    result = benchmark_codec(10000, 0.2)
+    assert result.raw_bytes == 8000
+    assert result.ratio > 1
@@ -1,16 +1,20 @@
 from ctypes import *
 from ctypes.wintypes import *
 
+import numpy as np
 import pytest
 from mps060602 import MPS060602
-from mps060602.core import MPS060602Para
+from mps060602.core import ADChannelMode, MPS060602Para, PGAAmpRate, to_volt_array
 from mps060602.errors import (
     ADSampleRateOutOfRange,
     ADSampleRateRoundToNearest1000,
+    BufferTooSmall,
     ConfigureDeviceFailed,
+    DeviceNotStarted,
     InvalidDeviceNumber,
     OpenDeviceFailed,
 )
+from mps060602.simulated import SimulatedBackend, constant
 from pytest import raises
 
 __author__ = "Ofey Chan"
@@ -67,3 +71,106 @@ def test_by_plug_status():
         return
     MPS060602_init_plugged()
     MPS060602_configure()
+
+
+def test_to_volt_array():
+    gain = PGAAmpRate.range_10V
+    raw = np.array([0, 16384, 32768, 65535], dtype=np.uint16)
+    volt = to_volt_array(raw, gain)
+    assert volt.dtype == np.float64
+    expected = [(1 - (d / 65536) * 2) * gain.full_scale for d in raw.tolist()]
+    assert volt.tolist() == pytest.approx(expected)
+
+    volt32 = to_volt_array(raw, PGAAmpRate.range_1V, dtype=np.float32)
+    assert volt32.dtype == np.float32
+    assert volt32[2] == 0
+    assert volt32[0] == pytest.approx(1)
+
+
+def test_amp_rate_full_scale():
+    assert PGAAmpRate.range_10V.full_scale == pytest.approx(10)
+    assert PGAAmpRate.range_2V.full_scale == pytest.approx(2)
+
+
+def simulated_card(**kwargs):
+    backend = SimulatedBackend(paced=False, signals=(constant(2.5), constant(-1.0)))
+    para = MPS060602Para(**kwargs)
+    return MPS060602(para, buffer_size=64, backend=backend)
+
+
+def test_simulated_open_and_configure():
+    backend = SimulatedBackend(devices=(0,), paced=False)
+    card = MPS060602(MPS060602Para(), device_number=0, backend=backend)
+    with raises(OpenDeviceFailed):
+        MPS060602(MPS060602Para(), device_number=0, backend=backend)
+    with raises(OpenDeviceFailed):
+        MPS060602(MPS060602Para(), device_number=1, backend=backend)
+
+    card.device.handle = -1  # Hack: Pollute the handle.
+    with raises(ConfigureDeviceFailed):
+        card.configure(MPS060602Para())
+
+
+def test_simulated_read():
+    card = simulated_card(ADChannel=ADChannelMode.in1_and_2)
+    with raises(DeviceNotStarted):
+        card.data_in()
+    card.start()
+
+    assert len(card.data_in()) == 64
+    volt = card.read_to_volt_array(16)
+    assert volt.shape == (16,)
+    assert volt[0::2] == pytest.approx(2.5, abs=1e-3)
+    assert volt[1::2] == pytest.approx(-1.0, abs=1e-3)
+    assert card.read_to_volt(4) == pytest.approx((2.5, -1.0, 2.5, -1.0), abs=1e-3)
+
+    out = np.zeros(32, dtype=np.uint16)
+    assert card.readinto(out) == 32
+    assert card.to_volt_array(out)[0] == pytest.approx(2.5, abs=1e-3)
+    assert card.readinto(bytearray(20), 4) == 4
+    with raises(BufferTooSmall):
+        card.readinto(out, 33)
+    with raises(TypeError):
+        card.readinto(np.zeros(8))
+
+    card.suspend()
+    card.close()
+
+
+def test_capture_into_2d_array():
+    card = simulated_card(ADChannel=ADChannelMode.in1_and_2)
+    with raises(DeviceNotStarted):
+        card.capture(1000, 256)
+    card.start()
+
+    capture = card.capture(1000, 256)
+    assert capture.ok and capture.data.shape == (4, 256)
+    assert len(capture.raw) == 1000
+    assert to_volt_array(capture.raw[0::2], capture.gain) == pytest.approx(2.5, abs=1e-3)
+    assert [len(b) for b in capture.blocks()] == [256, 256, 256, 232]
+    assert card.metrics.snapshot().calls == 4
+
+    out = np.zeros((8, 128), dtype=np.uint16)
+    assert card.capture(1024, 128, out=out).data.base is out
+    with raises(BufferTooSmall):
+        card.capture(1025, 128, out=out)
+    with raises(TypeError):
+        card.capture(100, 64, out=np.zeros((4, 64)))
+    with raises(ValueError):
+        card.capture(100, 64, out=out[:, :64])
+
+
+def test_capture_reports_failed_reads():
+    class FlakyBackend(SimulatedBackend):
+        calls = 0
+
+        def MPS_DataIn(self, *args):
+            self.calls += 1
+            return 0 if self.calls == 2 else super().MPS_DataIn(*args)
+
+    card = MPS060602(MPS060602Para(), buffer_size=64, backend=FlakyBackend(paced=False))
+    card.start()
+    capture = card.capture(400, 100)
+    assert not capture.ok
+    assert list(capture.failed) == [1]
+    assert [b.index for b in capture.blocks()] == [0, 2, 3]
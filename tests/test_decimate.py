@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from mps060602.block import Block
+from mps060602.core import ADChannelMode, PGAAmpRate
+from mps060602.decimate import BlockDecimator, Decimator, split_factor
+from mps060602.simulated import _to_raw
+from pytest import raises
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def test_split_factor():
+    assert split_factor(100) == [5, 5, 4]
+    assert split_factor(45) == [5, 3, 3]
+    assert split_factor(7) == [7]
+    with raises(ValueError):
+        split_factor(22)
+
+
+def test_passband_kept_and_aliases_rejected():
+    rate = 100000
+    t = np.arange(rate) / rate
+    decimator = Decimator(rate, 50)
+    assert decimator.output_rate == 2000
+    low = decimator.process(np.sin(2 * np.pi * 300 * t))
+    decimator.reset()
+    high = decimator.process(np.sin(2 * np.pi * 2300 * t))  # aliases onto 300 Hz
+    assert len(low) == 2000
+    settled = slice(200, None)
+    assert np.sqrt(np.mean(low[settled] ** 2)) == pytest.approx(np.sqrt(0.5), abs=1e-3)
+    assert np.abs(high[settled]).max() < 1e-3
+
+
+def test_streaming_matches_one_shot():
+    x = np.random.default_rng(0).normal(size=10007)
+    whole = Decimator(48000, 12).process(x)
+    streaming = Decimator(48000, 12)
+    pieces = [streaming.process(chunk) for chunk in np.array_split(x, 37)]
+    assert np.concatenate(pieces) == pytest.approx(whole)
+
+
+def test_block_decimator_volts_per_channel():
+    gain = PGAAmpRate.range_5V
+    raw = np.empty(4000, dtype=np.uint16)
+    raw[0::2] = _to_raw(np.full(2000, 1.0), gain.full_scale)
+    raw[1::2] = _to_raw(np.full(2000, -2.0), gain.full_scale)
+    decimator = BlockDecimator(10000, 10, dtype=np.float32)
+    result = decimator.process(Block(raw, ADChannelMode.in1_and_2, gain))
+    assert set(result) == {1, 2}
+    assert len(result[1]) == 200
+    assert result[1][-50:] == pytest.approx(1.0, abs=1e-3)
+    assert result[2][-50:] == pytest.approx(-2.0, abs=1e-3)
+
+
+def test_empty_and_tiny_blocks():
+    assert len(Decimator(100000, 10).process(np.ones(0))) == 0
+
+    x = np.random.default_rng(2).normal(size=4000)
+    one_shot = Decimator(100000, 64).process(x)
+    streaming = Decimator(100000, 64)
+    pieces = []
+    for i in range(0, len(x), 4):
+        pieces.append(streaming.process(x[i:i + 4]))
+        pieces.append(streaming.process(x[:0]))
+    assert np.allclose(np.concatenate(pieces), one_shot)
+
+
+def test_block_decimator_applies_calibration_and_gain_changes():
+    from mps060602.calibration import Calibration
+
+    calibration = Calibration()
+    calibration.set(1, PGAAmpRate.range_5V, offset=0.1, scale=2.0)
+    calibration.set(1, PGAAmpRate.range_1V, offset=-0.05)
+    decimator = BlockDecimator(10000, 10)
+    for gain in (PGAAmpRate.range_5V, PGAAmpRate.range_1V):
+        block = Block(_to_raw(np.full(2000, 0.5), gain.full_scale), ADChannelMode.in1, gain, calibration=calibration)
+        expected = block.volts()[0]
+        volts = decimator.process(block)[1]
+        # The history carried across the gain switch is in volts, nothing to rescale.
+        assert volts[-50:] == pytest.approx(expected, abs=1e-3)
+    assert expected == pytest.approx(0.55, abs=1e-3)
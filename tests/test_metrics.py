@@ -0,0 +1,90 @@
+import math
+import time
+
+import pytest
+from mps060602.core import ADChannelMode, MPS060602, MPS060602Para
+from mps060602.metrics import AcquisitionMetrics, latency_edges
+from mps060602.simulated import SimulatedBackend
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def make_card(paced=True, **kwargs):
+    para = MPS060602Para(ADChannel=ADChannelMode.in1_and_2, ADSampleRate=20000)
+    return MPS060602(para, buffer_size=400, backend=SimulatedBackend(paced=paced), **kwargs)
+
+
+def test_paced_loop_keeps_up():
+    card = make_card()
+    card.start()
+    for _ in range(10):
+        card.read_to_volt_array()
+    snapshot = card.metrics.snapshot()
+    assert snapshot.calls == 10
+    assert snapshot.frames == 10 * 200
+    assert snapshot.configured_rate == 20000
+    assert snapshot.achieved_rate == pytest.approx(20000, rel=0.3)
+    assert snapshot.backlog < 1000
+    assert sum(snapshot.latency_histogram) == 10
+    assert snapshot.conversion_seconds > 0
+    assert 0 < snapshot.latency_mean <= snapshot.latency_max
+    # 200 frames at 20 kHz block for about 10 ms.
+    assert snapshot.latency_percentile(50) >= 0.004
+
+
+def test_slow_loop_builds_backlog():
+    card = make_card(paced=False)
+    card.start()
+    card.data_in()
+    time.sleep(0.05)
+    snapshot = card.metrics.snapshot()
+    assert snapshot.backlog == pytest.approx(1000 - 200, abs=400)
+    assert snapshot.lag == pytest.approx(snapshot.backlog / 20000)
+
+    card.suspend()
+    assert card.metrics.snapshot().backlog == 0
+    assert math.isnan(card.metrics.snapshot().achieved_rate)
+
+
+def test_callback_and_reset():
+    snapshots = []
+    card = make_card(paced=False, metrics=AcquisitionMetrics(snapshots.append, callback_every=2))
+    card.start()
+    for _ in range(5):
+        card.data_in()
+    assert [s.calls for s in snapshots] == [2, 4]
+
+    card.metrics.reset()
+    snapshot = card.metrics.snapshot()
+    assert snapshot.calls == 0 and sum(snapshot.latency_histogram) == 0
+    assert math.isnan(snapshot.latency_percentile(99))
+
+
+def test_latency_edges():
+    edges = latency_edges()
+    assert edges[0] == pytest.approx(1e-6)
+    assert edges[10] == pytest.approx(1.024e-3)
+    assert edges[-1] == math.inf
+
+
+def test_batches_respect_callback_every():
+    snapshots = []
+    metrics = AcquisitionMetrics(snapshots.append, callback_every=4)
+    for calls in (3, 3, 1, 1, 8):
+        metrics.record_calls(calls, calls * 100, calls * 1000)
+    # Called after the batches crossing 4, 8, and both 12 and 16.
+    assert [s.calls for s in snapshots] == [6, 8, 16]
+    with pytest.raises(ValueError):
+        AcquisitionMetrics(snapshots.append, callback_every=0)
+
+
+def test_failed_calls_are_not_frames():
+    metrics = AcquisitionMetrics()
+    metrics.configured(1000, 2)
+    metrics.record_call(400, 1000)
+    metrics.record_call(400, 1000, failed=True)
+    metrics.record_calls(4, 3 * 400, 4000, failures=1)
+    snapshot = metrics.snapshot()
+    assert (snapshot.calls, snapshot.failures, snapshot.frames) == (6, 2, 4 * 200)
@@ -0,0 +1,42 @@
+import numpy as np
+from mps060602.core import ADChannelMode, MPS060602Para
+from mps060602.multicard import MultiCardManager
+from mps060602.simulated import SimulatedBackend, constant
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def test_aligned_blocks_from_several_cards():
+    backend = SimulatedBackend(devices=range(3), signals=(constant(0), constant(0)))
+    paras = {
+        0: MPS060602Para(ADChannel=ADChannelMode.in1, ADSampleRate=20000),
+        1: MPS060602Para(ADChannel=ADChannelMode.in1, ADSampleRate=20000),
+        2: MPS060602Para(ADChannel=ADChannelMode.in1_and_2, ADSampleRate=20000),
+    }
+    block_sizes = {0: 200, 1: 200, 2: 400}
+    with MultiCardManager(range(3), paras, block_sizes, n_blocks=8, backend=backend) as manager:
+        assert manager.start_skew is not None
+        indices = []
+        for _ in range(5):
+            block = manager.get(timeout=1)
+            assert set(block.blocks) == {0, 1, 2}
+            assert block.blocks[2].raw.shape == (400,)
+            assert block.sample_counters[2] == block.index * 400
+            assert (block.blocks[0].raw == 32768).all()
+            indices.append(block.index)
+        assert indices == sorted(set(indices))
+    assert all(not card.state.started for card in manager.cards.values())
+
+
+def test_realigns_after_overrun():
+    backend = SimulatedBackend(devices=(0, 1), paced=False)
+    manager = MultiCardManager((0, 1), MPS060602Para(), block_size=16, n_blocks=2, backend=backend)
+    manager.start()
+    manager.acquisitions[0].get(timeout=1)  # card 0 runs one block ahead
+    block = manager.get(timeout=1)
+    assert block.index == manager.acquisitions[1].block_index
+    assert sum(manager.overruns.values()) > 0
+    manager.close()
+    assert np.isscalar(manager.start_skew)
@@ -0,0 +1,72 @@
+import struct
+import socket
+import time
+
+import numpy as np
+import pytest
+from mps060602.core import ADChannelMode, MPS060602, MPS060602Para, PGAAmpRate
+from mps060602.errors import InvalidFrame
+from mps060602.net import StreamClient, StreamServer
+from mps060602.simulated import SimulatedBackend, constant
+from pytest import raises
+
+from test_streaming import CountingCard
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def test_blocks_reach_every_client():
+    backend = SimulatedBackend(signals=(constant(1.0), constant(-0.5)))
+    para = MPS060602Para(ADChannel=ADChannelMode.in1_and_2, ADSampleRate=100000, Gain=PGAAmpRate.range_2V)
+    card = MPS060602(para, backend=backend)
+    with StreamServer(card, block_size=1000, policy="block") as server:
+        clients = [StreamClient(*server.address, timeout=5) for _ in range(2)]
+        for client in clients:
+            blocks = [client.receive() for _ in range(10)]
+            indices = [b.index for b in blocks]
+            assert indices == list(range(indices[0], indices[0] + 10))
+            block = blocks[-1]
+            assert block.raw.dtype == np.uint16 and len(block) == 1000
+            assert block.mode == ADChannelMode.in1_and_2 and block.gain is PGAAmpRate.range_2V
+            assert block.volts(1) == pytest.approx(1.0, abs=1e-3)
+            assert block.volts(2) == pytest.approx(-0.5, abs=1e-3)
+            assert client.sample_rate == 100000
+            assert client.missed == 0
+    for client in clients:
+        for _ in client:  # Queued frames, then the server hangs up.
+            pass
+        client.close()
+    assert not card.state.started
+
+
+def test_slow_client_drops_frames():
+    card = CountingCard(delay=0)
+    with StreamServer(card, block_size=32768, policy="drop", max_queue=4) as server:
+        slow = StreamClient(*server.address, timeout=5)
+        fast = StreamClient(*server.address, timeout=5)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            fast.receive()
+            stats = server.client_stats()
+            if any(dropped for _, dropped in stats.values()):
+                break
+        assert max(dropped for _, dropped in stats.values()) > 0
+        slow.receive()
+    slow.close()
+    fast.close()
+
+
+def test_invalid_frame():
+    listener = socket.create_server(("127.0.0.1", 0))
+    client = StreamClient(*listener.getsockname()[:2], timeout=5)
+    sock, _ = listener.accept()
+    sock.sendall(struct.pack("<4s20x", b"HTTP"))
+    with raises(InvalidFrame):
+        client.receive()
+    sock.close()
+    with raises(ConnectionError):
+        client.receive()
+    client.close()
+    listener.close()
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+from mps060602.errors import StageFailed
+from mps060602.pipeline import Pipeline, Stage, convert, decimate, select, sink, statistics
+from pytest import raises
+
+from test_streaming import CountingCard
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def first_value(block):
+    return int(block.raw[0])
+
+
+def test_fusion_and_counters():
+    card = CountingCard()
+    pipeline = Pipeline(card, block_size=64, n_blocks=8)
+    volts = []
+    stats = statistics()
+    pipeline.then(convert(channel=1)).then(stats).then(sink(lambda v: volts.append(v[0])))
+    pipeline.then(decimate(1000, 4)).then(sink(lambda d: None, name="drain"))
+    pipeline.run(blocks=20)
+
+    by_name = {s.name: s for s in pipeline.stats()}
+    # The source branches, so each branch has its own worker.
+    assert by_name["convert"].worker == "convert+statistics+<lambda>"
+    assert (by_name["decimate"].worker, by_name["drain"].worker) == ("decimate", "drain")
+    assert by_name["source"].items_in >= 20
+    # Every block reached the fused branch, in order.
+    assert by_name["statistics"].items_out == by_name["source"].items_in == len(volts)
+    assert by_name["decimate"].items_in == by_name["source"].items_in
+    # Volt arrays are keyed 0.
+    assert stats.stats.cumulative(0).count == 32 * len(volts)
+    assert volts == sorted(volts, reverse=True)
+    assert 0 <= pipeline.bottleneck().utilization <= 1
+
+
+def test_items_are_copied_into_queues():
+    card = CountingCard(delay=0)
+    pipeline = Pipeline(card, block_size=16, n_blocks=2)
+    blocks = []
+    pipeline.then(Stage(lambda b: blocks.append(b), "keep", fusible=False))
+    pipeline.run(blocks=50)
+
+    # Blocks kept past the ring slot reuse still hold their own samples.
+    assert [int(b.raw[0]) for b in blocks] == sorted({int(b.raw[0]) for b in blocks})
+    assert all((b.raw == b.raw[0]).all() for b in blocks)
+    assert pipeline.stats()[1].max_queue_depth >= 1
+
+
+def test_single_branch_runs_on_source():
+    pipeline = Pipeline(CountingCard(), block_size=16)
+    pipeline.then(convert()).then(statistics())
+    pipeline.run(blocks=5)
+    assert {s.worker for s in pipeline.stats()} == {"source+convert+statistics"}
+
+
+def test_select_and_process_placement():
+    card = CountingCard()
+    pipeline = Pipeline(card, block_size=16, n_blocks=8)
+    values = []
+    even = pipeline.then(select(lambda b: b.raw[0] % 2 == 0))
+    even.then(Stage(first_value, placement="process")).then(sink(values.append))
+    pipeline.run(blocks=20)
+
+    assert values and all(v % 2 == 0 for v in values)
+    assert values == sorted(values)
+    stats = {s.name: s for s in pipeline.stats()}
+    assert stats["first_value"].placement == "process"
+    assert stats["first_value"].items_out == len(values)
+    assert stats["select"].items_out == len(values)
+
+
+def test_failure_stops_pipeline():
+    def fail(block):
+        raise RuntimeError("boom")
+
+    pipeline = Pipeline(CountingCard(), block_size=16)
+    pipeline.then(Stage(fail, fusible=False))
+    with raises(StageFailed, match="fail"):
+        pipeline.run(seconds=5)
+    assert not pipeline.running
+
+
+def test_connect_twice():
+    stage = sink(print)
+    Pipeline(CountingCard()).then(stage)
+    with raises(ValueError):
+        Pipeline(CountingCard()).then(stage)
+    with raises(ValueError):
+        Stage(print, placement="gpu")
+
+
+@pytest.mark.parametrize("placement", ["thread", "process"])
+def test_decimate_placement(placement):
+    pipeline = Pipeline(CountingCard(), block_size=64)
+    pipeline.then(decimate(1000, 4, placement=placement)).then(sink(lambda d: None))
+    pipeline.run(blocks=5)
+    stats = pipeline.stats()
+    assert stats[1].placement == placement
+    assert stats[1].items_out >= 5
+    assert np.isfinite(stats[1].busy_seconds)
+
+
+def test_views_of_the_ring_are_copied():
+    card = CountingCard(delay=0)
+    pipeline = Pipeline(card, block_size=16, n_blocks=2)
+    kept = []
+    pipeline.then(Stage(lambda b: b.channel(1), "view")).then(Stage(kept.append, "keep", fusible=False))
+    pipeline.run(blocks=50)
+
+    assert kept
+    assert all((a == a[0]).all() for a in kept)
+    assert [int(a[0]) for a in kept] == sorted({int(a[0]) for a in kept})
+
+
+def test_decimate_options():
+    stage = decimate(1000, 4, {"passband": 0.5}, name="lowpass", queue_size=3)
+    assert (stage.name, stage.queue_size, stage.fusible) == ("lowpass", 3, False)
+    assert decimate(1000, 4, fusible=True).fusible
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from mps060602.core import ADChannelMode, MPS060602Para, PGAAmpRate
+from mps060602.errors import ChannelNotAcquired
+from mps060602.reader import Recording
+from mps060602.recorder import Recorder
+from pytest import raises
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def write_recording(path, mode, values, close=True):
+    para = MPS060602Para(ADChannel=mode, ADSampleRate=1000, Gain=PGAAmpRate.range_5V)
+    recorder = Recorder(path, para, block_size=256)
+    recorder.write(values)
+    if close:
+        recorder.close()
+    else:
+        recorder._queue.put(None)
+        recorder._thread.join()
+        recorder._file.flush()
+    return recorder
+
+
+def test_time_and_channel_slicing(tmp_path):
+    path = tmp_path / "two.mps"
+    values = np.arange(2000, dtype=np.uint16)  # 1000 frames, 1 second
+    write_recording(path, ADChannelMode.in1_and_2, values)
+
+    with Recording(path) as recording:
+        assert len(recording) == 1000
+        assert recording.duration == pytest.approx(1.0)
+        in1 = recording.samples(0.1, 0.2, channel=1)
+        assert in1.tolist() == list(range(200, 400, 2))
+        assert recording.samples(0.1, 0.2, channel=2)[0] == 201
+        assert recording.samples(0.999).tolist() == [1998, 1999]
+        assert recording.samples(0.3, 0.301).tolist() == [600, 601]
+        assert len(recording.samples(2.0, 3.0)) == 0
+        assert recording.times(0.1, 0.2)[0] == pytest.approx(0.1)
+
+        volts = recording.volts(0.5, 0.501, channel=1, dtype=np.float32)
+        assert volts.dtype == np.float32
+        assert volts[0] == pytest.approx((1 - 1000 / 32768) * 5)
+
+
+def test_single_channel_and_unclosed(tmp_path):
+    path = tmp_path / "in2.mps"
+    write_recording(path, ADChannelMode.in2, np.full(100, 32768, dtype=np.uint16), close=False)
+
+    recording = Recording(path)
+    assert recording.header.sample_count == 0
+    assert len(recording) == 100
+    assert recording.volts(channel=2) == pytest.approx(0)
+    with raises(ChannelNotAcquired):
+        recording.samples(channel=1)
+    recording.close()
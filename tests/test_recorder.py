@@ -0,0 +1,101 @@
+import time
+
+import numpy as np
+import pytest
+from mps060602.core import ADChannelMode, MPS060602, MPS060602Para, PGAAmpRate
+from mps060602.errors import InvalidRecording
+from mps060602.fileformat import HEADER_SIZE, RecordingHeader, read_header
+from mps060602.reader import Recording
+from mps060602.recorder import Recorder, record
+from mps060602.simulated import SimulatedBackend
+from pytest import raises
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def test_header_round_trip():
+    para = MPS060602Para(ADChannel=ADChannelMode.in2, ADSampleRate=5000, Gain=PGAAmpRate.range_2V)
+    header = RecordingHeader.from_para(para, 3, start_time=1.5, sample_count=10)
+    packed = header.pack()
+    assert len(packed) == HEADER_SIZE
+    parsed = RecordingHeader.unpack(packed)
+    assert parsed == header
+    assert parsed.gain is PGAAmpRate.range_2V
+    assert parsed.para.ADSampleRate == 5000
+    with raises(InvalidRecording):
+        RecordingHeader.unpack(b"x" * HEADER_SIZE)
+
+
+def test_recorder_writes_blocks(tmp_path):
+    path = tmp_path / "blocks.mps"
+    para = MPS060602Para()
+    with Recorder(path, para, device_number=2, block_size=4, queue_blocks=8) as recorder:
+        assert recorder.write(np.arange(10, dtype=np.uint16))
+        assert recorder.write(np.arange(3, dtype=np.uint16))
+    assert recorder.samples_written == 13
+    header = read_header(path)
+    assert header.sample_count == 13 and header.device_number == 2
+    data = np.fromfile(path, dtype=np.uint16, offset=HEADER_SIZE)
+    assert data.tolist() == list(range(10)) + [0, 1, 2]
+
+
+def test_recorder_drops_when_queue_full(tmp_path):
+    recorder = Recorder(tmp_path / "full.mps", MPS060602Para(), block_size=4, queue_blocks=1)
+    busy = recorder._pool.acquire()  # The only buffer is still being written.
+    assert not recorder.write(np.zeros(6, dtype=np.uint16))
+    assert recorder.dropped == 6
+    busy.release()
+    recorder.close()
+    assert recorder.samples_written == 0
+
+
+def test_record_simulated_card(tmp_path):
+    path = tmp_path / "card.mps"
+    para = MPS060602Para(ADChannel=ADChannelMode.in1_and_2, ADSampleRate=20000)
+    card = MPS060602(para, backend=SimulatedBackend(paced=False))
+    recorder = record(card, path, seconds=0.1, block_size=512)
+    # The unpaced card may overrun the ring, lost blocks are gaps.
+    assert recorder.samples_written + 2 * sum(m for _, m in recorder.gaps) == 4000
+    assert recorder.dropped == 0
+    assert read_header(path).channel_mode == ADChannelMode.in1_and_2
+    assert not card.state.started
+
+
+@pytest.mark.parametrize("codec", [0, 1])
+def test_dropped_frames_are_gaps(tmp_path, codec):
+    path = tmp_path / "gaps.mps"
+    para = MPS060602Para(ADChannel=ADChannelMode.in1_and_2, ADSampleRate=1000)
+    recorder = Recorder(path, para, block_size=4, queue_blocks=1, codec=codec)
+    busy = recorder._pool.acquire()
+    assert not recorder.write(np.zeros(6, dtype=np.uint16))
+    busy.release()
+    recorder.skip(2)
+    recorder.write(np.arange(4, dtype=np.uint16))
+    recorder.close()
+    assert recorder.gaps == [[0, 5]]
+
+    with Recording(path) as recording:
+        assert recording.gaps.tolist() == [[0, 5]]
+        assert len(recording) == 2
+        assert recording.duration == 0.007
+        assert recording.times().tolist() == [0.005, 0.006]
+        assert recording.samples(0.0, 0.006).tolist() == [0, 1]
+        assert len(recording.samples(0.0, 0.005)) == 0
+
+
+def test_writer_error_is_raised(tmp_path):
+    recorder = Recorder(tmp_path / "error.mps", MPS060602Para(), block_size=4)
+
+    def fail(values):
+        raise ValueError("encoder broke")
+
+    recorder._write_samples = fail
+    recorder.write(np.zeros(4, dtype=np.uint16))
+    with raises(ValueError):
+        for _ in range(100):
+            recorder.write(np.zeros(4, dtype=np.uint16))
+            time.sleep(0.01)
+    with raises(ValueError):
+        recorder.close()
@@ -0,0 +1,103 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from mps060602.core import ADChannelMode, MPS060602, MPS060602Para, PGAAmpRate
+from mps060602.errors import AcquisitionNotRunning
+from mps060602.shm import SharedMemoryConsumer, SharedMemoryProducer
+from mps060602.simulated import SimulatedBackend, constant
+from pytest import raises
+
+from test_streaming import CountingCard
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+class LimitedCard(CountingCard):
+    """Fails after ``limit`` blocks, which stops the producer."""
+
+    def __init__(self, limit, delay=0.0):
+        super().__init__(delay)
+        self.limit = limit
+
+    def readinto(self, out, sample_number=None):
+        if self.reads == self.limit:
+            raise RuntimeError("limit reached")
+        return super().readinto(out, sample_number)
+
+
+def test_consumers_read_every_block():
+    card = LimitedCard(20)
+    producer = SharedMemoryProducer(card, block_size=8, n_blocks=32)
+    first = SharedMemoryConsumer(producer.name, start="oldest")
+    second = SharedMemoryConsumer(producer.name, start="oldest")
+    producer.start()
+    for consumer in (first, second):
+        values = []
+        for block in consumer:
+            assert consumer.intact()
+            values.append(int(block.raw[0]))
+            assert block.index == len(values) - 1
+            del block
+        assert values == list(range(20))
+        assert consumer.overruns == 0 and consumer.lag == 0
+    producer.close()
+    first.close()
+    second.close()
+
+
+def test_slow_consumer_is_lapped():
+    card = LimitedCard(50)
+    producer = SharedMemoryProducer(card, block_size=4, n_blocks=8)
+    consumer = SharedMemoryConsumer(producer.name, start="oldest")
+    producer.start()
+    producer._thread.join()
+    assert isinstance(producer.error, RuntimeError)
+    assert consumer.lag == 50
+    block = consumer.get()
+    assert block.index == 50 - 8 + 1
+    assert consumer.overruns == 50 - 8 + 1
+    assert consumer.intact()
+    del block
+    assert len(list(consumer)) == 8 - 2
+    with raises(AcquisitionNotRunning):
+        consumer.get()
+    producer.close()
+    consumer.close()
+
+
+def test_tags_and_timeout():
+    backend = SimulatedBackend(signals=(constant(1.0), constant(-0.5)))
+    para = MPS060602Para(ADChannel=ADChannelMode.in1_and_2, ADSampleRate=10000, Gain=PGAAmpRate.range_2V)
+    card = MPS060602(para, backend=backend)
+    with SharedMemoryProducer(card, block_size=200, n_blocks=4) as producer:
+        with SharedMemoryConsumer(producer.name) as consumer:
+            block = consumer.get(timeout=1)
+            assert block.mode == ADChannelMode.in1_and_2 and block.gain is PGAAmpRate.range_2V
+            assert block.volts(1) == pytest.approx(1.0, abs=1e-3)
+            assert block.volts(2) == pytest.approx(-0.5, abs=1e-3)
+            assert block.timestamp >= card.clock.start_time
+            del block
+            with raises(TimeoutError):
+                consumer.get(timeout=0)
+    assert not card.state.started
+
+
+def test_consumer_in_other_process():
+    card = LimitedCard(10)
+    with SharedMemoryProducer(card, block_size=16, n_blocks=16) as producer:
+        code = (
+            "from mps060602.shm import SharedMemoryConsumer\n"
+            "c = SharedMemoryConsumer({!r}, start='oldest')\n"
+            "print(sum(int(b.raw.sum()) for b in c))\n"
+        ).format(producer.name)
+        output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    assert int(output.stdout) == sum(range(10)) * 16
+
+
+def test_attach_to_unknown_segment():
+    with raises(FileNotFoundError):
+        SharedMemoryConsumer("mps060602-test-missing")
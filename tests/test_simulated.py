@@ -0,0 +1,40 @@
+import time
+
+import numpy as np
+import pytest
+from mps060602.core import ADChannelMode, MPS060602, MPS060602Para, PGAAmpRate
+from mps060602.simulated import SimulatedBackend, constant, mix, noise, sine
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def test_signals():
+    t = np.arange(4) / 4
+    assert sine(1, 2.0)(t) == pytest.approx([0, 2, 0, -2], abs=1e-12)
+    assert mix(constant(1.0), constant(0.5))(t) == pytest.approx([1.5] * 4)
+    assert noise(0.1)(np.arange(10000)).std() == pytest.approx(0.1, rel=0.05)
+
+
+def test_difference_mode_and_clipping():
+    backend = SimulatedBackend(paced=False, signals=(constant(1.5), constant(2.0)))
+    para = MPS060602Para(ADChannel=ADChannelMode.difference, Gain=PGAAmpRate.range_1V)
+    card = MPS060602(para, buffer_size=8, backend=backend)
+    card.start()
+    # -0.5 V is inside the 1 V range.
+    assert card.read_to_volt_array() == pytest.approx(-0.5, abs=1e-3)
+
+    card.configure(MPS060602Para(ADChannel=ADChannelMode.in2, Gain=PGAAmpRate.range_1V))
+    assert (np.asarray(card.data_in()) == 0).all()  # 2 V clips to code 0
+
+
+def test_paced_at_sample_rate():
+    para = MPS060602Para(ADChannel=ADChannelMode.in1_and_2, ADSampleRate=10000)
+    card = MPS060602(para, buffer_size=200, backend=SimulatedBackend())
+    card.start()
+    start = time.perf_counter()
+    for _ in range(5):
+        card.data_in()
+    # 5 * 100 frames at 10 kHz.
+    assert time.perf_counter() - start == pytest.approx(0.05, abs=0.03)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from mps060602.block import Block
+from mps060602.core import ADChannelMode, PGAAmpRate
+from mps060602.simulated import _to_raw
+from mps060602.spectrum import SpectrumAnalyzer
+from pytest import raises
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def test_sine_amplitude_and_channels():
+    rate, n = 10000, 1024
+    t = np.arange(20000) / rate
+    frequency = 25 * rate / n  # on a bin
+    gain = PGAAmpRate.range_5V
+    raw = np.empty(40000, dtype=np.uint16)
+    raw[0::2] = _to_raw(2.0 * np.sin(2 * np.pi * frequency * t), gain.full_scale)
+    raw[1::2] = _to_raw(np.zeros_like(t), gain.full_scale)
+
+    analyzer = SpectrumAnalyzer(rate, n, scaling="spectrum")
+    for frames in np.array_split(raw.reshape(-1, 2), 13):
+        analyzer.update(Block(frames.reshape(-1), ADChannelMode.in1_and_2, gain))
+    frequencies, power = analyzer.spectrum(1)
+    assert analyzer.channels == (1, 2)
+    assert frequencies[np.argmax(power)] == pytest.approx(frequency)
+    assert power.max() == pytest.approx(2.0 ** 2 / 2, rel=1e-3)
+    assert analyzer.spectrum(2)[1].max() < 1e-6
+
+
+def test_density_integrates_to_variance_and_streams():
+    x = np.random.default_rng(0).normal(0, 0.3, 50000)
+    whole = SpectrumAnalyzer(2000, 256)
+    whole.update(x)
+    streaming = SpectrumAnalyzer(2000, 256)
+    for chunk in np.array_split(x, 71):
+        streaming.update(chunk)
+    assert streaming.segments(0) == whole.segments(0) == (50000 - 256) // 128 + 1
+    frequencies, psd = streaming.spectrum(0)
+    assert psd == pytest.approx(whole.spectrum(0)[1])
+    assert np.sum(psd) * frequencies[1] == pytest.approx(0.09, rel=0.02)
+
+
+def test_exponential_averaging_follows_level():
+    analyzer = SpectrumAnalyzer(1000, 64, overlap=0, averaging="exponential", alpha=0.5)
+    analyzer.update(np.ones(64))
+    first = analyzer.spectrum(0)[1][0]
+    analyzer.update(np.zeros(64 * 10))
+    assert analyzer.spectrum(0)[1][0] == pytest.approx(first / 2 ** 10)
+    with raises(ValueError):
+        SpectrumAnalyzer(1000, averaging="median")
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from mps060602.block import Block
+from mps060602.core import ADChannelMode, PGAAmpRate, to_volt_array
+from mps060602.stats import StreamingStats
+from pytest import raises
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def reference(x):
+    mean = x.mean()
+    variance = x.var()
+    return dict(
+        count=len(x),
+        mean=mean,
+        variance=variance,
+        rms=np.sqrt(np.mean(x * x)),
+        peak=np.abs(x).max(),
+        kurtosis=np.mean((x - mean) ** 4) / variance ** 2,
+    )
+
+
+def assert_stats(stats, x):
+    for name, value in reference(x).items():
+        assert getattr(stats, name) == pytest.approx(value, rel=1e-9, abs=1e-12), name
+    assert stats.crest_factor == pytest.approx(stats.peak / stats.rms)
+
+
+def test_cumulative_and_window_match_numpy():
+    rng = np.random.default_rng(1)
+    chunks = [rng.normal(3.0, 0.5, 100) + rng.standard_t(5, 100) for _ in range(10)]
+    stats = StreamingStats(window_blocks=3)
+    for chunk in chunks:
+        stats.update(chunk)
+    assert stats.channels == (0,)
+    assert_stats(stats.cumulative(0), np.concatenate(chunks))
+    assert_stats(stats.window(0), np.concatenate(chunks[-3:]))
+
+
+def test_blocks_per_channel():
+    rng = np.random.default_rng(2)
+    raw = rng.integers(20000, 40000, 512).astype(np.uint16)
+    stats = StreamingStats()
+    stats.update(Block(raw, ADChannelMode.in1_and_2, PGAAmpRate.range_2V))
+    volts = to_volt_array(raw, PGAAmpRate.range_2V)
+    assert stats.channels == (1, 2)
+    assert_stats(stats.cumulative(1), volts[0::2])
+    assert_stats(stats.cumulative(2), volts[1::2])
+
+    with raises(ValueError):
+        stats.window(1)
+    stats.reset()
+    assert stats.cumulative(1).count == 0
@@ -0,0 +1,93 @@
+import numpy as np
+from mps060602.core import ADChannelMode, MPS060602, MPS060602Para
+from mps060602.simulated import SimulatedBackend
+from mps060602.store import SegmentedStore
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+PARA = MPS060602Para(ADChannel=ADChannelMode.in1_and_2, ADSampleRate=1000)
+
+
+def ramp(first_frame, n_frames):
+    return (np.arange(first_frame * 2, (first_frame + n_frames) * 2) % 65536).astype(np.uint16)
+
+
+def test_rollover_and_query_across_segments(tmp_path):
+    with SegmentedStore(tmp_path, PARA, segment_seconds=0.25) as store:
+        for i in range(7):
+            store.write(ramp(i * 150, 150), start_time=100.0)
+    # 1050 frames in segments of 250 frames.
+    assert [s.n_frames for s in store.segments] == [250, 250, 250, 250, 50]
+    assert store.segments[1].start_time == 100.25
+
+    window = store.query(100.2, 100.3, channel=1)
+    assert window.tolist() == list(range(400, 600, 2))
+    assert store.query_frames(240, 260).tolist() == ramp(240, 20).tolist()
+    assert len(store.query(200.0, 201.0)) == 0
+
+    reopened = SegmentedStore(tmp_path)
+    assert [s.first_frame for s in reopened.segments] == [0, 250, 500, 750, 1000]
+    assert reopened.query(100.99, 101.0, channel=2).tolist() == list(range(1981, 2000, 2))
+
+
+def test_retention(tmp_path):
+    store = SegmentedStore(tmp_path, PARA, segment_bytes=512 + 400, max_bytes=3 * 912)
+    store.write(ramp(0, 1000), start_time=0.0)
+    store.flush()
+    assert len(store.segments) == 3
+    assert store.segments[-1].end_frame == 1000
+    assert len(list(tmp_path.glob("segment-*.mps"))) == 3
+
+    store.max_bytes = None
+    store.max_age = 10
+    store.apply_retention(now=10.95)
+    assert store.segments[0].first_frame == 900
+
+
+def test_record_from_card(tmp_path):
+    card = MPS060602(PARA, backend=SimulatedBackend(paced=False))
+    store = SegmentedStore(tmp_path, PARA, segment_seconds=0.1)
+    store.record(card, seconds=0.35, block_size=64)
+    assert sum(s.n_frames for s in store.segments) == 350
+    assert len(store.segments) == 4
+
+
+def test_dropped_frames_keep_the_index_right(tmp_path):
+    with SegmentedStore(tmp_path, PARA, segment_seconds=0.25) as store:
+        store.write(ramp(0, 100), start_time=0.0)
+        store.skip(50)  # e.g. a ring overrun
+        store.write(ramp(150, 200))
+    assert [(s.first_frame, s.n_frames) for s in store.segments] == [(0, 250), (250, 100)]
+    assert store.query_frames(90, 160).tolist() == ramp(90, 10).tolist() + ramp(150, 10).tolist()
+    assert store.query(0.149, 0.151).tolist() == ramp(150, 1).tolist()
+    assert store.query_frames(300, 310).tolist() == ramp(300, 10).tolist()
+
+
+def test_open_recordings_are_bounded(tmp_path):
+    store = SegmentedStore(tmp_path, PARA, segment_seconds=0.1, max_open=2)
+    store.write(ramp(0, 500), start_time=0.0)
+    store.flush()
+    for first in range(0, 500, 100):
+        assert store.query_frames(first, first + 1).tolist() == ramp(first, 1).tolist()
+    assert list(store._recordings) == [s.path for s in store.segments[3:]]
+
+    store.max_age = 0.05
+    store.apply_retention(now=0.4)
+    assert store.segments[0].first_frame == 300
+    doomed = store.segments[0].path
+    assert doomed in store._recordings
+    store.apply_retention(now=0.5)
+    assert doomed not in store._recordings and not doomed.exists()
+    store.close()
+    assert not store._recordings
+
+
+def test_large_write_keeps_writer_queue_small(tmp_path):
+    with SegmentedStore(tmp_path, PARA, segment_seconds=1000) as store:
+        store.write(ramp(0, 300000), start_time=0.0)
+        # The writer queue doesn't scale with the write that opened the segment.
+        assert store._recorder._pool.block_size * store._recorder._pool.count <= 1 << 22
+        store.flush()
+        assert np.array_equal(store.query_frames(0, 300000).reshape(-1), ramp(0, 300000))
@@ -0,0 +1,67 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from mps060602.block import Block
+from mps060602.buffers import as_ushort_array
+from mps060602.clock import SampleClock
+from mps060602.core import MPS060602Para
+from mps060602.errors import AcquisitionNotRunning
+from mps060602.streaming import ContinuousAcquisition
+from pytest import raises
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+class CountingCard:
+    """Stands in for a card, each block is filled with its read index."""
+
+    def __init__(self, delay=0.0005):
+        self.device = SimpleNamespace(number=0)
+        self.state = SimpleNamespace(started=False, parameter=MPS060602Para())
+        self.clock = SampleClock(1000)
+        self.calibration = None
+        self.delay = delay
+        self.reads = 0
+
+    def start(self):
+        self.state.started = True
+
+    def suspend(self):
+        self.state.started = False
+
+    def readinto(self, out, sample_number=None):
+        time.sleep(self.delay)
+        buffer = as_ushort_array(out)
+        np.frombuffer(buffer, dtype=np.uint16)[:] = self.reads
+        self.reads += 1
+        self.clock.advance(len(buffer) // 2)
+        return len(buffer)
+
+
+def test_blocks_arrive_in_order():
+    card = CountingCard()
+    with ContinuousAcquisition(card, block_size=8, n_blocks=4) as acquisition:
+        assert card.state.started
+        values = [int(acquisition.get(timeout=1).raw[0]) for _ in range(20)]
+    assert not card.state.started
+    assert values == sorted(values)
+    assert acquisition.blocks_acquired >= 20
+
+
+def test_overrun_when_consumer_is_slow():
+    card = CountingCard(delay=0)
+    acquisition = ContinuousAcquisition(card, block_size=8, n_blocks=2)
+    acquisition.start()
+    time.sleep(0.05)
+    block = acquisition.get(timeout=1)
+    assert isinstance(block, Block)
+    assert block.raw[0] == 0 and block.index == 0
+    assert acquisition.overruns > 0
+    acquisition.stop()
+    acquisition.release()
+    acquisition.get(timeout=1)
+    with raises(AcquisitionNotRunning):
+        acquisition.get(timeout=1)
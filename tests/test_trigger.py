@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+from mps060602.block import Block
+from mps060602.core import ADChannelMode, PGAAmpRate
+from mps060602.simulated import _to_raw
+from mps060602.trigger import Trigger, TriggerMode
+from pytest import raises
+
+__author__ = "Ofey Chan"
+__copyright__ = "Ofey Chan"
+__license__ = "MIT"
+
+
+def feed(trigger, x, n_blocks):
+    captures = []
+    for chunk in np.array_split(x, n_blocks):
+        captures += trigger.process(chunk)
+    return captures
+
+
+def pulses(positions, length=1000, width=5):
+    x = np.zeros(length)
+    for p in positions:
+        x[p: p + width] = 1.0
+    return x
+
+
+@pytest.mark.parametrize("n_blocks", [1, 7, 333])
+def test_rising_edges_across_blocks(n_blocks):
+    x = pulses([100, 400, 403 + 10, 900]) + np.arange(1000) * 1e-6
+    trigger = Trigger(TriggerMode.rising, 0.5, pre_samples=10, post_samples=10)
+    captures = feed(trigger, x, n_blocks)
+    assert [c.trigger_index for c in captures] == [100, 400, 413, 900]
+    first = captures[0]
+    assert first.pre_samples == 10 and len(first.data) == 20
+    assert first.data[:10] == pytest.approx(x[90:100])
+    assert first.data[10:] == pytest.approx(x[100:110])
+
+
+def test_overlapping_trigger_ignored_and_pending_capture():
+    x = pulses([100, 110])
+    trigger = Trigger(TriggerMode.rising, 0.5, post_samples=20)
+    assert trigger.process(x[:105]) == []
+    (capture,) = trigger.process(x[105:])
+    assert capture.trigger_index == 100
+    assert capture.data == pytest.approx(x[100:120])
+
+
+def test_hysteresis_and_holdoff():
+    noisy = np.array([0, 0.6, 0.45, 0.6, 0.45, 0.6, 0, 0, 0.6, 0, 0, 0, 0, 0.6, 0])
+    trigger = Trigger(TriggerMode.rising, 0.5, hysteresis=0.2, post_samples=1)
+    assert [c.trigger_index for c in trigger.process(noisy)] == [1, 8, 13]
+
+    trigger = Trigger(TriggerMode.rising, 0.5, hysteresis=0.2, post_samples=1, holdoff=8)
+    assert [c.trigger_index for c in trigger.process(noisy)] == [1, 13]
+
+
+def test_falling_level_and_window():
+    x = np.array([1.0, 0.2, 1.0, 0.2, 0.5, 2.0, 0.5])
+    falling = Trigger(TriggerMode.falling, 0.5, post_samples=1)
+    assert [c.trigger_index for c in falling.process(x)] == [1, 3, 6]
+    level = Trigger(TriggerMode.level, 0.9, post_samples=2)
+    assert [c.trigger_index for c in level.process(x)] == [0, 2, 5]
+    window = Trigger(TriggerMode.window, 0.3, upper=1.5, post_samples=1)
+    assert [c.trigger_index for c in window.process(x)] == [1, 3, 5]
+    with raises(ValueError):
+        Trigger(TriggerMode.window, 0.3)
+
+
+def test_block_channel_in_volts():
+    gain = PGAAmpRate.range_2V
+    raw = np.empty(200, dtype=np.uint16)
+    raw[0::2] = _to_raw(np.zeros(100), gain.full_scale)
+    raw[1::2] = _to_raw(pulses([50], length=100), gain.full_scale)
+    trigger = Trigger(TriggerMode.rising, 0.5, post_samples=5, channel=2)
+    (capture,) = trigger.process(Block(raw, ADChannelMode.in1_and_2, gain))
+    assert capture.trigger_index == 50
+    assert capture.data == pytest.approx(1.0, abs=1e-3)
+
+
+def reference_level_triggers(x, threshold, period):
+    """Per sample definition: any sample at or above ``threshold`` once the holdoff ended."""
+    triggers, allowed = [], 0
+    for i, v in enumerate(x):
+        if v >= threshold and i >= allowed:
+            triggers.append(i)
+            allowed = i + period
+    return triggers
+
+
+def test_level_runs_and_holdoff_across_blocks():
+    rng = np.random.default_rng(3)
+    x = np.repeat(rng.random(400), rng.integers(1, 30, 400))
+    trigger = Trigger(TriggerMode.level, 0.7, post_samples=5, holdoff=7)
+    found = []
+    for i in range(0, len(x), 97):
+        found += [c.trigger_index for c in trigger.process(x[i:i + 97])]
+    # Quiet samples complete the last captures.
+    found += [c.trigger_index for c in trigger.process(np.zeros(5))]
+    assert found == reference_level_triggers(x, 0.7, 12)